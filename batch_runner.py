@@ -0,0 +1,92 @@
+from dotenv import load_dotenv
+load_dotenv()
+import argparse
+import asyncio
+import json
+import logging
+
+from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.context import BrowserContextConfig
+
+from src.agent.batch_runner import load_tasks, run_batch
+from src.agent.scheduler import AgentScheduler, BrowserPool
+from src.utils import llm_provider
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch runner for Browser Agent tasks")
+    parser.add_argument("tasks", type=str, help="JSONL file with one task per line (request_id, title, body)")
+    parser.add_argument("--output", type=str, default="./tmp/batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=2, help="Number of tasks run at the same time")
+    parser.add_argument("--max-llm-calls", type=int, default=None, help="Concurrent LLM calls across all tasks")
+    parser.add_argument("--max-steps", type=int, default=100, help="Maximum agent steps per task")
+    parser.add_argument("--retry-failed", action="store_true", help="Run tasks again whose recorded result is not done")
+    parser.add_argument("--llm-provider", type=str, default="openai", help="LLM provider")
+    parser.add_argument("--llm-model", type=str, default="gpt-4o", help="LLM model name")
+    parser.add_argument("--llm-temperature", type=float, default=0.6, help="LLM temperature")
+    parser.add_argument("--llm-base-url", type=str, default=None, help="API endpoint URL (if required)")
+    parser.add_argument("--llm-api-key", type=str, default=None, help="API key (leave blank to use .env)")
+    parser.add_argument("--requests-per-minute", type=float, default=None, help="LLM requests per minute across all tasks")
+    parser.add_argument("--tokens-per-minute", type=float, default=None, help="LLM prompt tokens per minute across all tasks")
+    parser.add_argument("--tool-calling-method", type=str, default="auto", help="Tool calling method for the agent")
+    parser.add_argument("--no-vision", action="store_true", help="Do not send screenshots to the LLM")
+    parser.add_argument("--headful", action="store_true", help="Show the browser windows")
+    parser.add_argument("--window-width", type=int, default=1280, help="Browser window width")
+    parser.add_argument("--window-height", type=int, default=1100, help="Browser window height")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    llm = llm_provider.get_llm_model(
+        provider=args.llm_provider,
+        model_name=args.llm_model,
+        temperature=args.llm_temperature,
+        base_url=args.llm_base_url,
+        api_key=args.llm_api_key,
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute,
+    )
+    browser_pool = BrowserPool(
+        browser_config=BrowserConfig(
+            headless=not args.headful,
+            new_context_config=BrowserContextConfig(
+                window_width=args.window_width,
+                window_height=args.window_height,
+            ),
+        ),
+        context_config=BrowserContextConfig(
+            save_downloads_path="./tmp/downloads",
+            window_width=args.window_width,
+            window_height=args.window_height,
+            force_new_context=True,
+        ),
+    )
+    tool_calling_method = args.tool_calling_method if args.tool_calling_method != "None" else None
+
+    async def _run():
+        scheduler = AgentScheduler(
+            llm=llm,
+            max_workers=args.concurrency,
+            max_concurrent_llm_calls=args.max_llm_calls,
+            browser_pool=browser_pool,
+        )
+        try:
+            return await run_batch(
+                scheduler,
+                load_tasks(args.tasks),
+                args.output,
+                max_steps=args.max_steps,
+                retry_failed=args.retry_failed,
+                agent_kwargs=dict(use_vision=not args.no_vision, tool_calling_method=tool_calling_method),
+            )
+        finally:
+            await scheduler.shutdown(cancel_running=True)
+
+    summary = asyncio.run(_run())
+    print(json.dumps(summary))
+
+
+if __name__ == '__main__':
+    main()
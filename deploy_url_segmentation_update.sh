@@ -1,24 +1,25 @@
 #!/bin/bash
 
-# Deploy URL Segmentation Update Script
-# Updates Docker image and Kubernetes deployment with URL segmentation functionality
+# Deploy URL Handle Update Script
+# Updates Docker image and Kubernetes deployment with URL handle support for presigned URLs
+# (replaces the earlier URL segmentation; the script keeps its name for existing pipelines)
 
 set -e
 
 # Configuration
 IMAGE_NAME="web-ui"
-TAG="url-segmentation-$(date +%Y%m%d-%H%M%S)"
+TAG="url-handles-$(date +%Y%m%d-%H%M%S)"
 ECR_REPO="137386359997.dkr.ecr.us-east-1.amazonaws.com"
 FULL_IMAGE_NAME="${ECR_REPO}/${IMAGE_NAME}:${TAG}"
 DEPLOYMENT_NAME="browser-use-deployment"
 CLUSTER_NAME="browser-use-deployment-cluster"
 REGION="us-east-1"
 
-echo "🚀 Starting URL Segmentation Deployment..."
+echo "🚀 Starting URL Handle Deployment..."
 echo "📦 Building image: ${FULL_IMAGE_NAME}"
 
-# Step 1: Build and push Docker image with URL segmentation changes
-echo "📦 Building Docker image with URL segmentation functionality for linux/amd64..."
+# Step 1: Build and push Docker image with URL handle changes
+echo "📦 Building Docker image with URL handle functionality for linux/amd64..."
 docker build --platform linux/amd64 -t ${FULL_IMAGE_NAME} .
 
 echo "🔐 Logging into ECR..."
@@ -65,17 +66,17 @@ fi
 
 # Step 8: Show deployment summary
 echo ""
-echo "✅ ===== URL SEGMENTATION DEPLOYMENT SUMMARY ====="
+echo "✅ ===== URL HANDLE DEPLOYMENT SUMMARY ====="
 echo "📦 Image: ${FULL_IMAGE_NAME}"
 echo "🚀 Pod: ${NEW_POD} (${POD_STATUS})"
-echo "🛠️  Feature: URL Segmentation for SageMaker presigned URLs"
-echo "🎯 Solution: Automatic URL splitting into manageable segments"
+echo "🛠️  Feature: URL handles for SageMaker presigned URLs"
+echo "🎯 Solution: Long URLs reach the LLM as short url://<hash> handles"
 echo ""
 echo "🔧 Key Features Added:"
-echo "  • URL segmentation functions (200/400 token segments)"
-echo "  • Dynamic task instruction generation"
-echo "  • Pre-populated prerequisite code"
-echo "  • Automatic PLACEHOLDER_URL_1-12 creation"
+echo "  • Single PRESIGNED_URL placeholder in the prerequisite code"
+echo "  • Handles resolved to the full URL right before each action runs"
+echo "  • Full URLs in action results shortened back to handles"
+echo "  • Handle registry cleared at the start of every task"
 echo ""
 echo "🌐 Access Points:"
 echo "  • CloudFront URL: ${CLOUDFRONT_URL}"
@@ -83,14 +84,14 @@ echo "  • Status: HTTP ${HTTP_STATUS}"
 echo ""
 echo "🧪 Testing Instructions:"
 echo "  1. Access CloudFront URL: ${CLOUDFRONT_URL}"
-echo "  2. Check 'Prerequisite' field has segmented SageMaker code"
-echo "  3. Verify 'Your Task or Response' has URL reconstruction steps"
+echo "  2. Check 'Prerequisite' field sets a single PRESIGNED_URL placeholder"
+echo "  3. Run 'open PRESIGNED_URL' and verify the URL opens in one go_to_url step"
 echo "  4. Test with actual SageMaker presigned URL"
 echo ""
 
 # Step 9: Create deployment summary file
-cat > URL_SEGMENTATION_DEPLOYMENT_SUCCESS.md << EOF
-# URL Segmentation Deployment - Success Report
+cat > URL_HANDLE_DEPLOYMENT_SUCCESS.md << EOF
+# URL Handle Deployment - Success Report
 
 ## 🎯 **Deployment Completed Successfully**
 
@@ -100,74 +101,44 @@ cat > URL_SEGMENTATION_DEPLOYMENT_SUCCESS.md << EOF
 - **CloudFront URL**: ${CLOUDFRONT_URL}
 - **HTTP Status**: ${HTTP_STATUS}
 
-### 🛠️ **URL Segmentation Features Deployed**
+### 🛠️ **URL Handle Features Deployed**
 
 #### **1. Core Functionality**
-- **URL Segmentation**: Splits 4500-token URLs into manageable chunks
-- **Dynamic Instructions**: Auto-generates reconstruction steps
-- **Prerequisite Integration**: Pre-populated with SageMaker configuration
+- **URL Handles**: Long placeholder values (presigned URLs) reach the LLM as short \`url://<hash>\` handles
+- **Resolution**: The controller swaps handles for the full URL right before an action runs
+- **Shortening**: Full URLs in action results are turned back into handles, so they never fill the agent's memory
+- **Per-task Scope**: The registry is cleared when a task starts, so handles of earlier tasks do not pile up
 
 #### **2. Implementation Details**
-- **File Modified**: \`src/webui/components/browser_use_agent_tab.py\`
-- **Functions Added**:
-  - \`segment_presigned_url()\`: URL splitting logic
-  - \`generate_task_instructions()\`: Dynamic instruction creation
-  - \`create_segmented_prerequisite_code()\`: Complete prerequisite generation
+- \`src/controller/url_registry.py\`: \`UrlHandleRegistry\` (register, resolve, shorten, clear)
+- \`src/controller/custom_controller.py\`: resolves and shortens handles around every action
+- \`src/webui/components/browser_use_agent_tab.py\`: clears the registry and registers the placeholders when a task starts
+- \`create_presigned_url_prerequisite_code()\`: sets a single PRESIGNED_URL placeholder
 
-#### **3. User Interface Updates**
-- **Prerequisite Field**: Auto-populated with segmented SageMaker code
-- **Task Field**: Pre-filled with URL reconstruction steps (1-12 segments)
-- **Configuration**: Ready for domain "d-9cpchwz1nnno"
+### 🔄 **How URL Handles Work**
 
-### 🔄 **How URL Segmentation Works**
-
-#### **Step 1: Automatic Segmentation**
+#### **Step 1: Prerequisite**
 \`\`\`python
-# In prerequisite code:
-url_segments = segment_url(response["AuthorizedUrl"])
-PLACEHOLDERS["PLACEHOLDER_URL_1"] = segments[0]  # 200 chars
-PLACEHOLDERS["PLACEHOLDER_URL_2"] = segments[1]  # 400 chars
-# ... continues for all segments
+PLACEHOLDERS = {
+    "PRESIGNED_URL": response["AuthorizedUrl"],
+    "TASK_INSTRUCTIONS": "1. open PRESIGNED_URL",
+}
 \`\`\`
 
-#### **Step 2: Task Instructions**
-\`\`\`
-1. open PLACEHOLDER_URL_1
-2. append PLACEHOLDER_URL_2 to the url
-3. append PLACEHOLDER_URL_3 to the url
-... (continues until URL is complete)
-\`\`\`
+#### **Step 2: Task Start**
+PRESIGNED_URL is registered and reaches the LLM as a handle such as \`url://3f9a2c1b\`.
 
 #### **Step 3: Agent Execution**
-1. Agent opens first URL segment
-2. Progressively appends each additional segment
-3. Reconstructs complete presigned URL
-4. Continues with SageMaker Studio tasks
-
-### 🎯 **Benefits Achieved**
-
-#### **Token Management**
-- ✅ Handles 4500-token URLs without overflow
-- ✅ Segments adapt to any URL length
-- ✅ No manual configuration required
-
-#### **User Experience**
-- ✅ Pre-populated with working defaults
-- ✅ Clear step-by-step instructions
-- ✅ Seamless integration with existing workflow
-
-#### **Reliability**
-- ✅ Systematic URL reconstruction
-- ✅ Prevents token limit issues
-- ✅ Maintains URL integrity
+1. Agent emits \`go_to_url\` with the handle
+2. Controller opens the full presigned URL in a single step
+3. Continues with SageMaker Studio tasks
 
 ### 🧪 **Testing Checklist**
 
 - [ ] Access CloudFront URL: ${CLOUDFRONT_URL}
-- [ ] Verify prerequisite field has segmented code
-- [ ] Check task field has reconstruction steps
+- [ ] Verify prerequisite field sets PRESIGNED_URL
 - [ ] Test with actual SageMaker presigned URL
-- [ ] Confirm URL reconstruction works correctly
+- [ ] Confirm the URL opens in a single go_to_url step
 - [ ] Validate SageMaker Studio access
 
 ### 📊 **Deployment Metrics**
@@ -176,23 +147,12 @@ PLACEHOLDERS["PLACEHOLDER_URL_2"] = segments[1]  # 400 chars
 - **Deployment Status**: ✅ SUCCESS
 - **CloudFront Status**: HTTP ${HTTP_STATUS}
 
----
-
-## 🚀 **Ready for Production Use**
-
-Your URL segmentation solution is now live and ready to handle long SageMaker presigned URLs. The system will automatically:
-
-1. **Segment** any presigned URL into manageable chunks
-2. **Generate** appropriate reconstruction instructions
-3. **Execute** systematic URL rebuilding
-4. **Continue** with your SageMaker Studio automation
-
 **Deployment completed successfully at $(date)**
 
 EOF
 
-echo "📄 Summary saved to: URL_SEGMENTATION_DEPLOYMENT_SUCCESS.md"
-echo "🎉 URL Segmentation Deployment Complete!"
+echo "📄 Summary saved to: URL_HANDLE_DEPLOYMENT_SUCCESS.md"
+echo "🎉 URL Handle Deployment Complete!"
 echo ""
 echo "🌟 Your solution is now live at: ${CLOUDFRONT_URL}"
 echo "🔧 Ready to handle SageMaker presigned URLs of any length!"
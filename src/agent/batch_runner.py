@@ -0,0 +1,166 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from browser_use.agent.views import AgentHistoryList
+
+from src.agent.scheduler import JOB_DONE, AgentJob, AgentScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _check_unique_ids(request_ids: Iterable[str], source: str) -> None:
+    seen: Set[str] = set()
+    duplicates: Set[str] = set()
+    for request_id in request_ids:
+        if request_id in seen:
+            duplicates.add(request_id)
+        seen.add(request_id)
+    if duplicates:
+        raise ValueError(f"{source} has duplicate request ids: {', '.join(sorted(duplicates))}")
+
+
+def load_tasks(path: str) -> List[Dict[str, Any]]:
+    """
+    Read batch tasks from JSONL.
+
+    Lines look like `requests.jsonl`: `request_id`, `title` and `body`. A plain
+    `task` field may be used instead of title/body, and `priority` and
+    `max_steps` are optional per-task overrides. Tasks without an id get one
+    from a hash of their text, so it survives edits elsewhere in the file and
+    results still match on resume. Duplicate ids are rejected.
+    """
+    tasks = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            task = record.get("task") or "\n\n".join(
+                part for part in (record.get("title"), record.get("body")) if part
+            )
+            if not task:
+                raise ValueError(f"{path}:{line_number} has no task, title or body")
+            request_id = record.get("request_id") or record.get("id")
+            if not request_id:
+                request_id = "task-" + hashlib.sha1(task.encode("utf-8")).hexdigest()[:12]
+            tasks.append({**record, "request_id": str(request_id), "task": task})
+    _check_unique_ids((task["request_id"] for task in tasks), path)
+    return tasks
+
+
+def load_finished(output_path: str, retry_failed: bool = False) -> Set[str]:
+    """Return the request ids already recorded in `output_path`, the resume point after a crash."""
+    finished = set()
+    if not os.path.exists(output_path):
+        return finished
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn last line from a crash mid-write, that task simply runs again
+                continue
+            if retry_failed and record.get("status") != JOB_DONE:
+                continue
+            finished.add(record.get("request_id"))
+    return finished
+
+
+def result_record(task: Dict[str, Any], job: AgentJob) -> Dict[str, Any]:
+    record = {
+        "request_id": task["request_id"],
+        "title": task.get("title"),
+        "status": job.status,
+        "error": job.error,
+        "duration_seconds": round((job.finished_at or time.time()) - (job.started_at or job.submitted_at), 2),
+    }
+    history = job.result
+    if isinstance(history, AgentHistoryList):
+        record.update(
+            is_done=history.is_done(),
+            success=history.is_successful(),
+            final_result=history.final_result(),
+            errors=[error for error in history.errors() if error],
+            steps=history.number_of_steps(),
+            input_tokens=history.total_input_tokens(),
+        )
+    return record
+
+
+class _ResultWriter:
+    """Appends one JSON line per finished task and syncs it to disk straight away."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Start on a fresh line if the previous run died mid-record
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+            if torn:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+async def run_batch(
+    scheduler: AgentScheduler,
+    tasks: Iterable[Dict[str, Any]],
+    output_path: str,
+    max_steps: int = 100,
+    retry_failed: bool = False,
+    agent_kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, int]:
+    """
+    Run `tasks` on `scheduler` and stream one result line per task to `output_path`.
+
+    Tasks already recorded in the output are skipped, so rerunning the same
+    command after a crash resumes where it stopped.
+    """
+    tasks = list(tasks)
+    # Checked before anything is submitted, the scheduler would refuse a duplicate mid-batch
+    _check_unique_ids((task["request_id"] for task in tasks), "The batch")
+    finished = load_finished(output_path, retry_failed=retry_failed)
+    pending = [task for task in tasks if task["request_id"] not in finished]
+    summary = {"skipped": len(finished), "done": 0, "failed": 0, "cancelled": 0}
+    if not pending:
+        logger.info("Nothing to run, all tasks already have results")
+        return summary
+    logger.info(f"Running {len(pending)} tasks ({len(finished)} already finished)")
+
+    writer = _ResultWriter(output_path)
+    by_job_id = {}
+    try:
+        for task in pending:
+            job_id = scheduler.submit(
+                task["task"],
+                priority=task.get("priority", 0),
+                max_steps=task.get("max_steps", max_steps),
+                job_id=task["request_id"],
+                **(agent_kwargs or {}),
+            )
+            by_job_id[job_id] = task
+
+        for next_job in asyncio.as_completed([scheduler.wait(job_id) for job_id in by_job_id]):
+            job = await next_job
+            record = result_record(by_job_id[job.job_id], job)
+            writer.write(record)
+            summary[job.status] = summary.get(job.status, 0) + 1
+            logger.info(f"[{job.job_id}] {job.status} ({sum(summary.values()) - summary['skipped']}/{len(pending)})")
+    finally:
+        writer.close()
+    return summary
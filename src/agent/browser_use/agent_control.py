@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AgentControl:
+    """
+    Event-based control plane shared by an agent run and the UI driving it.
+
+    The agent blocks on `wait_while_paused` between steps instead of sleeping in
+    a loop, and the UI blocks on `wait_for_change`, which wakes as soon as the
+    agent is paused, resumed or stopped, finishes a step, or asks for help.
+    """
+
+    def __init__(self):
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._changed = asyncio.Event()
+
+    def pause(self) -> None:
+        self._resumed.clear()
+        self.notify()
+
+    def resume(self) -> None:
+        self._resumed.set()
+        self.notify()
+
+    def stop(self) -> None:
+        # Release a paused agent so it can observe the stop flag
+        self._resumed.set()
+        self.notify()
+
+    def notify(self) -> None:
+        """Wake whoever is waiting in `wait_for_change`."""
+        self._changed.set()
+
+    async def wait_while_paused(self, state) -> None:
+        """Block until `state` is neither paused nor stopped-while-paused."""
+        while state.paused and not state.stopped:
+            self._resumed.clear()
+            await self._resumed.wait()
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the next control signal. Signals raised while nobody was waiting
+        are not lost. Returns False if `timeout` expired first.
+        """
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._changed.clear()
+        return True
@@ -3,22 +3,31 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import shutil
+import tempfile
+import weakref
 
 # from lmnr.sdk.decorators import observe
-from browser_use.agent.gif import create_history_gif
 from browser_use.agent.service import Agent, AgentHookFunc
 from src.agent.custom_agent import CustomAgent
 from browser_use.agent.views import (
     ActionResult,
     AgentHistory,
     AgentHistoryList,
+    AgentOutput,
     AgentStepInfo,
     ToolCallingMethod,
 )
 from browser_use.browser.views import BrowserStateHistory
+from langchain_core.messages import BaseMessage
 from browser_use.utils import time_execution_async
 from dotenv import load_dotenv
 from browser_use.agent.message_manager.utils import is_model_without_tool_support
+from src.agent.browser_use.agent_control import AgentControl
+from src.utils.blob_store import BlobStore
+from src.utils.history_journal import HistoryJournal
+from src.utils.history_spill import ScreenshotSpiller
+from src.utils.recording import HistoryVideoRecorder, create_history_gif_async
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -31,6 +40,81 @@ SKIP_LLM_API_KEY_VERIFICATION = (
 class BrowserUseAgent(CustomAgent):
     def __init__(self, *args, placeholders=None, **kwargs):
         super().__init__(*args, placeholders=placeholders, **kwargs)
+        self.control = AgentControl()
+        # Pending GIF render started at the end of run(), see create_history_gif_async
+        self.gif_task: asyncio.Task | None = None
+        # Optional .mp4/.webm/.avi path; step screenshots are streamed into it during run()
+        self.recording_path: str | None = None
+        self.recording_output: str | None = None
+        # Optional .jsonl path; each step is appended to it as soon as it finishes
+        self.journal_path: str | None = None
+        self._persisted_steps = 0
+        # Older step screenshots are moved out of RAM; None (default) keeps them all in memory
+        self.max_screenshots_in_memory: int | None = None
+        self.screenshot_spill_dir = './tmp/agent_screenshots'
+        self._spiller: ScreenshotSpiller | None = None
+        # Use the LLM round trip to pre-resolve link hosts and pre-extract the page, see PagePrefetcher
+        self.speculative_prefetch = False
+
+    async def get_next_action(self, input_messages: list[BaseMessage]) -> AgentOutput:
+        prefetcher = getattr(self.controller, "page_prefetcher", None)
+        if not self.speculative_prefetch or prefetcher is None or self.browser_context is None:
+            return await super().get_next_action(input_messages)
+        prefetcher.start(self.browser_context)
+        try:
+            return await super().get_next_action(input_messages)
+        finally:
+            # Never let speculative work overlap with the actions about to run
+            await prefetcher.cancel()
+
+    async def _persist_new_history(
+            self, journal: HistoryJournal | None, recorder: HistoryVideoRecorder | None
+    ) -> None:
+        """Stream history items added since the last call to the journal and video recorder."""
+        new_items = self.state.history.history[self._persisted_steps:]
+        self._persisted_steps += len(new_items)
+        for item in new_items:
+            if recorder and item.state.screenshot:
+                recorder.submit(item.state.screenshot)
+            if journal:
+                try:
+                    await asyncio.to_thread(journal.append, item)
+                except Exception as e:
+                    logger.error(f'Failed to append step to history journal {journal.path}: {e}')
+
+        if self.max_screenshots_in_memory is not None:
+            if self._spiller is None:
+                # Share the journal's store so each screenshot hits the disk only once
+                store = journal.blob_store if journal else self._new_spill_store()
+                self._spiller = ScreenshotSpiller(store, keep_in_memory=self.max_screenshots_in_memory)
+            try:
+                await asyncio.to_thread(self._spiller.spill, self.state.history)
+            except Exception as e:
+                logger.error(f'Failed to spill history screenshots: {e}')
+
+    def _new_spill_store(self) -> BlobStore:
+        """
+        Store for a run without a journal, in its own directory under screenshot_spill_dir.
+        Spilled history states reference the store, so the directory is removed once the
+        last of them is gone (or at exit).
+        """
+        os.makedirs(self.screenshot_spill_dir, exist_ok=True)
+        store = BlobStore(tempfile.mkdtemp(prefix='run-', dir=self.screenshot_spill_dir))
+        weakref.finalize(store, shutil.rmtree, store.root_dir, ignore_errors=True)
+        return store
+
+    def pause(self) -> None:
+        super().pause()
+        self.control.pause()
+
+    def resume(self) -> None:
+        super().resume()
+        self.control.resume()
+
+    def stop(self) -> None:
+        super().stop()
+        self.state.paused = False
+        self.control.stop()
     
     def _set_tool_calling_method(self) -> ToolCallingMethod | None:
         tool_calling_method = self.settings.tool_calling_method
@@ -56,6 +140,12 @@ class BrowserUseAgent(CustomAgent):
         """Execute the task with maximum number of steps"""
 
         loop = asyncio.get_event_loop()
+        self.gif_task = None
+        self.recording_output = None
+        recorder = HistoryVideoRecorder(self.recording_path) if self.recording_path else None
+        journal = HistoryJournal(self.journal_path) if self.journal_path else None
+        self._persisted_steps = len(self.state.history.history)
+        self._spiller = None
 
         # Set up the Ctrl+C signal handler with callbacks specific to this agent
         from browser_use.utils import SignalHandler
@@ -78,8 +168,8 @@ class BrowserUseAgent(CustomAgent):
                 self.state.last_result = result
 
             for step in range(max_steps):
-                # Check if waiting for user input after Ctrl+C
-                if self.state.paused:
+                # Check if waiting for user input after Ctrl+C (UI pauses are awaited below)
+                if self.state.paused and getattr(loop, 'ctrl_c_pressed', False):
                     signal_handler.wait_for_resume()
                     signal_handler.reset()
 
@@ -93,19 +183,22 @@ class BrowserUseAgent(CustomAgent):
                     logger.info('Agent stopped')
                     break
 
-                while self.state.paused:
-                    await asyncio.sleep(0.2)  # Small delay to prevent CPU spinning
-                    if self.state.stopped:  # Allow stopping while paused
-                        break
+                # Returns as soon as resume() or stop() is called
+                await self.control.wait_while_paused(self.state)
+                if self.state.stopped:
+                    logger.info('Agent stopped')
+                    break
 
                 if on_step_start is not None:
                     await on_step_start(self)
 
                 step_info = AgentStepInfo(step_number=step, max_steps=max_steps)
                 await self.step(step_info)
+                await self._persist_new_history(journal, recorder)
 
                 if on_step_end is not None:
                     await on_step_end(self)
+                self.control.notify()
 
                 if self.state.history.is_done():
                     if self.settings.validate_output and step < max_steps - 1:
@@ -163,11 +256,21 @@ class BrowserUseAgent(CustomAgent):
                     # Log any error during script generation/saving
                     logger.error(f'Failed to save Playwright script: {script_gen_err}', exc_info=True)
 
+            if any(vars(self.recovery_metrics).values()):
+                logger.info(f'get_next_action recovery metrics: {self.recovery_metrics}')
+
+            await self._persist_new_history(journal, recorder)
             await self.close()
 
+            if recorder:
+                self.recording_output = await recorder.close()
+
             if self.settings.generate_gif:
                 output_path: str = 'agent_history.gif'
                 if isinstance(self.settings.generate_gif, str):
                     output_path = self.settings.generate_gif
 
-                create_history_gif(task=self.task, history=self.state.history, output_path=output_path)
+                # Rendered in a worker process so run() returns without waiting for it
+                self.gif_task = asyncio.create_task(
+                    create_history_gif_async(task=self.task, history=self.state.history, output_path=output_path)
+                )
@@ -1,71 +1,163 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import os
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
 from browser_use.agent.service import Agent
-from browser_use.agent.views import AgentOutput
+from browser_use.agent.views import AgentOutput, AgentStepInfo
 from browser_use.browser.views import BrowserState
 from langchain_core.messages import BaseMessage
 from json_repair import repair_json
 
+from src.agent.dom_diff import DiffingMessageManager
+from src.agent.placeholders import PlaceholderSubstituter
+from src.agent.token_budget import StepTokenReport, TokenBudget, TokenCounter
+from src.utils.llm_limits import FairLLMGate, llm_call_key
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class RecoveryMetrics:
+    """Failures seen in get_next_action and how they were handled without a second LLM call."""
+    llm_errors: int = 0
+    parse_failures: int = 0
+    parse_recoveries: int = 0
+    placeholder_failures: int = 0
+    llm_recalls_avoided: int = 0
+
+
 class CustomAgent(Agent):
     def __init__(
         self,
         *args,
         placeholders: Optional[Dict[str, str]] = None,
+        dom_diff: bool = False,
         **kwargs
     ):
         super().__init__(*args, **kwargs)
+        if dom_diff:
+            # Same state and settings, only the way page states are added changes
+            self._message_manager = DiffingMessageManager(
+                task=self._message_manager.task,
+                system_message=self._message_manager.system_prompt,
+                settings=self._message_manager.settings,
+                state=self._message_manager.state,
+            )
         # Make placeholders available to the class
         self.placeholders = placeholders or {}
+        self.recovery_metrics = RecoveryMetrics()
+        self._last_raw_content: Optional[str] = None
+        mm_settings = self._message_manager.settings
+        self.token_budget = TokenBudget(
+            self.settings.max_input_tokens,
+            counter=TokenCounter(
+                chars_per_token=mm_settings.estimated_characters_per_token, image_tokens=mm_settings.image_tokens
+            ),
+        )
+        self.last_token_report: Optional[StepTokenReport] = None
+        # Optional FairLLMGate shared by agents that run side by side, see AgentScheduler.
+        # The key also queues this agent's calls through a rate limited model (get_llm_model).
+        self.llm_gate: Optional[FairLLMGate] = None
+        self.llm_gate_key = "default"
+
+    @property
+    def placeholders(self) -> Dict[str, str]:
+        return self._placeholders
+
+    @placeholders.setter
+    def placeholders(self, value: Optional[Dict[str, str]]) -> None:
+        # Recompile the substitution pattern only when the placeholders change
+        self._placeholders = value or {}
+        self._substituter = PlaceholderSubstituter(self._placeholders)
+
+    def _remove_think_tags(self, text: str) -> str:
+        # Raw-mode responses pass through here right after the LLM call, keep them for parse recovery
+        text = super()._remove_think_tags(text)
+        self._last_raw_content = text
+        return text
+
+    async def step(self, step_info: Optional[AgentStepInfo] = None) -> None:
+        # Planner, page extraction and action calls of the step all queue under this agent's key
+        with llm_call_key(self.llm_gate_key):
+            await super().step(step_info)
 
     async def get_next_action(self, input_messages: list[BaseMessage]) -> AgentOutput:
-        """Override to add placeholder replacement and long URL bypass functionality"""
+        """
+        Get the next action and apply placeholder replacement.
+
+        Failures are never answered with a second LLM call: an unparsable raw
+        response is repaired locally, if placeholder substitution fails the
+        response is used as is, and anything else propagates to the step error
+        handling.
+        """
+        self._last_raw_content = None
+        token_budget = getattr(self, "token_budget", None)
+        if token_budget is not None:
+            await token_budget.counter.load()
+        input_messages = self._apply_token_budget(input_messages)
         try:
-            # Get the normal LLM response first
-            agent_output = await super().get_next_action(input_messages)
-            
-            # Only apply placeholder replacement if we have placeholders and a valid output
-            if not self.placeholders or not agent_output:
-                return agent_output
-            
-            # Convert the agent output to JSON for placeholder replacement
-            try:
-                output_dict = agent_output.model_dump()
-                output_json = json.dumps(output_dict)
-                
-                # Apply Arka's simple placeholder replacement
-                modified = False
-                for key, value in self.placeholders.items():
-                    if key in output_json:
-                        # Check if this is a long URL that might cause issues
-                        if len(value) > 1000 and ("http" in value.lower() or "https" in value.lower()):
-                            logger.info(f"Processing long URL ({len(value)} chars) for {key}")
-                        else:
-                            logger.info(f"Replacing placeholder {key} with {value[:100]}{'...' if len(value) > 100 else ''}")
-                        
-                        output_json = output_json.replace(key, value)
-                        modified = True
-                
-                # Only recreate the object if we actually made changes
-                if modified:
-                    updated_dict = json.loads(output_json)
-                    return AgentOutput(**updated_dict)
-                else:
-                    return agent_output
-                    
-            except Exception as e:
-                logger.warning(f"Error applying placeholders to agent output: {e}")
-                return agent_output
-                
+            llm_gate = getattr(self, "llm_gate", None)
+            if llm_gate is not None:
+                async with llm_gate.slot(self.llm_gate_key):
+                    agent_output = await super().get_next_action(input_messages)
+            else:
+                agent_output = await super().get_next_action(input_messages)
+        except ValueError as e:
+            if "Could not parse response" not in str(e):
+                raise
+            self.recovery_metrics.parse_failures += 1
+            agent_output = self._recover_unparsed_output(e)
+        except Exception:
+            self.recovery_metrics.llm_errors += 1
+            raise
+
+        return self._apply_placeholders(agent_output)
+
+    def _apply_token_budget(self, input_messages: list[BaseMessage]) -> list[BaseMessage]:
+        """Compact the message history under the token budget and record this step's token counts."""
+        token_budget = getattr(self, "token_budget", None)
+        if token_budget is None:
+            return input_messages
+        history = self._message_manager.state.history
+        n_history = len(history.messages)
+        compacted = token_budget.compact(history)
+        if compacted:
+            # Keep any messages the caller appended after the history (e.g. the empty-action retry)
+            input_messages = self._message_manager.get_messages() + input_messages[n_history:]
+        self.last_token_report = token_budget.report(self.state.n_steps, input_messages, history, compacted)
+        return input_messages
+
+    def _recover_unparsed_output(self, error: Exception) -> AgentOutput:
+        """Repair the JSON of the response we already have; re-raise `error` if that fails too."""
+        if not self._last_raw_content:
+            raise error
+        try:
+            parsed_json = repair_json(self._last_raw_content, return_objects=True)
+            agent_output = self.AgentOutput(**parsed_json)
+        except Exception as repair_error:
+            logger.warning(f"Could not repair model output: {repair_error}")
+            raise error
+        agent_output.action = agent_output.action[: self.settings.max_actions_per_step]
+        self.recovery_metrics.parse_recoveries += 1
+        self.recovery_metrics.llm_recalls_avoided += 1
+        logger.info("Recovered unparsable model output with json_repair, no LLM re-call needed.")
+        return agent_output
+
+    def _apply_placeholders(self, agent_output: AgentOutput) -> AgentOutput:
+        if not self.placeholders or not agent_output:
+            return agent_output
+
+        try:
+            return self._substituter.apply(agent_output)
         except Exception as e:
-            logger.error(f"Error in get_next_action: {e}")
-            # If everything fails, try the parent method without any modifications
-            return await super().get_next_action(input_messages)
+            # Substitution is deterministic, trying again would fail the same way
+            self.recovery_metrics.placeholder_failures += 1
+            logger.warning(f"Error applying placeholders to agent output: {e}")
+
+        # Keep the response we paid for rather than asking the LLM again
+        self.recovery_metrics.llm_recalls_avoided += 1
+        return agent_output
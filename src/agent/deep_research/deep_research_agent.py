@@ -34,6 +34,7 @@ from browser_use.browser.context import BrowserContextConfig
 from src.agent.browser_use.browser_use_agent import BrowserUseAgent
 from src.browser.custom_browser import CustomBrowser
 from src.controller.custom_controller import CustomController
+from src.utils.llm_provider import get_llm_governor
 from src.utils.mcp_client import setup_mcp_client_and_tools
 
 logger = logging.getLogger(__name__)
@@ -143,6 +144,8 @@ async def run_single_browser_task(
         # Store instance for potential stop() call
         task_key = f"{task_id}_{uuid.uuid4()}"
         _BROWSER_AGENT_INSTANCES[task_key] = bu_agent_instance
+        # Parallel agents take turns on the shared LLM rate limits
+        bu_agent_instance.llm_gate_key = task_key
 
         # --- Run with Stop Check ---
         # BrowserUseAgent needs to internally check a stop signal or have a stop method.
@@ -219,7 +222,16 @@ async def _run_browser_search_tool(
     )
 
     results = []
-    semaphore = asyncio.Semaphore(max_parallel_browsers)
+    parallel_browsers = max_parallel_browsers
+    governor = get_llm_governor(llm)
+    if governor is not None:
+        # No point in more browsers than the LLM rate limits can keep busy
+        parallel_browsers = governor.recommended_parallelism(max_parallel_browsers)
+        if parallel_browsers < max_parallel_browsers:
+            logger.info(
+                f"[Browser Tool {task_id}] LLM limits allow {parallel_browsers} of {max_parallel_browsers} parallel browsers"
+            )
+    semaphore = asyncio.Semaphore(parallel_browsers)
 
     async def task_wrapper(query):
         async with semaphore:
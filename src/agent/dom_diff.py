@@ -0,0 +1,165 @@
+import dataclasses
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from browser_use.agent.message_manager.service import MessageManager
+from browser_use.agent.views import ActionResult, AgentStepInfo
+from browser_use.browser.views import BrowserState
+from langchain_core.messages import HumanMessage
+
+logger = logging.getLogger(__name__)
+
+# "\t\t[12]<button>Save />" or "*[12]*<a ...>" for elements new since the last step
+_ELEMENT_LINE = re.compile(r"^\t*\*?\[(\d+)\]\*?(.*)$")
+
+
+def parse_elements(elements_text: str) -> Dict[int, str]:
+    """
+    Map highlight index -> element line from `clickable_elements_to_string` output.
+
+    Plain text lines belong to the element above them, and the "new element"
+    markers are dropped so an element does not count as changed just because
+    it stopped being new.
+    """
+    elements: Dict[int, List[str]] = {}
+    current: Optional[List[str]] = None
+    for line in elements_text.split("\n"):
+        match = _ELEMENT_LINE.match(line)
+        if match:
+            current = elements.setdefault(int(match.group(1)), [])
+            current.append(f"[{match.group(1)}]{match.group(2)}")
+        elif current is not None and line.strip():
+            current.append(line.strip())
+    return {index: "\n".join(lines) for index, lines in elements.items()}
+
+
+def diff_elements(base: Dict[int, str], current: Dict[int, str]) -> str:
+    """Describe the elements added, removed or changed in `current` relative to `base`."""
+    lines = []
+    for index in sorted(base.keys() | current.keys()):
+        old, new = base.get(index), current.get(index)
+        if old == new:
+            continue
+        if old is None:
+            lines.append(f"+ {new}")
+        elif new is None:
+            lines.append(f"- [{index}]")
+        else:
+            lines.append(f"~ {new}")
+    return "\n".join(lines)
+
+
+class _StaticElementTree:
+    """Stands in for a DOM tree in AgentMessagePrompt with pre-rendered element text."""
+
+    def __init__(self, text: str):
+        self._text = text
+
+    def clickable_elements_to_string(self, include_attributes=None) -> str:
+        return self._text
+
+
+@dataclass
+class _TabBase:
+    url: str
+    elements: Dict[int, str]
+    message: Optional[HumanMessage] = None
+
+
+class DiffingMessageManager(MessageManager):
+    """
+    MessageManager that sends element diffs instead of the full element list.
+
+    The first state of a tab is sent in full and, once the step is over, kept in
+    the history as a text-only reference. Later states of that tab list only
+    the elements added (+), removed (-) or changed (~) against the reference,
+    keyed by highlight index. A full state (and a new reference) is sent after
+    navigation, on an unknown tab, or when the diff would not be much smaller.
+    """
+
+    def __init__(self, *args, max_diff_ratio: float = 0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_diff_ratio = max_diff_ratio
+        self._bases: Dict[int, _TabBase] = {}
+        self._pending = None
+        self.full_states = 0
+        self.diff_states = 0
+
+    @staticmethod
+    def _tab_id(state: BrowserState) -> int:
+        for tab in state.tabs or []:
+            if tab.url == state.url:
+                return tab.page_id
+        return -1
+
+    def add_state_message(
+        self,
+        state: BrowserState,
+        result: Optional[List[ActionResult]] = None,
+        step_info: Optional[AgentStepInfo] = None,
+        use_vision=True,
+    ) -> None:
+        self._pending = None
+        self._forget_closed_tabs(state)
+        elements_text = state.element_tree.clickable_elements_to_string(
+            include_attributes=self.settings.include_attributes
+        )
+        elements = parse_elements(elements_text)
+        tab_id = self._tab_id(state)
+        base = self._bases.get(tab_id)
+
+        if base is not None and base.url == state.url:
+            diff = diff_elements(base.elements, elements)
+            if len(diff) <= self.max_diff_ratio * len(elements_text):
+                self.diff_states += 1
+                text = (
+                    "(Only changes against the reference state of this tab above are listed; "
+                    "all other elements and their indexes are unchanged.)\n"
+                    + (diff or "No changes.")
+                )
+                state = dataclasses.replace(state, element_tree=_StaticElementTree(text))
+                super().add_state_message(state, result, step_info, use_vision)
+                return
+
+        self.full_states += 1
+        full_state = dataclasses.replace(state, element_tree=_StaticElementTree(elements_text))
+        super().add_state_message(full_state, result, step_info, use_vision)
+        self._pending = (tab_id, _TabBase(url=state.url, elements=elements), elements_text, self.state.history.messages[-1])
+
+    def _remove_last_state_message(self) -> None:
+        pending, self._pending = self._pending, None
+        messages = self.state.history.messages
+        if pending is None or not messages or messages[-1] is not pending[3]:
+            super()._remove_last_state_message()
+            return
+
+        # Keep the full state, without screenshot and per-step details, as the tab's reference
+        tab_id, base, elements_text, managed = pending
+        self._remove_base(tab_id)
+        base.message = HumanMessage(
+            content=f"[Reference state of tab {tab_id}, later states only list changes against it]\n"
+                    f"Current url: {base.url}\n{elements_text}"
+        )
+        self.state.history.current_tokens -= managed.metadata.tokens
+        managed.message = base.message
+        managed.metadata.tokens = self._count_tokens(base.message)
+        self.state.history.current_tokens += managed.metadata.tokens
+        self._bases[tab_id] = base
+
+    def _remove_base(self, tab_id: int) -> None:
+        base = self._bases.pop(tab_id, None)
+        if base is None:
+            return
+        history = self.state.history
+        for i, managed in enumerate(history.messages):
+            if managed.message is base.message:
+                history.current_tokens -= managed.metadata.tokens
+                del history.messages[i]
+                break
+
+    def _forget_closed_tabs(self, state: BrowserState) -> None:
+        open_tabs = {tab.page_id for tab in state.tabs or []}
+        for tab_id in [tab_id for tab_id in self._bases if tab_id != -1 and tab_id not in open_tabs]:
+            self._remove_base(tab_id)
@@ -0,0 +1,77 @@
+import logging
+import re
+from typing import Any, Dict, Optional, Set
+
+from browser_use.agent.views import AgentOutput
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class PlaceholderSubstituter:
+    """
+    Replaces placeholder keys with their values in the string leaves of an
+    AgentOutput's actions.
+
+    All keys are compiled into one regex alternation (longest key first, so a
+    key that is a prefix of another never wins). The output is walked in place
+    of a dump/replace/parse cycle, and untouched parts are returned as the same
+    objects, so an output without placeholders comes back unchanged.
+    """
+
+    def __init__(self, placeholders: Optional[Dict[str, str]] = None):
+        self.placeholders = {key: value for key, value in (placeholders or {}).items() if key}
+        keys = sorted(self.placeholders, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, keys))) if keys else None
+
+    def substitute_text(self, text: str, replaced: Optional[Set[str]] = None) -> str:
+        if self._pattern is None or not self._pattern.search(text):
+            return text
+
+        def _replace(match: re.Match) -> str:
+            if replaced is not None:
+                replaced.add(match.group(0))
+            return self.placeholders[match.group(0)]
+
+        return self._pattern.sub(_replace, text)
+
+    def _walk(self, value: Any, replaced: Set[str]) -> Any:
+        if isinstance(value, str):
+            return self.substitute_text(value, replaced)
+        if isinstance(value, BaseModel):
+            updates = {}
+            for name in type(value).model_fields:
+                field_value = getattr(value, name, None)
+                new_value = self._walk(field_value, replaced)
+                if new_value is not field_value:
+                    updates[name] = new_value
+            return value.model_copy(update=updates) if updates else value
+        if isinstance(value, (list, tuple)):
+            items = [self._walk(item, replaced) for item in value]
+            if all(new is old for new, old in zip(items, value)):
+                return value
+            return type(value)(items)
+        if isinstance(value, dict):
+            items = {key: self._walk(item, replaced) for key, item in value.items()}
+            if all(items[key] is item for key, item in value.items()):
+                return value
+            return items
+        return value
+
+    def apply(self, agent_output: AgentOutput) -> AgentOutput:
+        """Return `agent_output` with placeholders in its action params replaced."""
+        if self._pattern is None or not agent_output or not agent_output.action:
+            return agent_output
+
+        replaced: Set[str] = set()
+        actions = self._walk(agent_output.action, replaced)
+        if actions is agent_output.action:
+            return agent_output
+
+        for key in replaced:
+            value = self.placeholders[key]
+            if len(value) > 1000 and "http" in value.lower():
+                logger.info(f"Processing long URL ({len(value)} chars) for {key}")
+            else:
+                logger.info(f"Replacing placeholder {key} with {value[:100]}{'...' if len(value) > 100 else ''}")
+        return agent_output.model_copy(update={"action": actions})
@@ -0,0 +1,274 @@
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from src.agent.browser_use.browser_use_agent import BrowserUseAgent
+from src.browser.custom_browser import CustomBrowser
+from src.controller.custom_controller import CustomController
+from src.utils.llm_limits import FairLLMGate
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+@dataclass
+class AgentJob:
+    task: str
+    priority: int = 0
+    # Jobs with the same key share one turn in the LLM rate limit rotation
+    fairness_key: str = "default"
+    max_steps: int = 100
+    agent_kwargs: Dict[str, Any] = field(default_factory=dict)
+    job_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = JOB_QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_requested: bool = False
+    agent: Optional[BrowserUseAgent] = field(default=None, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = {
+            "job_id": self.job_id,
+            "task": self.task,
+            "priority": self.priority,
+            "fairness_key": self.fairness_key,
+            "status": self.status,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.agent is not None:
+            info["steps"] = self.agent.state.n_steps
+        return info
+
+
+class BrowserPool:
+    """
+    Leases one fresh browser context per job.
+
+    Browsers are launched lazily and each hosts up to `contexts_per_browser`
+    contexts, so a pool of many workers spreads over several browser processes.
+    """
+
+    def __init__(
+        self,
+        browser_config: Optional[BrowserConfig] = None,
+        context_config: Optional[BrowserContextConfig] = None,
+        contexts_per_browser: int = 4,
+        browser_factory: Callable[[Optional[BrowserConfig]], Browser] = lambda config: CustomBrowser(config=config),
+    ):
+        self.browser_config = browser_config
+        self.context_config = context_config
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.browser_factory = browser_factory
+        self._leases: Dict[Browser, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def _pick_browser(self) -> Browser:
+        async with self._lock:
+            for browser, leases in self._leases.items():
+                if leases < self.contexts_per_browser:
+                    self._leases[browser] += 1
+                    return browser
+            browser = self.browser_factory(self.browser_config)
+            self._leases[browser] = 1
+            return browser
+
+    @asynccontextmanager
+    async def lease(self):
+        browser = await self._pick_browser()
+        context = None
+        try:
+            context = await browser.new_context(config=self.context_config)
+            yield browser, context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Error closing leased browser context: {e}")
+            async with self._lock:
+                self._leases[browser] -= 1
+
+    async def close(self) -> None:
+        async with self._lock:
+            browsers, self._leases = list(self._leases), {}
+        for browser in browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing pooled browser: {e}")
+
+
+class AgentScheduler:
+    """
+    Runs many BrowserUseAgent jobs with a bounded worker pool.
+
+    Jobs are taken by priority (lower first, FIFO within a priority), each
+    worker leases its own browser context from a BrowserPool, and all agents
+    share one FairLLMGate so LLM capacity is split evenly between fairness
+    keys. Use `submit`, `status`, `cancel` and `wait`.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        max_workers: int = 4,
+        max_concurrent_llm_calls: Optional[int] = None,
+        browser_pool: Optional[BrowserPool] = None,
+        job_runner: Optional[Callable[["AgentScheduler", AgentJob, Browser, BrowserContext], Awaitable[Any]]] = None,
+    ):
+        self.llm = llm
+        self.max_workers = max(1, max_workers)
+        self.llm_gate = FairLLMGate(max_concurrent_llm_calls or self.max_workers)
+        self.browser_pool = browser_pool or BrowserPool()
+        self.job_runner = job_runner or run_browser_use_job
+        self.jobs: Dict[str, AgentJob] = {}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_workers)]
+        logger.info(f"Agent scheduler started with {self.max_workers} workers")
+
+    async def shutdown(self, cancel_running: bool = False) -> None:
+        """Stop the workers. Queued jobs are cancelled; running jobs finish unless `cancel_running`."""
+        for job in self.jobs.values():
+            if job.status == JOB_QUEUED or (cancel_running and job.status == JOB_RUNNING):
+                self.cancel(job.job_id)
+        if self._workers:
+            # Workers skip cancelled entries, so this returns once running jobs are done
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.browser_pool.close()
+
+    def submit(
+        self,
+        task: str,
+        priority: int = 0,
+        fairness_key: str = "default",
+        max_steps: int = 100,
+        job_id: Optional[str] = None,
+        **agent_kwargs,
+    ) -> str:
+        """Queue a task and return its job id. Extra keyword arguments go to BrowserUseAgent."""
+        job = AgentJob(task=task, priority=priority, fairness_key=fairness_key, max_steps=max_steps,
+                       agent_kwargs=agent_kwargs)
+        if job_id:
+            job.job_id = job_id
+        if job.job_id in self.jobs:
+            raise ValueError(f"Job {job.job_id} already exists")
+        self.jobs[job.job_id] = job
+        self._queue.put_nowait((priority, next(self._sequence), job.job_id))
+        self.start()
+        return job.job_id
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job {job_id}")
+        return job.to_dict()
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job. Returns False if it had already finished."""
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+        if job.status == JOB_QUEUED:
+            self._finish(job, JOB_CANCELLED)
+            return True
+        job.cancel_requested = True
+        if job.agent is not None:
+            job.agent.stop()
+        if job._task is not None:
+            job._task.cancel()
+        return True
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> AgentJob:
+        job = self.jobs[job_id]
+        await asyncio.wait_for(job._done.wait(), timeout)
+        return job
+
+    def _finish(self, job: AgentJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job._done.set()
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs[job_id]
+            try:
+                if job.status != JOB_QUEUED:
+                    continue
+                await self._run_job(job, worker_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: AgentJob, worker_id: int) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        logger.info(f"Worker {worker_id} running job {job.job_id} (priority {job.priority})")
+        try:
+            async with self.browser_pool.lease() as (browser, context):
+                if job.cancel_requested:
+                    raise asyncio.CancelledError()
+                job._task = asyncio.create_task(self.job_runner(self, job, browser, context))
+                job.result = await job._task
+        except asyncio.CancelledError:
+            self._finish(job, JOB_CANCELLED)
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                # The worker itself is being cancelled, not just the job
+                raise
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}", exc_info=True)
+            self._finish(job, JOB_FAILED, str(e))
+        else:
+            self._finish(job, JOB_DONE)
+        finally:
+            job._task = None
+            job.agent = None
+
+
+async def run_browser_use_job(scheduler: AgentScheduler, job: AgentJob, browser: Browser,
+                              context: BrowserContext) -> Any:
+    """Default job runner: one BrowserUseAgent on the leased context."""
+    agent_kwargs = dict(job.agent_kwargs)
+    agent_kwargs.setdefault("llm", scheduler.llm)
+    agent_kwargs.setdefault("controller", CustomController())
+    agent_kwargs.setdefault("source", "scheduler")
+    agent = BrowserUseAgent(task=job.task, browser=browser, browser_context=context, **agent_kwargs)
+    agent.state.agent_id = job.job_id
+    agent.llm_gate = scheduler.llm_gate
+    agent.llm_gate_key = job.fairness_key
+    job.agent = agent
+    return await agent.run(max_steps=job.max_steps)
@@ -0,0 +1,266 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Message types that belong to a past step and may be dropped together
+_STEP_MESSAGE_TYPES = {"model_output", "tool", "action_result", "plan"}
+
+_TRUNCATED_SUFFIX = " chars truncated]"
+
+# tiktoken encoding to count with, e.g. cl100k_base. Loading it may download the vocabulary,
+# so unless it is configured tokens are estimated from characters
+TOKENIZER_ENCODING = os.getenv("TOKEN_BUDGET_ENCODING", "").strip() or None
+TOKENIZER_LOAD_TIMEOUT = float(os.getenv("TOKEN_BUDGET_ENCODING_TIMEOUT", 10))
+_DEFAULT_ENCODING = "cl100k_base"
+
+# Loaded encodings by name, and the names a load was started for (each is tried once)
+_encodings: Dict[str, Any] = {}
+_attempted: set = set()
+_encoding_lock = threading.Lock()
+
+
+def _load_encoding(name: str):
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.info(f"tiktoken encoding {name} not available, estimating tokens from characters: {e}")
+        return None
+    with _encoding_lock:
+        _encodings[name] = encoding
+    return encoding
+
+
+async def load_encoding(name: str, timeout: float = TOKENIZER_LOAD_TIMEOUT):
+    """
+    Load a tiktoken encoding without blocking the event loop; None if it is unavailable.
+
+    The load runs in a daemon thread and is awaited for at most `timeout`
+    seconds. It is only attempted once per process; a load that finishes
+    after the timeout still makes the encoding available to later counts.
+    """
+    with _encoding_lock:
+        if name in _encodings or name in _attempted:
+            return _encodings.get(name)
+        _attempted.add(name)
+
+    future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def _run():
+        if future.set_running_or_notify_cancel():
+            future.set_result(_load_encoding(name))
+
+    # Not the default executor: asyncio.run waits for its threads on exit, and a download may hang
+    threading.Thread(target=_run, name=f"load-encoding-{name}", daemon=True).start()
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Loading tiktoken encoding {name} timed out after {timeout:.0f}s, estimating tokens from characters")
+        return None
+
+
+class TokenCounter:
+    """
+    Counts message tokens with a tiktoken encoding once it is loaded, else by characters per token.
+
+    Counting never loads the encoding itself; `load` does so off the event
+    loop for a configured `encoding`. Without one, an encoding already loaded
+    in this process is still used.
+    """
+
+    def __init__(
+        self,
+        chars_per_token: int = 3,
+        image_tokens: int = 800,
+        use_tokenizer: bool = True,
+        encoding: Optional[str] = TOKENIZER_ENCODING,
+    ):
+        self.chars_per_token = max(1, chars_per_token)
+        self.image_tokens = image_tokens
+        self.use_tokenizer = use_tokenizer
+        self.encoding = encoding
+
+    async def load(self, timeout: float = TOKENIZER_LOAD_TIMEOUT) -> None:
+        if self.use_tokenizer and self.encoding:
+            await load_encoding(self.encoding, timeout)
+
+    def count_text(self, text: str) -> int:
+        encoding = _encodings.get(self.encoding or _DEFAULT_ENCODING) if self.use_tokenizer else None
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return len(text) // self.chars_per_token
+
+    def count(self, message: BaseMessage) -> int:
+        tokens = 0
+        if isinstance(message.content, list):
+            for item in message.content:
+                if "image_url" in item:
+                    tokens += self.image_tokens
+                elif isinstance(item, dict) and "text" in item:
+                    tokens += self.count_text(item["text"])
+        else:
+            tokens += self.count_text(str(message.content))
+        if isinstance(message, AIMessage) and message.tool_calls:
+            tokens += self.count_text(str(message.tool_calls))
+        return tokens
+
+
+def classify_message(message: BaseMessage, message_type: Optional[str] = None) -> str:
+    """Bucket a history message into the categories reported per step."""
+    if isinstance(message, SystemMessage):
+        return "system"
+    if message_type == "init":
+        return "init"
+    if isinstance(message, ToolMessage):
+        return "tool"
+    if isinstance(message, AIMessage):
+        return "model_output" if message.tool_calls else "plan"
+    if isinstance(message, HumanMessage):
+        if isinstance(message.content, list) or "Current url:" in message.content:
+            return "state"
+        if message.content.startswith(("Action result:", "Action error:")):
+            return "action_result"
+    return "other"
+
+
+@dataclass
+class StepTokenReport:
+    step: int
+    total: int
+    budget: int
+    by_type: Dict[str, int] = field(default_factory=dict)
+    compacted: int = 0
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {tokens:,}" for name, tokens in sorted(self.by_type.items(), key=lambda kv: -kv[1]))
+        text = f"{self.total:,}/{self.budget:,} prompt tokens ({parts})"
+        if self.compacted:
+            text += f", {self.compacted:,} compacted"
+        return text
+
+
+class TokenBudget:
+    """
+    Keeps an agent's message history under a token budget.
+
+    Before every LLM call, action results older than `keep_recent_steps` steps
+    are truncated to `max_old_result_chars`, which bounds how much each past
+    step costs. If the history is still over `max_tokens`, the oldest steps
+    (model output, tool reply and their results) are dropped as a unit, so
+    tool calls always keep their replies. System, task and current-state
+    messages are never touched.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        keep_recent_steps: int = 3,
+        max_old_result_chars: int = 500,
+        counter: Optional[TokenCounter] = None,
+        max_reports: int = 100,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_steps = keep_recent_steps
+        self.max_old_result_chars = max_old_result_chars
+        self.counter = counter or TokenCounter()
+        # Reports of the most recent steps only, long runs would otherwise keep one per step
+        self.reports: Deque[StepTokenReport] = deque(maxlen=max_reports)
+        # id(message) -> (message, tokens); the message is held so ids are not reused
+        self._counts: Dict[int, tuple] = {}
+
+    def _count(self, message: BaseMessage) -> int:
+        cached = self._counts.get(id(message))
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        tokens = self.counter.count(message)
+        self._counts[id(message)] = (message, tokens)
+        return tokens
+
+    def _step_starts(self, messages) -> List[int]:
+        # A step in the history starts with the model output that produced it
+        return [
+            i for i, managed in enumerate(messages)
+            if classify_message(managed.message, managed.metadata.message_type) == "model_output"
+        ]
+
+    def _truncate_old_results(self, messages) -> int:
+        starts = self._step_starts(messages)
+        if len(starts) <= self.keep_recent_steps:
+            return 0
+        cutoff = starts[len(starts) - self.keep_recent_steps] if self.keep_recent_steps else len(messages)
+        saved = 0
+        for managed in messages[:cutoff]:
+            message = managed.message
+            if classify_message(message, managed.metadata.message_type) != "action_result":
+                continue
+            if len(message.content) <= self.max_old_result_chars or message.content.endswith(_TRUNCATED_SUFFIX):
+                continue
+            before = self._count(message)
+            omitted = len(message.content) - self.max_old_result_chars
+            managed.message = HumanMessage(
+                content=f"{message.content[:self.max_old_result_chars]}... [{omitted}{_TRUNCATED_SUFFIX}"
+            )
+            after = self._count(managed.message)
+            managed.metadata.tokens = after
+            saved += before - after
+        return saved
+
+    def _drop_oldest_step(self, messages) -> int:
+        starts = self._step_starts(messages)
+        if len(starts) <= self.keep_recent_steps:
+            return 0
+        start = starts[0]
+        end = starts[1] if len(starts) > 1 else len(messages)
+        # New-task and state messages inside the step are kept
+        dropped = [
+            managed for managed in messages[start:end]
+            if classify_message(managed.message, managed.metadata.message_type) in _STEP_MESSAGE_TYPES
+        ]
+        dropped_ids = {id(managed) for managed in dropped}
+        messages[:] = [managed for managed in messages if id(managed) not in dropped_ids]
+        return sum(self._count(managed.message) for managed in dropped)
+
+    def compact(self, history) -> int:
+        """Compact `history` (a browser_use MessageHistory) in place. Returns the tokens saved."""
+        messages = history.messages
+        saved = self._truncate_old_results(messages)
+        total = sum(self._count(managed.message) for managed in messages)
+        while total > self.max_tokens:
+            dropped = self._drop_oldest_step(messages)
+            if not dropped:
+                break
+            saved += dropped
+            total -= dropped
+        if saved:
+            history.current_tokens = sum(managed.metadata.tokens for managed in messages)
+            logger.info(f"Compacted message history by {saved} tokens, now {total}/{self.max_tokens}")
+        # Forget counts of messages that left the history
+        live = {id(managed.message) for managed in messages}
+        self._counts = {key: value for key, value in self._counts.items() if key in live}
+        return saved
+
+    def report(self, step: int, messages: List[BaseMessage], history=None, compacted: int = 0) -> StepTokenReport:
+        """Record the per-type token counts of the prompt about to be sent for `step`."""
+        types = {}
+        if history is not None:
+            types = {id(managed.message): managed.metadata.message_type for managed in history.messages}
+        by_type: Dict[str, int] = {}
+        for message in messages:
+            kind = classify_message(message, types.get(id(message)))
+            by_type[kind] = by_type.get(kind, 0) + self._count(message)
+        report = StepTokenReport(
+            step=step, total=sum(by_type.values()), budget=self.max_tokens, by_type=by_type, compacted=compacted
+        )
+        self.reports.append(report)
+        logger.debug(f"Step {step}: {report.summary()}")
+        return report
@@ -9,7 +9,7 @@ from playwright.async_api import (
     Playwright,
     async_playwright,
 )
-from browser_use.browser.browser import Browser
+from browser_use.browser.browser import Browser, BrowserConfig
 from browser_use.browser.context import BrowserContext, BrowserContextConfig
 from playwright.async_api import BrowserContext as PlaywrightBrowserContext
 import logging
@@ -94,6 +94,41 @@ logger = logging.getLogger(__name__)
 
 class CustomBrowser(Browser):
 
+    def __init__(self, config: BrowserConfig | None = None):
+        super().__init__(config=config)
+        self.disconnected = False
+        self._closing = False
+
+    async def _init(self) -> PlaywrightBrowser:
+        """Initialize the browser and watch it for unexpected disconnects."""
+        playwright_browser = await super()._init()
+        self.disconnected = False
+        self._closing = False
+        playwright_browser.on("disconnected", self._on_disconnected)
+        return playwright_browser
+
+    def _on_disconnected(self, playwright_browser: PlaywrightBrowser) -> None:
+        if self._closing or playwright_browser is not self.playwright_browser:
+            return
+        logger.warning("Browser disconnected unexpectedly, it will be relaunched on next use.")
+        self.disconnected = True
+
+    async def reconnect(self) -> PlaywrightBrowser:
+        """Drop the dead playwright handles and launch (or re-attach to) a fresh browser."""
+        logger.info("Reconnecting browser after disconnect...")
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                logger.debug(f"Failed to stop stale playwright instance: {e}")
+        self.playwright_browser = None
+        self.playwright = None
+        return await self._init()
+
+    async def close(self):
+        self._closing = True
+        await super().close()
+
     async def new_context(self, config: BrowserContextConfig | None = None) -> CustomBrowserContext:
         """Create a browser context"""
         browser_config = self.config.model_dump() if self.config else {}
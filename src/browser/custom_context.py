@@ -1,19 +1,34 @@
+import asyncio
 import json
 import logging
 import os
 import random
+from dataclasses import dataclass, field
 
 from browser_use.browser.browser import Browser, IN_DOCKER
-from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig, BrowserSession
+from browser_use.browser.views import BrowserError, BrowserState
 from playwright.async_api import Browser as PlaywrightBrowser
 from playwright.async_api import BrowserContext as PlaywrightBrowserContext
+from playwright.async_api import Page
 from typing import Optional
 from browser_use.browser.context import BrowserContextState
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class BrowserContextSnapshot:
+    """Last known-good layout of a context, used to rebuild it after a crash."""
+    tab_urls: list[str] = field(default_factory=list)
+    active_tab_index: int = 0
+    cookies: list[dict] = field(default_factory=list)
+
+
 class CustomBrowserContext(BrowserContext):
+    # Consecutive rebuilds allowed before the crash is surfaced to the agent
+    max_recoveries: int = 3
+
     def __init__(
             self,
             browser: 'Browser',
@@ -21,3 +36,152 @@ class CustomBrowserContext(BrowserContext):
             state: Optional[BrowserContextState] = None,
     ):
         super(CustomBrowserContext, self).__init__(browser=browser, config=config, state=state)
+        self.crashed = False
+        self.recovery_count = 0
+        self.last_snapshot: Optional[BrowserContextSnapshot] = None
+        self._closing = False
+
+    async def _initialize_session(self) -> BrowserSession:
+        """Initialize the session and subscribe to crash / close events."""
+        session = await super()._initialize_session()
+        self.crashed = False
+        self._closing = False
+        session.context.on("close", self._on_context_close)
+        session.context.on("page", self._watch_page)
+        for page in session.context.pages:
+            self._watch_page(page)
+        return session
+
+    def _watch_page(self, page: Page) -> None:
+        page.on("crash", self._on_page_crash)
+
+    def _on_page_crash(self, page: Page) -> None:
+        if self.session is None or page.context is not self.session.context:
+            return
+        logger.warning(f"Page crashed: {page.url}")
+        self.crashed = True
+
+    def _on_context_close(self, context: PlaywrightBrowserContext) -> None:
+        if self._closing or self.session is None or context is not self.session.context:
+            return
+        logger.warning("Browser context closed unexpectedly.")
+        self.crashed = True
+
+    def is_healthy(self) -> bool:
+        """False once a crash or disconnect has been observed on the live session."""
+        if self.session is None:
+            # Nothing to lose, the session is created lazily on next use
+            return True
+        return not self.crashed and not getattr(self.browser, "disconnected", False)
+
+    async def check_alive(self, timeout: float = 5.0) -> bool:
+        """
+        Round-trip to the current page, for contexts that may have died without an event.
+        Marks the context as crashed if the page does not answer within `timeout` seconds.
+        """
+        if self.session is None or not self.is_healthy():
+            return self.is_healthy()
+        try:
+            pages = [page for page in self.session.context.pages if not page.is_closed()]
+            page = self.agent_current_page if self.agent_current_page in pages else (pages[0] if pages else None)
+            if page is None:
+                raise BrowserError("No open page left in the browser context")
+            await asyncio.wait_for(page.evaluate("1"), timeout)
+        except Exception as e:
+            logger.warning(f"Browser context is not responding: {e}")
+            self.crashed = True
+            return False
+        return True
+
+    async def take_snapshot(self) -> None:
+        """Record open tabs and cookies so the context can be rebuilt later."""
+        if self.session is None:
+            return
+        try:
+            pages = [
+                page for page in self.session.context.pages
+                if not page.is_closed()
+                   and not page.url.startswith("chrome://")
+                   and not page.url.startswith("chrome-extension://")
+            ]
+            active_tab_index = pages.index(self.agent_current_page) if self.agent_current_page in pages else 0
+            cookies = await self.session.context.cookies()
+        except Exception as e:
+            logger.debug(f"Failed to snapshot browser context: {e}")
+            return
+        self.last_snapshot = BrowserContextSnapshot(
+            tab_urls=[page.url for page in pages],
+            active_tab_index=active_tab_index,
+            cookies=cookies,
+        )
+
+    async def ensure_healthy(self) -> bool:
+        """
+        Rebuild the context if a crash or disconnect was detected.
+        Returns True if a recovery took place.
+        """
+        if self.is_healthy():
+            return False
+        if self.recovery_count >= self.max_recoveries:
+            raise BrowserError(f"Browser closed: gave up after {self.recovery_count} consecutive recoveries")
+        await self.recover()
+        return True
+
+    async def recover(self) -> BrowserSession:
+        """Re-create the playwright context (and browser, if needed) from the last snapshot."""
+        self.recovery_count += 1
+        logger.warning(f"Rebuilding browser context (attempt {self.recovery_count}/{self.max_recoveries})...")
+
+        stale_session = self.session
+        self.session = None
+        self.agent_current_page = None
+        self.human_current_page = None
+        self.state.target_id = None
+        if stale_session is not None:
+            try:
+                await stale_session.context.close()
+            except Exception as e:
+                logger.debug(f"Stale browser context could not be closed: {e}")
+
+        if getattr(self.browser, "disconnected", False):
+            await self.browser.reconnect()
+
+        session = await self._initialize_session()
+        if self.last_snapshot:
+            await self._restore_snapshot(session, self.last_snapshot)
+        logger.info("Browser context rebuilt, agent will continue from its next step.")
+        return session
+
+    async def _restore_snapshot(self, session: BrowserSession, snapshot: BrowserContextSnapshot) -> None:
+        if snapshot.cookies:
+            try:
+                await session.context.add_cookies(snapshot.cookies)
+            except Exception as e:
+                logger.warning(f"Failed to restore cookies: {e}")
+
+        pages = []
+        for i, url in enumerate(snapshot.tab_urls):
+            page = self.agent_current_page if i == 0 and self.agent_current_page else await session.context.new_page()
+            try:
+                await page.goto(url, wait_until="domcontentloaded")
+            except Exception as e:
+                logger.warning(f"Failed to restore tab {url}: {e}")
+            pages.append(page)
+
+        if pages:
+            active_page = pages[min(snapshot.active_tab_index, len(pages) - 1)]
+            await active_page.bring_to_front()
+            self.agent_current_page = active_page
+            self.human_current_page = active_page
+
+    async def get_state(self, cache_clickable_elements_hashes: bool) -> BrowserState:
+        """Recover from crashes before reading state, and snapshot after a good read."""
+        await self.ensure_healthy()
+        state = await super().get_state(cache_clickable_elements_hashes)
+        self.recovery_count = 0
+        await self.take_snapshot()
+        return state
+
+    async def close(self):
+        self._closing = True
+        await super().close()
@@ -0,0 +1,229 @@
+import asyncio
+import base64
+import io
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from browser_use.browser.context import BrowserContext
+from PIL import Image
+from playwright.async_api import CDPSession, Page
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(image: Image.Image, hash_size: int = 16) -> int:
+    """Difference hash: compares horizontally adjacent pixels of a tiny grayscale copy."""
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = gray.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class LiveViewPipeline:
+    """
+    Rate-limited screenshot source for the WebUI live view.
+
+    Frames are captured at most `fps` times per second, downscaled to the viewer
+    width and dropped when their perceptual hash matches the last frame sent.
+    A keyframe is still sent every `keyframe_interval` seconds so small changes
+    the hash cannot see (caret, spinners) eventually reach the viewer.
+    """
+
+    def __init__(
+            self,
+            browser_context: BrowserContext,
+            fps: float = 5.0,
+            max_width: int = 800,
+            jpeg_quality: int = 70,
+            hash_threshold: int = 0,
+            keyframe_interval: float = 5.0,
+    ):
+        self.browser_context = browser_context
+        self.fps = max(float(fps), 0.1)
+        self.max_width = int(max_width)
+        self.jpeg_quality = jpeg_quality
+        self.hash_threshold = hash_threshold
+        self.keyframe_interval = keyframe_interval
+
+        self.frames_captured = 0
+        self.frames_sent = 0
+        self._last_hash: Optional[int] = None
+        self._last_sent_at = 0.0
+        self._next_capture_at = 0.0
+
+    async def poll(self) -> Optional[str]:
+        """
+        Capture a frame if the next capture slot has arrived.
+        Returns a base64 JPEG when the page changed, otherwise None.
+        """
+        now = time.monotonic()
+        if now < self._next_capture_at:
+            return None
+        self._next_capture_at = now + 1.0 / self.fps
+
+        page = await self.browser_context.get_current_page()
+        raw = await page.screenshot(
+            type="jpeg",
+            quality=self.jpeg_quality,
+            scale="css",
+            animations="disabled",
+            caret="initial",
+        )
+        self.frames_captured += 1
+        return await asyncio.to_thread(self._process_frame, raw)
+
+    def _process_frame(self, raw: bytes) -> Optional[str]:
+        image = Image.open(io.BytesIO(raw))
+        resized = image.width > self.max_width
+        if resized:
+            height = max(1, image.height * self.max_width // image.width)
+            image = image.resize((self.max_width, height), Image.Resampling.BILINEAR)
+
+        frame_hash = dhash(image)
+        now = time.monotonic()
+        if (
+                self._last_hash is not None
+                and hamming_distance(frame_hash, self._last_hash) <= self.hash_threshold
+                and now - self._last_sent_at < self.keyframe_interval
+        ):
+            return None
+
+        self._last_hash = frame_hash
+        self._last_sent_at = now
+        self.frames_sent += 1
+        if not resized:
+            return base64.b64encode(raw).decode("utf-8")
+
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=self.jpeg_quality)
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+class ScreencastStream:
+    """
+    Push-based live view backed by Chromium's Page.startScreencast.
+
+    Chromium only emits frames when the compositor produces a new one, already
+    downscaled to `max_width`. Frames land in a small bounded queue where older
+    frames are dropped, and the UI just reads the latest one. The stream follows
+    the agent's active tab and falls back to LiveViewPipeline polling when CDP is
+    unavailable (e.g. non-Chromium browsers).
+    """
+
+    def __init__(
+            self,
+            browser_context: BrowserContext,
+            fps: float = 5.0,
+            max_width: int = 800,
+            jpeg_quality: int = 70,
+            max_queued_frames: int = 2,
+    ):
+        self.browser_context = browser_context
+        self.fps = max(float(fps), 0.1)
+        self.max_width = int(max_width)
+        self.jpeg_quality = jpeg_quality
+        self.frames: deque[str] = deque(maxlen=max_queued_frames)
+
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_sent = 0
+        self._frame_event = asyncio.Event()
+        self._last_sent_at = 0.0
+        self._page: Optional[Page] = None
+        self._cdp_session: Optional[CDPSession] = None
+        self._fallback: Optional[LiveViewPipeline] = None
+
+    async def _ensure_started(self) -> None:
+        page = await self.browser_context.get_current_page()
+        if page is self._page:
+            return
+        await self.stop()
+        self._page = page
+        try:
+            cdp_session = await page.context.new_cdp_session(page)
+            self._cdp_session = cdp_session
+            cdp_session.on("Page.screencastFrame", lambda params: self._on_frame(cdp_session, params))
+            await cdp_session.send(
+                "Page.startScreencast",
+                {"format": "jpeg", "quality": self.jpeg_quality, "maxWidth": self.max_width},
+            )
+        except Exception as e:
+            logger.info(f"CDP screencast unavailable ({e}), falling back to screenshot polling.")
+            self._cdp_session = None
+            self._fallback = LiveViewPipeline(
+                self.browser_context, fps=self.fps, max_width=self.max_width, jpeg_quality=self.jpeg_quality
+            )
+            return
+        logger.debug(f"Started screencast on {page.url}")
+
+    def _on_frame(self, cdp_session: CDPSession, params: Dict[str, Any]) -> None:
+        if cdp_session is not self._cdp_session:
+            return
+        if len(self.frames) == self.frames.maxlen:
+            self.frames_dropped += 1
+        self.frames.append(params["data"])
+        self.frames_received += 1
+        self._frame_event.set()
+        # Chromium stops sending frames until the previous one is acknowledged
+        asyncio.ensure_future(self._ack(cdp_session, params["sessionId"]))
+
+    async def _ack(self, cdp_session: CDPSession, session_id: int) -> None:
+        try:
+            await cdp_session.send("Page.screencastFrameAck", {"sessionId": session_id})
+        except Exception as e:
+            logger.debug(f"Failed to ack screencast frame: {e}")
+
+    async def poll(self) -> Optional[str]:
+        """Return the latest base64 JPEG frame if a new one arrived, otherwise None."""
+        await self._ensure_started()
+        if self._fallback:
+            frame = await self._fallback.poll()
+            if frame:
+                self.frames_sent += 1
+            return frame
+        if not self.frames or time.monotonic() - self._last_sent_at < 1.0 / self.fps:
+            return None
+        frame = self.frames[-1]
+        self.frames.clear()
+        self._frame_event.clear()
+        self._last_sent_at = time.monotonic()
+        self.frames_sent += 1
+        return frame
+
+    async def wait_for_frame(self, timeout: float) -> None:
+        """Block until a new frame is queued or `timeout` expires, honouring the fps cap."""
+        if self._fallback:
+            delay = self._fallback._next_capture_at - time.monotonic()
+            await asyncio.sleep(min(timeout, max(delay, 0.0)))
+            return
+        try:
+            await asyncio.wait_for(self._frame_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return
+        delay = self._last_sent_at + 1.0 / self.fps - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(min(delay, timeout))
+
+    async def stop(self) -> None:
+        cdp_session = self._cdp_session
+        self._cdp_session = None
+        self._page = None
+        self._fallback = None
+        self.frames.clear()
+        self._frame_event.clear()
+        if cdp_session:
+            try:
+                await cdp_session.send("Page.stopScreencast")
+                await cdp_session.detach()
+            except Exception as e:
+                logger.debug(f"Failed to stop screencast: {e}")
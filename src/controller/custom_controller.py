@@ -25,8 +25,11 @@ import inspect
 import asyncio
 import os
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
 from browser_use.agent.views import ActionModel, ActionResult
 
+from src.controller.page_prefetch import PagePrefetcher
+from src.controller.url_registry import UrlHandleRegistry
 from src.utils.mcp_client import create_tool_param_model, setup_mcp_client_and_tools
 
 from browser_use.utils import time_execution_sync
@@ -43,10 +46,12 @@ class CustomController(Controller):
                      [str, BrowserContext], Awaitable[Dict[str, Any]]]]] = None,
                  ):
         super().__init__(exclude_actions=exclude_actions, output_model=output_model)
+        self.page_prefetcher = PagePrefetcher()
         self._register_custom_actions()
         self.ask_assistant_callback = ask_assistant_callback
         self.mcp_client = None
         self.mcp_server_config = None
+        self.url_registry = UrlHandleRegistry()
 
     def _register_custom_actions(self):
         """Register all custom browser actions"""
@@ -449,6 +454,37 @@ class CustomController(Controller):
                 logger.info(msg)
                 return ActionResult(error=msg)
 
+        # Same as the built-in action, but reuses the markdown prefetched while the LLM was thinking
+        @self.registry.action(
+            'Extract page content to retrieve specific information from the page, e.g. all company names, a specific description, all information about, links with companies in structured format or simply links',
+        )
+        async def extract_content(
+            goal: str, should_strip_link_urls: bool, browser: BrowserContext, page_extraction_llm: BaseChatModel
+        ):
+            page = await browser.get_current_page()
+            import markdownify
+
+            content = await self.page_prefetcher.page_markdown(await page.content(), should_strip_link_urls)
+
+            # manually append iframe text into the content so it's readable by the LLM (includes cross-origin iframes)
+            for iframe in page.frames:
+                if iframe.url != page.url and not iframe.url.startswith('data:'):
+                    content += f'\n\nIFRAME {iframe.url}:\n'
+                    content += markdownify.markdownify(await iframe.content())
+
+            prompt = 'Your task is to extract the content of the page. You will be given a page and a goal and you should extract all relevant information around this goal from the page. If the goal is vague, summarize the page. Respond in json format. Extraction goal: {goal}, Page: {page}'
+            template = PromptTemplate(input_variables=['goal', 'page'], template=prompt)
+            try:
+                output = await page_extraction_llm.ainvoke(template.format(goal=goal, page=content))
+                msg = f'📄  Extracted from page\n: {output.content}\n'
+                logger.info(msg)
+                return ActionResult(extracted_content=msg, include_in_memory=True)
+            except Exception as e:
+                logger.debug(f'Error extracting content: {e}')
+                msg = f'📄  Extracted from page\n: {content}\n'
+                logger.info(msg)
+                return ActionResult(extracted_content=msg)
+
     @time_execution_sync('--act')
     async def act(
             self,
@@ -466,6 +502,8 @@ class CustomController(Controller):
         try:
             for action_name, params in action.model_dump(exclude_unset=True).items():
                 if params is not None:
+                    # The LLM works with short handles, actions get the full URLs
+                    params = self.url_registry.resolve_params(params)
                     if action_name.startswith("mcp"):
                         # this is a mcp tool
                         logger.debug(f"Invoke MCP tool: {action_name}")
@@ -483,8 +521,11 @@ class CustomController(Controller):
                         )
 
                     if isinstance(result, str):
-                        return ActionResult(extracted_content=result)
+                        return ActionResult(extracted_content=self.url_registry.shorten(result))
                     elif isinstance(result, ActionResult):
+                        # Keep full URLs out of the memory fed back to the LLM
+                        result.extracted_content = self.url_registry.shorten(result.extracted_content)
+                        result.error = self.url_registry.shorten(result.error)
                         return result
                     elif result is None:
                         return ActionResult()
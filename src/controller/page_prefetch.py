@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import logging
+import socket
+import threading
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit
+
+from browser_use.browser.context import BrowserContext
+
+logger = logging.getLogger(__name__)
+
+# Origins of links visible in the viewport, read without touching the page
+_VISIBLE_ORIGINS_JS = """
+(maxOrigins) => {
+    const origins = [];
+    for (const link of document.links) {
+        if (origins.length >= maxOrigins) break;
+        let url;
+        try { url = new URL(link.href, document.baseURI); } catch (e) { continue; }
+        if (!url.protocol.startsWith('http') || url.origin === location.origin || origins.includes(url.origin)) continue;
+        const rect = link.getBoundingClientRect();
+        if (rect.width === 0 || rect.bottom < 0 || rect.top > window.innerHeight) continue;
+        origins.push(url.origin);
+    }
+    return origins;
+}
+"""
+
+
+class PagePrefetcher:
+    """
+    Speculative page work done while the LLM is choosing the next action.
+
+    `start` resolves the hostnames of visible links, so the DNS caches are warm
+    when the browser follows one, and converts the current page to markdown for
+    `extract_content`; `cancel` drops whatever has not finished yet. The page
+    itself is only read, never modified. Markdown is only prefetched once
+    `extract_content` has been used, in the link variant it asked for last, and
+    is cached by a hash of the page HTML, so a page that changed in the meantime
+    simply misses the cache.
+    """
+
+    def __init__(self, max_dns_prefetch_origins: int = 6, max_cached_pages: int = 4):
+        self.max_dns_prefetch_origins = max_dns_prefetch_origins
+        self.max_cached_pages = max_cached_pages
+        # should_strip_link_urls of the last extract_content, None until it is first used
+        self.last_strip_links: Optional[bool] = None
+        self.hits = 0
+        self.misses = 0
+        self._task: Optional[asyncio.Task] = None
+        self._markdown: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, browser_context: BrowserContext) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = asyncio.create_task(self._prefetch(browser_context))
+
+    async def cancel(self) -> None:
+        """Stop speculative work that is still running; its partial results are discarded."""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    async def _prefetch(self, browser_context: BrowserContext) -> None:
+        try:
+            page = await browser_context.get_current_page()
+            origins = await page.evaluate(_VISIBLE_ORIGINS_JS, self.max_dns_prefetch_origins)
+            resolving = asyncio.gather(*(self._resolve(origin) for origin in origins or []))
+            strip_links = self.last_strip_links
+            if strip_links is not None:
+                html = await page.content()
+                await asyncio.to_thread(self._markdown_for, html, strip_links)
+            await resolving
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Speculation must never affect the step, the page may be mid-navigation
+            logger.debug(f"Speculative prefetch skipped: {e}")
+
+    async def _resolve(self, origin: str) -> None:
+        url = urlsplit(origin)
+        try:
+            await asyncio.get_running_loop().getaddrinfo(
+                url.hostname, url.port or (443 if url.scheme == "https" else 80), type=socket.SOCK_STREAM
+            )
+        except OSError as e:
+            logger.debug(f"DNS prefetch of {origin} failed: {e}")
+
+    def _markdown_for(self, html: str, strip_links: bool) -> str:
+        import markdownify
+
+        key = (hashlib.sha1(html.encode("utf-8", "surrogatepass")).hexdigest(), strip_links)
+        with self._lock:
+            if key in self._markdown:
+                self._markdown.move_to_end(key)
+                return self._markdown[key]
+        content = markdownify.markdownify(html, strip=["a", "img"] if strip_links else [])
+        with self._lock:
+            self._markdown[key] = content
+            while len(self._markdown) > self.max_cached_pages:
+                self._markdown.popitem(last=False)
+        return content
+
+    async def page_markdown(self, html: str, strip_links: bool) -> str:
+        """Markdown for `html`, taken from the speculative cache when the page has not changed."""
+        self.last_strip_links = strip_links
+        key = (hashlib.sha1(html.encode("utf-8", "surrogatepass")).hexdigest(), strip_links)
+        with self._lock:
+            cached = self._markdown.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        return await asyncio.to_thread(self._markdown_for, html, strip_links)
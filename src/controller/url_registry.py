@@ -0,0 +1,82 @@
+import hashlib
+import logging
+import re
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UrlHandleRegistry:
+    """
+    Maps long values (typically presigned URLs) to short opaque handles.
+
+    The LLM only ever sees and emits the handle, e.g. `url://3f9a2c1b`; the
+    controller resolves handles back to the full value right before an action
+    runs and shortens the value again in the action result, so a 2 KB URL
+    costs a few tokens and is opened in a single step.
+    """
+
+    HANDLE_PREFIX = "url://"
+    _HANDLE_PATTERN = re.compile(r"url://[0-9a-f]{8,}")
+
+    def __init__(self, min_length: int = 200):
+        self.min_length = min_length
+        self._values: Dict[str, str] = {}
+        self._handles: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._values
+
+    def register(self, value: str) -> str:
+        """Return the handle for `value`, creating it on first use."""
+        if value in self._handles:
+            return self._handles[value]
+        digest = hashlib.sha256(value.encode("utf-8")).hexdigest()
+        # Extend the handle on the (unlikely) prefix collision
+        size = 8
+        while f"{self.HANDLE_PREFIX}{digest[:size]}" in self._values:
+            size += 4
+        handle = f"{self.HANDLE_PREFIX}{digest[:size]}"
+        self._values[handle] = value
+        self._handles[value] = handle
+        logger.info(f"Registered {len(value)}-char value as {handle}")
+        return handle
+
+    def register_placeholders(self, placeholders: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """Return `placeholders` with every long string value replaced by its handle."""
+        return {
+            key: self.register(value) if isinstance(value, str) and len(value) >= self.min_length else value
+            for key, value in (placeholders or {}).items()
+        }
+
+    def resolve(self, text: str) -> str:
+        """Replace known handles in `text` with their full values."""
+        if not self._values or self.HANDLE_PREFIX not in text:
+            return text
+        return self._HANDLE_PATTERN.sub(lambda m: self._values.get(m.group(0), m.group(0)), text)
+
+    def resolve_params(self, params: Any) -> Any:
+        """Resolve handles in every string leaf of an action's params."""
+        if isinstance(params, str):
+            return self.resolve(params)
+        if isinstance(params, dict):
+            return {key: self.resolve_params(value) for key, value in params.items()}
+        if isinstance(params, list):
+            return [self.resolve_params(value) for value in params]
+        return params
+
+    def shorten(self, text: Optional[str]) -> Optional[str]:
+        """Replace registered full values in `text` with their handles."""
+        if not text or not self._values:
+            return text
+        for value, handle in self._handles.items():
+            if value in text:
+                text = text.replace(value, handle)
+        return text
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._handles.clear()
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    Content-addressed on-disk store for binary artifacts such as screenshots.
+
+    Blobs are keyed by the SHA-256 of their bytes, so identical screenshots are
+    written once no matter how many steps or messages reference them.
+    """
+
+    def __init__(self, root_dir: str = "./tmp/blobs"):
+        self.root_dir = os.path.abspath(root_dir)
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def put(self, data: bytes, ext: str = ".jpg") -> str:
+        """Store `data` and return its key (digest + extension)."""
+        key = hashlib.sha256(data).hexdigest() + ext
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return key
+
+    def put_base64(self, data_b64: str, ext: str = ".jpg") -> str:
+        return self.put(base64.b64decode(data_b64), ext=ext)
+
+    def path(self, key: str) -> str:
+        # Fan out by the first two hex chars to keep directories small
+        return os.path.join(self.root_dir, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            logger.warning(f"Blob {key} not found in {self.root_dir}")
+            return None
+
+    def get_base64(self, key: str) -> Optional[str]:
+        data = self.get(key)
+        return base64.b64encode(data).decode("utf-8") if data is not None else None
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def delete(self, keys: Iterable[str]) -> int:
+        """Remove the given blobs, returns how many were there."""
+        removed = 0
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def prune(self, max_bytes: Optional[int] = None, max_age_seconds: Optional[float] = None) -> int:
+        """Remove blobs older than `max_age_seconds`, then the oldest until at most `max_bytes` remain."""
+        blobs = []
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+        now = time.time()
+        total = sum(size for _, size, _ in blobs)
+        removed = 0
+        for mtime, size, path in blobs:
+            expired = max_age_seconds is not None and now - mtime > max_age_seconds
+            if not expired and (max_bytes is None or total <= max_bytes):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Pruned {removed} blobs from {self.root_dir}")
+        return removed
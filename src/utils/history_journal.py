@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+from typing import Iterator, Optional, Type
+
+from browser_use.agent.views import AgentHistory, AgentHistoryList, AgentOutput
+
+from src.utils.blob_store import BlobStore
+
+logger = logging.getLogger(__name__)
+
+
+def _screenshot_ext(screenshot_b64: str) -> str:
+    # base64 of the PNG signature starts with "iVBOR"
+    return ".png" if screenshot_b64.startswith("iVBOR") else ".jpg"
+
+
+class HistoryJournal:
+    """
+    Append-only JSONL journal of agent history, one record per step.
+
+    Records are the regular `AgentHistory.model_dump()` with the screenshot
+    replaced by a `screenshot_ref` key into a BlobStore, so every line stays
+    small and a crash loses at most the step being written.
+    """
+
+    def __init__(self, path: str, blob_store: Optional[BlobStore] = None):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.blob_store = blob_store or BlobStore(os.path.join(os.path.dirname(os.path.abspath(path)), "screenshots"))
+        self.steps_written = 0
+
+    def append(self, item: AgentHistory) -> None:
+        record = item.model_dump()
+        screenshot = record["state"].pop("screenshot", None)
+        record["state"]["screenshot_ref"] = (
+            self.blob_store.put_base64(screenshot, ext=_screenshot_ext(screenshot)) if screenshot else None
+        )
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.steps_written += 1
+
+
+class HistoryJournalReader:
+    """Rebuilds agent history from a HistoryJournal, one step at a time."""
+
+    def __init__(self, path: str, output_model: Type[AgentOutput], blob_store: Optional[BlobStore] = None):
+        self.path = path
+        self.output_model = output_model
+        self.blob_store = blob_store or BlobStore(os.path.join(os.path.dirname(os.path.abspath(path)), "screenshots"))
+
+    def __iter__(self) -> Iterator[AgentHistory]:
+        return self.iter_history()
+
+    def iter_history(self, load_screenshots: bool = True) -> Iterator[AgentHistory]:
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line is expected after a crash mid-write
+                    logger.warning(f"Skipping unreadable record at {self.path}:{line_number}")
+                    continue
+                yield self._to_history(record, load_screenshots)
+
+    def _to_history(self, record: dict, load_screenshots: bool) -> AgentHistory:
+        # Same normalisation as AgentHistoryList.load_from_file
+        if isinstance(record.get("model_output"), dict):
+            record["model_output"] = self.output_model.model_validate(record["model_output"])
+        else:
+            record["model_output"] = None
+        state = record["state"]
+        state.setdefault("interacted_element", None)
+        screenshot_ref = state.pop("screenshot_ref", None)
+        if screenshot_ref and load_screenshots:
+            state["screenshot"] = self.blob_store.get_base64(screenshot_ref)
+        return AgentHistory.model_validate(record)
+
+    def load(self, load_screenshots: bool = True) -> AgentHistoryList:
+        return AgentHistoryList(history=list(self.iter_history(load_screenshots=load_screenshots)))
@@ -0,0 +1,64 @@
+import logging
+from typing import Optional
+
+from browser_use.agent.views import AgentHistoryList
+from browser_use.browser.views import BrowserStateHistory
+
+from src.utils.blob_store import BlobStore
+
+logger = logging.getLogger(__name__)
+
+
+class SpilledBrowserStateHistory(BrowserStateHistory):
+    """
+    BrowserStateHistory whose screenshot lives in a BlobStore.
+
+    Only the blob key is kept in memory; reading `screenshot` loads it back, so
+    `to_dict()`, GIF rendering and history export work unchanged.
+    """
+
+    def __init__(self, state: BrowserStateHistory, blob_store: BlobStore):
+        self._blob_store = blob_store
+        self._screenshot_ref: Optional[str] = None
+        super().__init__(
+            url=state.url,
+            title=state.title,
+            tabs=state.tabs,
+            interacted_element=state.interacted_element,
+            screenshot=state.screenshot,
+        )
+
+    @property
+    def screenshot(self) -> Optional[str]:
+        return self._blob_store.get_base64(self._screenshot_ref) if self._screenshot_ref else None
+
+    @screenshot.setter
+    def screenshot(self, value: Optional[str]) -> None:
+        if not value:
+            self._screenshot_ref = None
+            return
+        ext = ".png" if value.startswith("iVBOR") else ".jpg"
+        self._screenshot_ref = self._blob_store.put_base64(value, ext=ext)
+
+
+class ScreenshotSpiller:
+    """Keeps the screenshots of the last `keep_in_memory` history steps in RAM and spills the rest."""
+
+    def __init__(self, blob_store: BlobStore, keep_in_memory: int = 5):
+        self.blob_store = blob_store
+        self.keep_in_memory = max(0, keep_in_memory)
+        self.spilled = 0
+        self._checked_upto = 0
+
+    def spill(self, history: AgentHistoryList) -> None:
+        """Move screenshots older than the in-memory window to the blob store."""
+        items = history.history
+        end = len(items) - self.keep_in_memory
+        if end < self._checked_upto:
+            # History was replaced or truncated, rescan from the start
+            self._checked_upto = 0
+        for item in items[self._checked_upto:max(end, 0)]:
+            if not isinstance(item.state, SpilledBrowserStateHistory) and item.state.screenshot:
+                item.state = SpilledBrowserStateHistory(item.state, self.blob_store)
+                self.spilled += 1
+        self._checked_upto = max(end, self._checked_upto)
@@ -0,0 +1,331 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from .llm_mixins import with_mixin
+
+logger = logging.getLogger(__name__)
+
+ROUTE_LEAST_OUTSTANDING = "least_outstanding"
+ROUTE_LATENCY = "latency"
+
+_TRANSPORT_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout", "ReadError", "ReadTimeout",
+    "RemoteProtocolError", "PoolTimeout", "EndpointConnectionError",
+}
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Errors that say more about the endpoint than the request: transport failures, 429 and 5xx."""
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return type(error).__name__ in _TRANSPORT_ERRORS
+
+
+@dataclass
+class EndpointState:
+    base_url: str
+    health_url: Optional[str] = None
+    outstanding: int = 0
+    latency_ewma: Optional[float] = None
+    consecutive_failures: int = 0
+    # Circuit breaker: no traffic until then, one call is let through afterwards
+    open_until: float = 0.0
+    requests: int = 0
+    failures: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "outstanding": self.outstanding,
+            "latency_ewma": self.latency_ewma,
+            "healthy": self.open_until <= time.monotonic(),
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class EndpointPool:
+    """
+    Routes calls over interchangeable clients of one model on different servers.
+
+    Each call goes to the endpoint with the fewest requests in flight (or the
+    lowest latency EWMA weighted by load with `routing="latency"`). Transport
+    errors, 429s and 5xx fail over to the next endpoint; `failure_threshold`
+    consecutive failures open the endpoint's circuit for `cooldown` seconds.
+    With `health_check_interval` the health URLs are probed in the background
+    and circuits are opened or closed from the result.
+    """
+
+    def __init__(
+        self,
+        clients: List[BaseChatModel],
+        base_urls: List[str],
+        health_urls: Optional[List[Optional[str]]] = None,
+        routing: str = ROUTE_LEAST_OUTSTANDING,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        health_check_interval: float = 0.0,
+    ):
+        if len(clients) != len(base_urls) or not clients:
+            raise ValueError("One client per endpoint is required")
+        if routing not in (ROUTE_LEAST_OUTSTANDING, ROUTE_LATENCY):
+            raise ValueError(f"Unknown routing {routing!r}")
+        self.clients = clients
+        health_urls = health_urls or [None] * len(base_urls)
+        self.endpoints = [EndpointState(url, health_url) for url, health_url in zip(base_urls, health_urls)]
+        self.routing = routing
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
+
+    def _score(self, index: int) -> tuple:
+        endpoint = self.endpoints[index]
+        if self.routing == ROUTE_LATENCY:
+            # Unmeasured endpoints go first so every endpoint gets a latency estimate
+            latency = endpoint.latency_ewma or 0.0
+            return latency * (endpoint.outstanding + 1), endpoint.outstanding
+        return endpoint.outstanding, endpoint.latency_ewma or 0.0
+
+    def _route(self) -> List[int]:
+        """Endpoint indexes in the order they should be tried."""
+        now = time.monotonic()
+        with self._lock:
+            available = [i for i, endpoint in enumerate(self.endpoints) if endpoint.open_until <= now]
+            if not available:
+                # Everything is down, try the one that comes back first rather than failing outright
+                available = [min(range(len(self.endpoints)), key=lambda i: self.endpoints[i].open_until)]
+            return sorted(available, key=self._score)
+
+    def _begin(self, index: int) -> float:
+        with self._lock:
+            self.endpoints[index].outstanding += 1
+            self.endpoints[index].requests += 1
+        return time.monotonic()
+
+    def _end(self, index: int, started: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            endpoint = self.endpoints[index]
+            endpoint.outstanding -= 1
+            if error is None:
+                latency = time.monotonic() - started
+                endpoint.latency_ewma = (
+                    latency if endpoint.latency_ewma is None else 0.8 * endpoint.latency_ewma + 0.2 * latency
+                )
+                endpoint.consecutive_failures = 0
+                endpoint.open_until = 0.0
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.failure_threshold:
+                endpoint.open_until = time.monotonic() + self.cooldown
+                logger.warning(f"LLM endpoint {endpoint.base_url} is failing, taking it out for {self.cooldown:.0f}s")
+
+    def _failover(self, index: int, error: BaseException, attempted: int, total: int) -> None:
+        logger.warning(
+            f"LLM endpoint {self.endpoints[index].base_url} failed ({type(error).__name__}: {error})"
+            + (", failing over" if attempted < total else "")
+        )
+
+    async def acall(self, call: Callable[[BaseChatModel], Awaitable[Any]]) -> Any:
+        self._ensure_health_checks()
+        route = self._route()
+        for attempt, index in enumerate(route, 1):
+            started = self._begin(index)
+            try:
+                result = await call(self.clients[index])
+            except Exception as e:
+                if not is_retryable_error(e):
+                    # The endpoint answered, the request itself is at fault
+                    self._end(index, started)
+                    raise
+                self._end(index, started, e)
+                self._failover(index, e, attempt, len(route))
+                if attempt == len(route):
+                    raise
+                continue
+            except BaseException:
+                self._end(index, started)
+                raise
+            self._end(index, started)
+            return result
+
+    def call(self, call: Callable[[BaseChatModel], Any]) -> Any:
+        route = self._route()
+        for attempt, index in enumerate(route, 1):
+            started = self._begin(index)
+            try:
+                result = call(self.clients[index])
+            except Exception as e:
+                if not is_retryable_error(e):
+                    self._end(index, started)
+                    raise
+                self._end(index, started, e)
+                self._failover(index, e, attempt, len(route))
+                if attempt == len(route):
+                    raise
+                continue
+            except BaseException:
+                self._end(index, started)
+                raise
+            self._end(index, started)
+            return result
+
+    async def astream(self, stream: Callable[[BaseChatModel], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Like `acall` for streams; once a chunk has been yielded the stream is no longer failed over."""
+        self._ensure_health_checks()
+        route = self._route()
+        for attempt, index in enumerate(route, 1):
+            started = self._begin(index)
+            yielded = False
+            try:
+                async for chunk in stream(self.clients[index]):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                if yielded or not is_retryable_error(e):
+                    self._end(index, started, e if yielded and is_retryable_error(e) else None)
+                    raise
+                self._end(index, started, e)
+                self._failover(index, e, attempt, len(route))
+                if attempt == len(route):
+                    raise
+                continue
+            except BaseException:
+                self._end(index, started)
+                raise
+            self._end(index, started)
+            return
+
+    def stream(self, stream: Callable[[BaseChatModel], Iterator[Any]]) -> Iterator[Any]:
+        route = self._route()
+        for attempt, index in enumerate(route, 1):
+            started = self._begin(index)
+            yielded = False
+            try:
+                for chunk in stream(self.clients[index]):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                if yielded or not is_retryable_error(e):
+                    self._end(index, started, e if yielded and is_retryable_error(e) else None)
+                    raise
+                self._end(index, started, e)
+                self._failover(index, e, attempt, len(route))
+                if attempt == len(route):
+                    raise
+                continue
+            except BaseException:
+                self._end(index, started)
+                raise
+            self._end(index, started)
+            return
+
+    async def _probe(self, url: str) -> bool:
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(url)
+            # 401/404 still mean the server is up
+            return response.status_code < 500
+        except Exception:
+            return False
+
+    async def check_health(self) -> None:
+        """Probe every endpoint with a health URL and open or close its circuit accordingly."""
+        checked = [(i, endpoint.health_url) for i, endpoint in enumerate(self.endpoints) if endpoint.health_url]
+        results = await asyncio.gather(*(self._probe(url) for _, url in checked))
+        with self._lock:
+            for (index, _), healthy in zip(checked, results):
+                endpoint = self.endpoints[index]
+                if healthy and endpoint.open_until > time.monotonic():
+                    logger.info(f"LLM endpoint {endpoint.base_url} is healthy again")
+                    endpoint.open_until = 0.0
+                    endpoint.consecutive_failures = 0
+                elif not healthy:
+                    endpoint.open_until = time.monotonic() + max(self.cooldown, self.health_check_interval)
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.debug(f"LLM endpoint health check failed: {e}")
+            await asyncio.sleep(self.health_check_interval)
+
+    def _ensure_health_checks(self) -> None:
+        if self.health_check_interval <= 0 or self._closed:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._health_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._health_task = loop.create_task(self._health_loop())
+
+    def close(self) -> None:
+        """Stop the background health checks; calls still work, without probing."""
+        self._closed = True
+        task, self._health_task = self._health_task, None
+        if task is None or task.done():
+            return
+        loop = task.get_loop()
+        if loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            if running is loop:
+                task.cancel()
+            else:
+                loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # The loop shut down in the meantime, the task went with it
+            pass
+
+
+class LoadBalancedMixin:
+    """Sends every call of the model to an endpoint picked by `endpoint_pool`."""
+
+    async def ainvoke(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        return await self.endpoint_pool.acall(lambda client: client.ainvoke(input, config, stop=stop, **kwargs))
+
+    def invoke(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        return self.endpoint_pool.call(lambda client: client.invoke(input, config, stop=stop, **kwargs))
+
+    async def astream(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        async for chunk in self.endpoint_pool.astream(
+                lambda client: client.astream(input, config, stop=stop, **kwargs)):
+            yield chunk
+
+    def stream(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        yield from self.endpoint_pool.stream(lambda client: client.stream(input, config, stop=stop, **kwargs))
+
+
+def load_balanced(clients: List[BaseChatModel], base_urls: List[str], **pool_kwargs: Any) -> BaseChatModel:
+    """
+    One chat model over several endpoints, to be used anywhere the single client would be.
+
+    The result is an instance of the clients' own class, so bind_tools and
+    with_structured_output build their requests as usual; every call is then
+    sent through an EndpointPool to one of `clients`.
+    """
+    return with_mixin(clients[0], LoadBalancedMixin, endpoint_pool=EndpointPool(clients, base_urls, **pool_kwargs))
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FairLLMGate:
+    """
+    Caps concurrent LLM calls and hands free slots to waiting keys in turn.
+
+    Waiters are queued per key (a job, tenant or agent) and a freed slot goes
+    to the next key in round-robin order, so one key with many pending calls
+    cannot starve the others.
+    """
+
+    def __init__(self, max_concurrent: int):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def waiting(self) -> Dict[str, int]:
+        return {key: len(queue) for key, queue in self._waiters.items()}
+
+    async def acquire(self, key: str = "default") -> None:
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled, pass it on
+                self.release()
+            else:
+                self._discard(key, future)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.max_concurrent:
+            key, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            # Rotate the key to the back so the next slot goes to another key
+            del self._waiters[key]
+            if queue:
+                self._waiters[key] = queue
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _discard(self, key: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(key)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[key]
+
+    @asynccontextmanager
+    async def slot(self, key: str = "default"):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over the minute and holds at most `capacity` (a minute's worth)."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.per_minute = per_minute
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken; amounts above the capacity only need a full bucket."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60.0 / self.per_minute)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """429s from the OpenAI-style SDKs, Anthropic, Google and Bedrock throttling."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    name = type(error).__name__
+    return "RateLimit" in name or "ResourceExhausted" in name or "Throttling" in str(error)[:200]
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGovernor(FairLLMGate):
+    """
+    FairLLMGate plus requests-per-minute and tokens-per-minute limits for one
+    provider and model.
+
+    A call first gets a concurrency slot in the fair rotation, then waits until
+    both buckets cover it, so queued agents spend the budget in turn instead of
+    bursting into 429s. A rate limit error from the provider pauses every caller
+    for the advertised retry time.
+    """
+
+    def __init__(self, max_concurrent: int, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, default_backoff: float = 10.0):
+        super().__init__(max_concurrent)
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.default_backoff = default_backoff
+        self.rate_limited = 0
+        # Average seconds per call, which tells how many agents the request rate can keep busy
+        self.latency_ewma: Optional[float] = None
+        self._paused_until = 0.0
+        self._last_rate_limit = float("-inf")
+        self._budget_lock = asyncio.Lock()
+        # Guards the buckets, which sync calls take from other threads too
+        self._bucket_lock = threading.Lock()
+
+    def _take_budget(self, tokens: int) -> float:
+        """Take one call's budget if it is available now; otherwise the seconds until it may be."""
+        with self._bucket_lock:
+            delay = self._paused_until - time.monotonic()
+            if self.requests:
+                delay = max(delay, self.requests.wait_time(1))
+            if self.tokens and tokens:
+                delay = max(delay, self.tokens.wait_time(tokens))
+            if delay > 0:
+                return delay
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens and tokens:
+                self.tokens.consume(tokens)
+            return 0.0
+
+    async def _wait_for_budget(self, tokens: int) -> None:
+        # Slot holders take the budget one at a time, in the order the gate let them in
+        async with self._budget_lock:
+            while (delay := self._take_budget(tokens)) > 0:
+                await asyncio.sleep(delay)
+
+    @contextmanager
+    def _tracked_call(self):
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.backoff(_retry_after(e))
+            raise
+        latency = time.monotonic() - started
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    @asynccontextmanager
+    async def slot(self, key: str = "default", tokens: int = 0):
+        """Hold a slot for one call estimated at `tokens` prompt tokens."""
+        await self.acquire(key)
+        try:
+            await self._wait_for_budget(tokens)
+            with self._tracked_call():
+                yield
+        finally:
+            self.release()
+
+    @contextmanager
+    def blocking_slot(self, tokens: int = 0):
+        """
+        Hold a sync call to the rate limits and rate limit pauses, sleeping in the calling thread.
+
+        Sync calls do not queue for a concurrency slot: one made on the event
+        loop thread (like browser-use's raw tool calling mode) blocks the async
+        callers that would have to release it.
+        """
+        while (delay := self._take_budget(tokens)) > 0:
+            time.sleep(delay)
+        with self._tracked_call():
+            yield
+
+    def backoff(self, seconds: Optional[float] = None) -> None:
+        """Hold back every caller for `seconds`, after the provider said we are over its limit."""
+        seconds = seconds or self.default_backoff
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._last_rate_limit = now
+        self.rate_limited += 1
+        logger.warning(f"LLM rate limit hit, pausing calls for {seconds:.1f}s")
+
+    def recommended_parallelism(self, requested: int) -> int:
+        """How many agents can usefully share this model side by side, at most `requested`."""
+        limit = min(requested, self.max_concurrent)
+        if self.requests and self.latency_ewma:
+            # An agent in a loop makes at most one call per call latency
+            calls_per_agent = 60.0 / max(self.latency_ewma, 1.0)
+            limit = min(limit, int(self.requests.per_minute / calls_per_agent))
+        if time.monotonic() - self._last_rate_limit < 60:
+            limit //= 2
+        return max(1, limit)
+
+
+# Fairness key of the LLM calls made in this context, see `llm_call_key`
+_llm_call_key: ContextVar[str] = ContextVar("llm_call_key", default="default")
+
+
+@contextmanager
+def llm_call_key(key: str):
+    """Queue the governed LLM calls made in this context under `key` (a job or agent)."""
+    token = _llm_call_key.set(key)
+    try:
+        yield
+    finally:
+        _llm_call_key.reset(token)
+
+
+def estimate_prompt_tokens(messages: list, chars_per_token: int = 3, image_tokens: int = 800) -> int:
+    """Rough prompt size for the token budget, by characters like browser-use's message manager."""
+    tokens = 0
+    for message in messages:
+        content = getattr(message, "content", "")
+        if isinstance(content, list):
+            for item in content:
+                if isinstance(item, dict) and item.get("type") == "image_url":
+                    tokens += image_tokens
+                elif isinstance(item, dict):
+                    tokens += len(str(item.get("text", ""))) // chars_per_token
+                else:
+                    tokens += len(str(item)) // chars_per_token
+        else:
+            tokens += len(str(content)) // chars_per_token
+    return tokens
+
+
+class GovernedMixin:
+    """
+    Takes an `llm_governor` slot for every call of the model, whoever makes it.
+
+    Async calls queue for a fair concurrency slot and wait for the rate
+    budget; sync calls wait for the rate budget only, see `blocking_slot`.
+    """
+
+    def _governed_tokens(self, input: Any) -> int:
+        try:
+            return estimate_prompt_tokens(self._convert_input(input).to_messages())
+        except Exception:
+            return 0
+
+    async def ainvoke(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        async with self.llm_governor.slot(_llm_call_key.get(), tokens=self._governed_tokens(input)):
+            return await super().ainvoke(input, config, stop=stop, **kwargs)
+
+    async def astream(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        async with self.llm_governor.slot(_llm_call_key.get(), tokens=self._governed_tokens(input)):
+            async for chunk in super().astream(input, config, stop=stop, **kwargs):
+                yield chunk
+
+    def invoke(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        with self.llm_governor.blocking_slot(tokens=self._governed_tokens(input)):
+            return super().invoke(input, config, stop=stop, **kwargs)
+
+    def stream(self, input: Any, config: Any = None, *, stop: Optional[list[str]] = None, **kwargs: Any):
+        with self.llm_governor.blocking_slot(tokens=self._governed_tokens(input)):
+            yield from super().stream(input, config, stop=stop, **kwargs)
+
+
+def governed(llm: Any, governor: LLMGovernor) -> Any:
+    """Copy of `llm` whose calls all go through `governor`."""
+    from .llm_mixins import with_mixin
+
+    return with_mixin(llm, GovernedMixin, llm_governor=governor)
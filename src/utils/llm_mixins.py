@@ -0,0 +1,30 @@
+from typing import Any, Dict, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from pydantic import Field
+
+_mixin_classes: Dict[Tuple[type, type], type] = {}
+
+
+def _mixin_class(base: type, mixin: type, field_names: Tuple[str, ...]) -> type:
+    cls = _mixin_classes.get((base, mixin))
+    if cls is None:
+        # Keep the provider class name, browser-use chooses the tool calling method by it
+        namespace: Dict[str, Any] = {"__module__": mixin.__module__, "__annotations__": {}}
+        for name in field_names:
+            namespace["__annotations__"][name] = Any
+            namespace[name] = Field(default=None, exclude=True)
+        cls = _mixin_classes[(base, mixin)] = type(base.__name__, (mixin, base), namespace)
+    return cls
+
+
+def with_mixin(llm: BaseChatModel, mixin: type, **fields: Any) -> BaseChatModel:
+    """
+    Copy of `llm` as an instance of `mixin` in front of `llm`'s own class, with `fields` set.
+
+    The copy shares the clients of `llm` and behaves like it (bind_tools,
+    with_structured_output, isinstance checks) except for what `mixin` overrides.
+    """
+    cls = _mixin_class(type(llm), mixin, tuple(sorted(fields)))
+    values = {name: getattr(llm, name) for name in type(llm).model_fields if hasattr(llm, name)}
+    return cls.model_construct(**{**values, **fields})
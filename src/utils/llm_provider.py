@@ -1,161 +1,57 @@
-from openai import OpenAI
-import pdb
-from langchain_openai import ChatOpenAI
-from langchain_core.globals import get_llm_cache
-from langchain_core.language_models.base import (
-    BaseLanguageModel,
-    LangSmithParams,
-    LanguageModelInput,
-)
+import asyncio
+import hashlib
+import logging
 import os
-from langchain_core.load import dumpd, dumps
-from langchain_core.messages import (
-    AIMessage,
-    SystemMessage,
-    AnyMessage,
-    BaseMessage,
-    BaseMessageChunk,
-    HumanMessage,
-    convert_to_messages,
-    message_chunk_to_message,
-)
-from langchain_core.outputs import (
-    ChatGeneration,
-    ChatGenerationChunk,
-    ChatResult,
-    LLMResult,
-    RunInfo,
-)
-from langchain_ollama import ChatOllama
-from langchain_core.output_parsers.base import OutputParserLike
-from langchain_core.runnables import Runnable, RunnableConfig
-from langchain_core.tools import BaseTool
-
-from typing import (
-    TYPE_CHECKING,
-    Any,
-    Callable,
-    Literal,
-    Optional,
-    Union,
-    cast, List,
-)
-from langchain_anthropic import ChatAnthropic
-from langchain_mistralai import ChatMistralAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import ChatOllama
-from langchain_openai import AzureChatOpenAI, ChatOpenAI
-from langchain_ibm import ChatWatsonx
-from langchain_aws import ChatBedrock
-from pydantic import SecretStr
+import threading
+import weakref
+from collections import OrderedDict
 
 from . import config
 
+logger = logging.getLogger(__name__)
 
-class DeepSeekR1ChatOpenAI(ChatOpenAI):
+# Clients are reused across tasks so their HTTP connection pools stay warm. Async pools are bound
+# to the event loop they were first used on, so clients are cached per loop (per thread outside one).
+LLM_CACHE_SIZE = 16
+# key -> (client, weak reference to the loop or thread it was created for)
+_llm_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_llm_cache_lock = threading.Lock()
 
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self.client = OpenAI(
-            base_url=kwargs.get("base_url"),
-            api_key=kwargs.get("api_key")
-        )
+# Rate limits are per provider, model and endpoint, and shared by every client for them
+LIMIT_KWARGS = ("requests_per_minute", "tokens_per_minute", "max_concurrent_calls")
+DEFAULT_MAX_CONCURRENT_CALLS = 8
+_governors: dict = {}
 
-    async def ainvoke(
-            self,
-            input: LanguageModelInput,
-            config: Optional[RunnableConfig] = None,
-            *,
-            stop: Optional[list[str]] = None,
-            **kwargs: Any,
-    ) -> AIMessage:
-        message_history = []
-        for input_ in input:
-            if isinstance(input_, SystemMessage):
-                message_history.append({"role": "system", "content": input_.content})
-            elif isinstance(input_, AIMessage):
-                message_history.append({"role": "assistant", "content": input_.content})
-            else:
-                message_history.append({"role": "user", "content": input_.content})
-
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=message_history
-        )
+# Providers whose clients take `base_url`, so they can be spread over several servers
+BALANCED_PROVIDERS = ("openai", "ollama", "deepseek", "grok", "alibaba", "siliconflow", "modelscope", "mistral")
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+
+# Provider SDKs are imported inside get_llm_model, only the one in use gets loaded
 
-        reasoning_content = response.choices[0].message.reasoning_content
-        content = response.choices[0].message.content
-        return AIMessage(content=content, reasoning_content=reasoning_content)
-
-    def invoke(
-            self,
-            input: LanguageModelInput,
-            config: Optional[RunnableConfig] = None,
-            *,
-            stop: Optional[list[str]] = None,
-            **kwargs: Any,
-    ) -> AIMessage:
-        message_history = []
-        for input_ in input:
-            if isinstance(input_, SystemMessage):
-                message_history.append({"role": "system", "content": input_.content})
-            elif isinstance(input_, AIMessage):
-                message_history.append({"role": "assistant", "content": input_.content})
-            else:
-                message_history.append({"role": "user", "content": input_.content})
-
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=message_history
-        )
 
-        reasoning_content = response.choices[0].message.reasoning_content
-        content = response.choices[0].message.content
-        return AIMessage(content=content, reasoning_content=reasoning_content)
-
-
-class DeepSeekR1ChatOllama(ChatOllama):
-
-    async def ainvoke(
-            self,
-            input: LanguageModelInput,
-            config: Optional[RunnableConfig] = None,
-            *,
-            stop: Optional[list[str]] = None,
-            **kwargs: Any,
-    ) -> AIMessage:
-        org_ai_message = await super().ainvoke(input=input)
-        org_content = org_ai_message.content
-        reasoning_content = org_content.split("</think>")[0].replace("<think>", "")
-        content = org_content.split("</think>")[1]
-        if "**JSON Response:**" in content:
-            content = content.split("**JSON Response:**")[-1]
-        return AIMessage(content=content, reasoning_content=reasoning_content)
-
-    def invoke(
-            self,
-            input: LanguageModelInput,
-            config: Optional[RunnableConfig] = None,
-            *,
-            stop: Optional[list[str]] = None,
-            **kwargs: Any,
-    ) -> AIMessage:
-        org_ai_message = super().invoke(input=input)
-        org_content = org_ai_message.content
-        reasoning_content = org_content.split("</think>")[0].replace("<think>", "")
-        content = org_content.split("</think>")[1]
-        if "**JSON Response:**" in content:
-            content = content.split("**JSON Response:**")[-1]
-        return AIMessage(content=content, reasoning_content=reasoning_content)
+def __getattr__(name: str):
+    # The DeepSeek R1 wrappers subclass provider SDK classes, load them on first access
+    if name in ("DeepSeekR1ChatOpenAI", "DeepSeekR1ChatOllama"):
+        from . import reasoning_llm
+
+        return getattr(reasoning_llm, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_llm_model(provider: str, **kwargs):
     """
-    Get LLM model
+    Get LLM model, reusing a cached client when the provider and settings match
     :param provider: LLM provider
-    :param kwargs:
+    :param kwargs: `streaming=True` streams tokens and reports partial output, see `llm_stream`;
+        `response_cache=True` reuses stored responses to identical calls, see `llm_response_cache`;
+        `requests_per_minute`, `tokens_per_minute` and `max_concurrent_calls` set up the shared
+        LLMGovernor every call of the client goes through, see `get_llm_governor`
+        (also read from `<PROVIDER>_REQUESTS_PER_MINUTE` etc.);
+        a comma separated `base_url` (or `<PROVIDER>_ENDPOINTS`) balances calls over those servers,
+        see `llm_balancer`, with `endpoint_routing` "least_outstanding" (default) or "latency"
     :return:
     """
+    limits = {name: kwargs.pop(name) for name in LIMIT_KWARGS if kwargs.get(name) is not None}
     if provider not in ["ollama", "bedrock"]:
         env_var = f"{provider.upper()}_API_KEY"
         api_key = kwargs.get("api_key", "") or os.getenv(env_var, "")
@@ -164,8 +60,165 @@ def get_llm_model(provider: str, **kwargs):
             error_msg = f"💥 {provider_display} API key not found! 🔑 Please set the `{env_var}` environment variable or provide it in the UI."
             raise ValueError(error_msg)
         kwargs["api_key"] = api_key
+    endpoints = _endpoint_list(provider, kwargs)
+    if len(endpoints) > 1:
+        kwargs["base_url"] = ",".join(endpoints)
+
+    governor = _get_governor(provider, kwargs, limits)
+    scope = _client_scope()
+    key = _llm_cache_key(provider, kwargs) + (id(governor) if governor is not None else None, id(scope))
+    with _llm_cache_lock:
+        cached = _llm_cache.get(key)
+        # The id of a finished loop or thread may be reused, the reference tells them apart
+        if cached is not None and cached[1]() is scope:
+            _llm_cache.move_to_end(key)
+            return cached[0]
+
+    if len(endpoints) > 1:
+        llm = _create_balanced_model(provider, endpoints, **kwargs)
+    else:
+        llm = _create_configured_model(provider, **kwargs)
+    if governor is not None:
+        from .llm_limits import governed
+
+        llm = governed(llm, governor)
+    with _llm_cache_lock:
+        # Clients of loops that were closed (e.g. by asyncio.run) can never be used again
+        for stale in [key for key, (_, scope_ref) in _llm_cache.items() if not _scope_alive(scope_ref)]:
+            _close_client(_llm_cache.pop(stale)[0])
+        _llm_cache[key] = (llm, weakref.ref(scope))
+        while len(_llm_cache) > LLM_CACHE_SIZE:
+            _, (evicted, _) = _llm_cache.popitem(last=False)
+            _close_client(evicted)
+    return llm
+
+
+def _client_scope():
+    """The event loop a new client's async connection pool will be bound to, or the thread outside a loop."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return threading.current_thread()
+
+
+def _scope_alive(scope_ref) -> bool:
+    scope = scope_ref()
+    if scope is None:
+        return False
+    if isinstance(scope, asyncio.AbstractEventLoop):
+        return not scope.is_closed()
+    return scope.is_alive()
+
+
+def _llm_cache_key(provider: str, kwargs: dict) -> tuple:
+    """Provider plus every setting that shapes the client; the API key only as a fingerprint."""
+    items = []
+    for name, value in sorted(kwargs.items()):
+        if name == "api_key":
+            value = hashlib.sha256(value.encode("utf-8")).hexdigest()[:16] if value else None
+        items.append((name, repr(value)))
+    return provider, tuple(items)
+
+
+def clear_llm_cache() -> None:
+    with _llm_cache_lock:
+        for llm, _ in _llm_cache.values():
+            _close_client(llm)
+        _llm_cache.clear()
+
+
+def _close_client(llm) -> None:
+    """Release what a dropped client keeps running in the background (health checks of balanced models)."""
+    endpoint_pool = getattr(llm, "endpoint_pool", None)
+    if endpoint_pool is not None:
+        endpoint_pool.close()
+
+
+def get_llm_governor(llm):
+    """The LLMGovernor shared by all callers of `llm`'s provider and model, None if no limits are set."""
+    return getattr(llm, "llm_governor", None)
+
+
+def _get_governor(provider: str, kwargs: dict, limits: dict):
+    env_prefix = provider.upper()
+    settings = {}
+    for name in LIMIT_KWARGS:
+        value = limits.get(name) or os.getenv(f"{env_prefix}_{name.upper()}")
+        if value:
+            settings[name] = float(value)
+    if not settings:
+        return None
+
+    from .llm_limits import LLMGovernor
+
+    key = (provider, kwargs.get("model_name"), kwargs.get("base_url"))
+    with _llm_cache_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = _governors[key] = LLMGovernor(
+                int(settings.get("max_concurrent_calls", DEFAULT_MAX_CONCURRENT_CALLS)),
+                requests_per_minute=settings.get("requests_per_minute"),
+                tokens_per_minute=settings.get("tokens_per_minute"),
+            )
+            logger.info(f"LLM limits for {provider}/{kwargs.get('model_name')}: {settings}")
+        return governor
+
 
+def _endpoint_list(provider: str, kwargs: dict) -> list:
+    """Servers to balance over: a comma separated `base_url`, else `<PROVIDER>_ENDPOINTS`."""
+    if provider not in BALANCED_PROVIDERS:
+        return []
+    value = kwargs.get("base_url") or os.getenv(f"{provider.upper()}_ENDPOINTS", "")
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def _create_configured_model(provider: str, **kwargs):
+    llm = _create_llm_model(provider, **kwargs)
+    if kwargs.get("streaming"):
+        _enable_streaming(llm)
+    if kwargs.get("response_cache"):
+        from .llm_response_cache import get_response_cache
+
+        llm.cache = get_response_cache()
+    return llm
+
+
+def _create_balanced_model(provider: str, endpoints: list, **kwargs):
+    """One client per endpoint behind a single model that routes and fails over between them."""
+    from .llm_balancer import load_balanced
+
+    kwargs.pop("base_url", None)
+    routing = kwargs.pop("endpoint_routing", None) or os.getenv("LLM_ENDPOINT_ROUTING", "least_outstanding")
+    clients = [_create_configured_model(provider, base_url=url, **kwargs) for url in endpoints]
+    health_path = "/api/tags" if provider == "ollama" else "/models"
+    logger.info(f"Balancing {provider}/{kwargs.get('model_name')} over {len(endpoints)} endpoints ({routing})")
+    return load_balanced(
+        clients,
+        endpoints,
+        health_urls=[url.rstrip("/") + health_path for url in endpoints],
+        routing=routing,
+        health_check_interval=float(
+            os.getenv("LLM_ENDPOINT_HEALTH_CHECK_INTERVAL", DEFAULT_HEALTH_CHECK_INTERVAL)),
+    )
+
+
+def _enable_streaming(llm) -> None:
+    """Switch a chat model to token streaming and forward its partial output to the active sink."""
+    from .llm_stream import PartialOutputCallbackHandler
+
+    if hasattr(llm, "astream_reasoning"):
+        # The DeepSeek R1 wrappers stream and split the <think> block themselves
+        return
+    if "streaming" in type(llm).model_fields:
+        llm.streaming = True
+    llm.callbacks = [*(llm.callbacks or []), PartialOutputCallbackHandler()]
+
+
+def _create_llm_model(provider: str, **kwargs):
+    api_key = kwargs.get("api_key")
     if provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
         if not kwargs.get("base_url", ""):
             base_url = "https://api.anthropic.com"
         else:
@@ -178,6 +231,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == 'mistral':
+        from langchain_mistralai import ChatMistralAI
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("MISTRAL_ENDPOINT", "https://api.mistral.ai/v1")
         else:
@@ -194,6 +249,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == "openai":
+        from langchain_openai import ChatOpenAI
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("OPENAI_ENDPOINT", "https://api.openai.com/v1")
         else:
@@ -206,6 +263,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == "grok":
+        from langchain_openai import ChatOpenAI
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("GROK_ENDPOINT", "https://api.x.ai/v1")
         else:
@@ -218,6 +277,10 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == "deepseek":
+        from langchain_openai import ChatOpenAI
+
+        from .reasoning_llm import DeepSeekR1ChatOpenAI
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("DEEPSEEK_ENDPOINT", "")
         else:
@@ -229,6 +292,7 @@ def get_llm_model(provider: str, **kwargs):
                 temperature=kwargs.get("temperature", 0.0),
                 base_url=base_url,
                 api_key=api_key,
+                streaming=kwargs.get("streaming", False),
             )
         else:
             return ChatOpenAI(
@@ -238,12 +302,18 @@ def get_llm_model(provider: str, **kwargs):
                 api_key=api_key,
             )
     elif provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         return ChatGoogleGenerativeAI(
             model=kwargs.get("model_name", "gemini-2.0-flash-exp"),
             temperature=kwargs.get("temperature", 0.0),
             api_key=api_key,
         )
     elif provider == "ollama":
+        from langchain_ollama import ChatOllama
+
+        from .reasoning_llm import DeepSeekR1ChatOllama
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("OLLAMA_ENDPOINT", "http://localhost:11434")
         else:
@@ -255,6 +325,7 @@ def get_llm_model(provider: str, **kwargs):
                 temperature=kwargs.get("temperature", 0.0),
                 num_ctx=kwargs.get("num_ctx", 32000),
                 base_url=base_url,
+                streaming=kwargs.get("streaming", False),
             )
         else:
             return ChatOllama(
@@ -265,6 +336,8 @@ def get_llm_model(provider: str, **kwargs):
                 base_url=base_url,
             )
     elif provider == "azure_openai":
+        from langchain_openai import AzureChatOpenAI
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("AZURE_OPENAI_ENDPOINT", "")
         else:
@@ -278,6 +351,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == "alibaba":
+        from langchain_openai import ChatOpenAI
+
         if not kwargs.get("base_url", ""):
             base_url = os.getenv("ALIBABA_ENDPOINT", "https://dashscope.aliyuncs.com/compatible-mode/v1")
         else:
@@ -290,6 +365,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == "ibm":
+        from langchain_ibm import ChatWatsonx
+
         parameters = {
             "temperature": kwargs.get("temperature", 0.0),
             "max_tokens": kwargs.get("num_ctx", 32000)
@@ -307,6 +384,8 @@ def get_llm_model(provider: str, **kwargs):
             params=parameters
         )
     elif provider == "moonshot":
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(
             model=kwargs.get("model_name", "moonshot-v1-32k-vision-preview"),
             temperature=kwargs.get("temperature", 0.0),
@@ -314,6 +393,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=os.getenv("MOONSHOT_API_KEY"),
         )
     elif provider == "unbound":
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(
             model=kwargs.get("model_name", "gpt-4o-mini"),
             temperature=kwargs.get("temperature", 0.0),
@@ -321,6 +402,8 @@ def get_llm_model(provider: str, **kwargs):
             api_key=api_key,
         )
     elif provider == "siliconflow":
+        from langchain_openai import ChatOpenAI
+
         if not kwargs.get("api_key", ""):
             api_key = os.getenv("SiliconFLOW_API_KEY", "")
         else:
@@ -336,6 +419,8 @@ def get_llm_model(provider: str, **kwargs):
             temperature=kwargs.get("temperature", 0.0),
         )
     elif provider == "modelscope":
+        from langchain_openai import ChatOpenAI
+
         if not kwargs.get("api_key", ""):
             api_key = os.getenv("MODELSCOPE_API_KEY", "")
         else:
@@ -352,6 +437,7 @@ def get_llm_model(provider: str, **kwargs):
         )
     elif provider == "bedrock":
         import boto3
+        from langchain_aws import ChatBedrock
         
         region = kwargs.get("region", "") or os.getenv("AWS_BEDROCK_REGION", "us-west-2")
         
@@ -370,7 +456,8 @@ def get_llm_model(provider: str, **kwargs):
                 "temperature": kwargs.get("temperature", 0.0),
                 "max_tokens": kwargs.get("num_ctx", 4096),
             },
-            streaming=False,  # Disable streaming to avoid parsing issues
+            # Off unless asked for, streamed tool calls are only parsed once aggregated
+            streaming=kwargs.get("streaming", False),
         )
     else:
         raise ValueError(f"Unsupported provider: {provider}")
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "./tmp/llm_cache/responses.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class SQLiteResponseCache(BaseCache):
+    """
+    Persistent LangChain cache of chat model responses, stored in SQLite.
+
+    Entries are keyed by a sha256 of LangChain's `llm_string` (model name,
+    temperature and bound tools) and the serialized prompt messages. They expire
+    after `ttl_seconds`, and past `max_entries` the least recently used go first.
+    Async lookups run in LangChain's executor, so the event loop is not blocked.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        try:
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message=".*is in beta.*")
+                return loads(row[0])
+        except Exception as e:
+            logger.warning(f"Dropping unreadable LLM cache entry: {e}")
+            with self._lock:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        value = dumps(list(return_val))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def count(self) -> int:
+        # Not __len__: LangChain tests the cache for truthiness, an empty one must not read as "off"
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+_response_cache: Optional[SQLiteResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SQLiteResponseCache:
+    """Shared cache configured by LLM_RESPONSE_CACHE_PATH, _TTL_SECONDS and _MAX_ENTRIES."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = SQLiteResponseCache(
+                path=os.getenv("LLM_RESPONSE_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                max_entries=int(os.getenv("LLM_RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+            logger.info(f"LLM response cache at {_response_cache.path}")
+        return _response_cache
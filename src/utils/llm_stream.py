@@ -0,0 +1,205 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+_UNDECIDED = "undecided"
+_REASONING = "reasoning"
+_UNTAGGED = "untagged"
+_ANSWER = "answer"
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """Length of the longest suffix of `text` that is a prefix of `tag`."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ThinkTagParser:
+    """
+    Splits a streamed `<think>...</think>` response into reasoning and answer text.
+
+    `feed` returns the `(reasoning, answer)` text that is certain so far, holding
+    back a tag that may be split across chunks. A response that has `</think>`
+    but no opening tag (templates that pre-fill it) is held until the closing
+    tag shows up, then reported as reasoning.
+    """
+
+    def __init__(self):
+        self._state = _UNDECIDED
+        self._buffer = ""
+
+    def feed(self, text: str) -> Tuple[str, str]:
+        self._buffer += text
+        reasoning, answer = "", ""
+        while True:
+            if self._state == _UNDECIDED:
+                stripped = self._buffer.lstrip()
+                if stripped.startswith(THINK_OPEN):
+                    self._buffer = stripped[len(THINK_OPEN):]
+                    self._state = _REASONING
+                    continue
+                if stripped and not THINK_OPEN.startswith(stripped[:len(THINK_OPEN)]):
+                    self._state = _UNTAGGED
+                    continue
+                break
+            if self._state in (_REASONING, _UNTAGGED):
+                index = self._buffer.find(THINK_CLOSE)
+                if index >= 0:
+                    reasoning += self._buffer[:index]
+                    self._buffer = self._buffer[index + len(THINK_CLOSE):]
+                    self._state = _ANSWER
+                    continue
+                if self._state == _REASONING:
+                    keep = _partial_tag_length(self._buffer, THINK_CLOSE)
+                    reasoning += self._buffer[:len(self._buffer) - keep]
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+            answer += self._buffer
+            self._buffer = ""
+            break
+        return reasoning, answer
+
+    def flush(self) -> Tuple[str, str]:
+        """Return whatever is still held back once the stream has ended."""
+        rest, self._buffer = self._buffer, ""
+        if self._state == _REASONING:
+            return rest, ""
+        return "", rest
+
+
+@dataclass
+class PartialOutput:
+    """Reasoning and answer text of an LLM call that is still streaming."""
+    reasoning: str = ""
+    content: str = ""
+
+    def to_markdown(self, max_chars: int = 2000) -> str:
+        """Tail of the output for a live view; long reasoning is cut from the front."""
+        parts = []
+        if self.reasoning:
+            reasoning = self.reasoning[-max_chars:]
+            parts.append("**Thinking...**\n\n" + "\n".join(f"> {line}" for line in reasoning.splitlines()))
+        if self.content:
+            parts.append(f"```\n{self.content[-max_chars:]}\n```")
+        return "\n\n".join(parts)
+
+
+class StreamCancelled(Exception):
+    """Raised inside a streaming LLM call when the partial output sink asks to stop."""
+
+
+# A sink gets the output so far after every chunk and returns False to cancel the call
+PartialOutputSink = Callable[[PartialOutput], Optional[bool]]
+
+_partial_output_sink: ContextVar[Optional[PartialOutputSink]] = ContextVar("partial_output_sink", default=None)
+
+
+@contextmanager
+def stream_partial_output(sink: PartialOutputSink):
+    """
+    Send the partial output of streaming LLM calls made in this context to `sink`.
+
+    Tasks copy the context they are created in, so wrapping `asyncio.create_task`
+    covers every call the task makes, however deep in the agent it happens.
+    """
+    token = _partial_output_sink.set(sink)
+    try:
+        yield
+    finally:
+        _partial_output_sink.reset(token)
+
+
+class PartialOutputCollector:
+    """Accumulates the reasoning/answer deltas of one call and reports them to the active sink."""
+
+    def __init__(self):
+        self.reasoning = ""
+        self.content = ""
+        self._sink = _partial_output_sink.get()
+
+    def add(self, reasoning: str = "", content: str = "") -> None:
+        if not reasoning and not content:
+            return
+        self.reasoning += reasoning
+        self.content += content
+        if self._sink is not None and self._sink(PartialOutput(self.reasoning, self.content)) is False:
+            raise StreamCancelled("LLM call cancelled while streaming")
+
+
+class PartialOutputCallbackHandler(AsyncCallbackHandler):
+    """
+    Forwards streamed tokens of regular chat models to the active sink.
+
+    Tokens go through a ThinkTagParser, so models that inline `<think>` blocks
+    are shown as reasoning and answer like the DeepSeek R1 wrappers. Streamed
+    tool call arguments are reported as answer text.
+    """
+    # Let StreamCancelled through instead of having the callback manager log it
+    raise_error = True
+
+    def __init__(self):
+        self._runs: Dict[UUID, Tuple[ThinkTagParser, PartialOutputCollector]] = {}
+
+    async def on_llm_new_token(self, token: str, *, run_id: UUID, chunk: Any = None, **kwargs: Any) -> None:
+        # Function calling and structured output stream the tool arguments, the text is empty then
+        tool_args = "".join(
+            tool_call.get("args") or ""
+            for tool_call in getattr(getattr(chunk, "message", None), "tool_call_chunks", None) or []
+        )
+        if not isinstance(token, str):
+            token = ""
+        if not token and not tool_args:
+            return
+        run = self._runs.get(run_id)
+        if run is None:
+            if _partial_output_sink.get() is None:
+                return
+            run = self._runs[run_id] = (ThinkTagParser(), PartialOutputCollector())
+        parser, collector = run
+        reasoning, content = parser.feed(token) if token else ("", "")
+        collector.add(reasoning, content + tool_args)
+
+    async def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._runs.pop(run_id, None)
+
+
+class ThrottledSink:
+    """
+    Sink for UIs: keeps the latest partial output and calls `notify` at most
+    every `min_interval` seconds. `should_continue` decides on cancellation.
+    """
+
+    def __init__(self, notify: Callable[[], None], should_continue: Callable[[], bool] = lambda: True,
+                 min_interval: float = 0.25):
+        self.notify = notify
+        self.should_continue = should_continue
+        self.min_interval = min_interval
+        self.latest: Optional[PartialOutput] = None
+        self._last_notify = 0.0
+
+    def __call__(self, partial: PartialOutput) -> bool:
+        self.latest = partial
+        now = time.monotonic()
+        if now - self._last_notify >= self.min_interval:
+            self._last_notify = now
+            self.notify()
+        return self.should_continue()
+
+    def clear(self) -> None:
+        self.latest = None
@@ -0,0 +1,182 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.language_models.base import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.runnables import RunnableConfig
+from langchain_ollama import ChatOllama
+from langchain_openai import ChatOpenAI
+
+from .llm_stream import PartialOutputCollector, ThinkTagParser
+
+
+async def _acached(llm: BaseChatModel, input: LanguageModelInput, stop: Optional[list[str]],
+                   call: Callable[[], Awaitable[AIMessage]]) -> AIMessage:
+    """
+    Serve `call` from `llm.cache` when one is set. The wrappers bypass
+    BaseChatModel.agenerate, which is where LangChain consults the cache itself.
+    """
+    cache = llm.cache if isinstance(llm.cache, BaseCache) else None
+    if cache is None:
+        return await call()
+    prompt = dumps(llm._convert_input(input).to_messages())
+    llm_string = llm._get_llm_string(stop=stop)
+    cached = await cache.alookup(prompt, llm_string)
+    if cached:
+        message = cached[0].message
+        return AIMessage(content=message.content,
+                         reasoning_content=message.additional_kwargs.get("reasoning_content"))
+    message = await call()
+    # reasoning_content is not serialized as a message field, keep it in additional_kwargs
+    stored = AIMessage(content=message.content,
+                       additional_kwargs={"reasoning_content": getattr(message, "reasoning_content", None)})
+    await cache.aupdate(prompt, llm_string, [ChatGeneration(message=stored)])
+    return message
+
+
+class DeepSeekR1ChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI for DeepSeek R1 style endpoints that return `reasoning_content`.
+
+    Requests go through the OpenAI clients ChatOpenAI already keeps, so HTTP
+    connections are pooled per instance and `ainvoke` never blocks the event
+    loop. With `streaming=True` the answer is read chunk by chunk.
+    """
+
+    def _request_params(self, input: LanguageModelInput, stop: Optional[list[str]] = None) -> dict:
+        message_history = []
+        for input_ in self._convert_input(input).to_messages():
+            if isinstance(input_, SystemMessage):
+                message_history.append({"role": "system", "content": input_.content})
+            elif isinstance(input_, AIMessage):
+                message_history.append({"role": "assistant", "content": input_.content})
+            else:
+                message_history.append({"role": "user", "content": input_.content})
+        params = {"model": self.model_name, "messages": message_history}
+        if stop:
+            params["stop"] = stop
+        return params
+
+    @staticmethod
+    def _to_ai_message(response: Any) -> AIMessage:
+        message = response.choices[0].message
+        return AIMessage(content=message.content or "", reasoning_content=getattr(message, "reasoning_content", None))
+
+    async def astream_reasoning(
+            self,
+            input: LanguageModelInput,
+            *,
+            stop: Optional[list[str]] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Yield `(reasoning_delta, content_delta)` pairs as the response streams in."""
+        stream = await self.async_client.create(**self._request_params(input, stop), stream=True)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            reasoning = getattr(delta, "reasoning_content", None) or ""
+            content = delta.content or ""
+            if reasoning or content:
+                yield reasoning, content
+
+    async def ainvoke(
+            self,
+            input: LanguageModelInput,
+            config: Optional[RunnableConfig] = None,
+            *,
+            stop: Optional[list[str]] = None,
+            **kwargs: Any,
+    ) -> AIMessage:
+        return await _acached(self, input, stop, lambda: self._ainvoke_reasoning(input, stop))
+
+    async def _ainvoke_reasoning(self, input: LanguageModelInput, stop: Optional[list[str]]) -> AIMessage:
+        if self.streaming:
+            collector = PartialOutputCollector()
+            async for reasoning, content in self.astream_reasoning(input, stop=stop):
+                collector.add(reasoning, content)
+            return AIMessage(content=collector.content, reasoning_content=collector.reasoning)
+
+        response = await self.async_client.create(**self._request_params(input, stop))
+        return self._to_ai_message(response)
+
+    def invoke(
+            self,
+            input: LanguageModelInput,
+            config: Optional[RunnableConfig] = None,
+            *,
+            stop: Optional[list[str]] = None,
+            **kwargs: Any,
+    ) -> AIMessage:
+        response = self.client.create(**self._request_params(input, stop))
+        return self._to_ai_message(response)
+
+
+class DeepSeekR1ChatOllama(ChatOllama):
+    """ChatOllama for DeepSeek R1 models, the `<think>` block becomes `reasoning_content`."""
+
+    # Parse the response as it streams in instead of after it is complete
+    streaming: bool = False
+
+    async def astream_reasoning(
+            self,
+            input: LanguageModelInput,
+            *,
+            stop: Optional[list[str]] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Yield `(reasoning_delta, content_delta)` pairs as the response streams in."""
+        parser = ThinkTagParser()
+        async for chunk in super().astream(input, stop=stop):
+            if isinstance(chunk.content, str) and chunk.content:
+                reasoning, content = parser.feed(chunk.content)
+                if reasoning or content:
+                    yield reasoning, content
+        reasoning, content = parser.flush()
+        if reasoning or content:
+            yield reasoning, content
+
+    async def ainvoke(
+            self,
+            input: LanguageModelInput,
+            config: Optional[RunnableConfig] = None,
+            *,
+            stop: Optional[list[str]] = None,
+            **kwargs: Any,
+    ) -> AIMessage:
+        return await _acached(self, input, stop, lambda: self._ainvoke_reasoning(input, stop))
+
+    async def _ainvoke_reasoning(self, input: LanguageModelInput, stop: Optional[list[str]]) -> AIMessage:
+        if self.streaming:
+            collector = PartialOutputCollector()
+            async for reasoning, content in self.astream_reasoning(input, stop=stop):
+                collector.add(reasoning, content)
+            content = collector.content
+            if "**JSON Response:**" in content:
+                content = content.split("**JSON Response:**")[-1]
+            return AIMessage(content=content, reasoning_content=collector.reasoning)
+
+        org_ai_message = await super().ainvoke(input=input)
+        org_content = org_ai_message.content
+        reasoning_content = org_content.split("</think>")[0].replace("<think>", "")
+        content = org_content.split("</think>")[1]
+        if "**JSON Response:**" in content:
+            content = content.split("**JSON Response:**")[-1]
+        return AIMessage(content=content, reasoning_content=reasoning_content)
+
+    def invoke(
+            self,
+            input: LanguageModelInput,
+            config: Optional[RunnableConfig] = None,
+            *,
+            stop: Optional[list[str]] = None,
+            **kwargs: Any,
+    ) -> AIMessage:
+        org_ai_message = super().invoke(input=input)
+        org_content = org_ai_message.content
+        reasoning_content = org_content.split("</think>")[0].replace("<think>", "")
+        content = org_content.split("</think>")[1]
+        if "**JSON Response:**" in content:
+            content = content.split("**JSON Response:**")[-1]
+        return AIMessage(content=content, reasoning_content=reasoning_content)
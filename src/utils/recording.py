@@ -0,0 +1,341 @@
+import asyncio
+import base64
+import io
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import struct
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+from browser_use.agent.views import AgentHistoryList
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# (step number, base64 screenshot, goal text)
+HistoryFrame = Tuple[int, str, Optional[str]]
+
+_render_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_render_executor() -> ProcessPoolExecutor:
+    global _render_executor
+    if _render_executor is None:
+        # spawn: forking a process that runs playwright and gradio threads is not safe
+        _render_executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _render_executor
+
+
+def history_frames(history: AgentHistoryList) -> List[HistoryFrame]:
+    """Pull the screenshots and goals out of a history so they can be shipped to a worker."""
+    frames = []
+    for i, item in enumerate(history.history, 1):
+        if not item.state.screenshot:
+            continue
+        goal = item.model_output.current_state.next_goal if item.model_output else None
+        frames.append((i, item.state.screenshot, goal))
+    return frames
+
+
+def _load_fonts(font_size: int, title_font_size: int):
+    from PIL import ImageFont
+
+    for font_name in ["Microsoft YaHei", "SimHei", "Noto Sans CJK SC", "Helvetica", "Arial", "DejaVuSans"]:
+        try:
+            if platform.system() == "Windows":
+                font_name = os.path.join(os.getenv("WIN_FONT_DIR", "C:\\Windows\\Fonts"), font_name + ".ttf")
+            return ImageFont.truetype(font_name, font_size), ImageFont.truetype(font_name, title_font_size)
+        except OSError:
+            continue
+    return ImageFont.load_default(), ImageFont.load_default()
+
+
+def _downscale(image, max_width: int):
+    from PIL import Image
+
+    if image.width <= max_width:
+        return image
+    height = max(1, image.height * max_width // image.width)
+    return image.resize((max_width, height), Image.Resampling.BILINEAR)
+
+
+def iter_history_images(
+        task: str,
+        frames: List[HistoryFrame],
+        max_width: int = 960,
+        font_size: int = 40,
+        title_font_size: int = 56,
+        margin: int = 40,
+) -> Iterator["Image.Image"]:
+    """
+    Decode, annotate and downscale history frames one at a time.
+    Overlays are drawn at full resolution so text keeps its proportions.
+    """
+    from browser_use.agent.gif import _add_overlay_to_image, _create_task_frame
+    from PIL import Image
+
+    regular_font, title_font = _load_fonts(font_size, title_font_size)
+    if task:
+        try:
+            yield _downscale(_create_task_frame(task, frames[0][1], title_font, regular_font), max_width)
+        except Exception as e:
+            # The task frame needs a truetype font, skip it on bare systems
+            logger.debug(f"Skipping task frame: {e}")
+
+    for step_number, screenshot, goal in frames:
+        image = Image.open(io.BytesIO(base64.b64decode(screenshot)))
+        if goal:
+            image = _add_overlay_to_image(
+                image=image,
+                step_number=step_number,
+                goal_text=goal,
+                regular_font=regular_font,
+                title_font=title_font,
+                margin=margin,
+            )
+        yield _downscale(image.convert("RGB"), max_width)
+
+
+def render_history_gif(
+        task: str,
+        frames: List[HistoryFrame],
+        output_path: str,
+        max_width: int = 960,
+        duration: int = 3000,
+) -> Optional[str]:
+    """Write an annotated GIF of the history frames. Meant to run in a worker process."""
+    images = iter_history_images(task, frames, max_width=max_width)
+    first = next(images, None)
+    if first is None:
+        return None
+    first.save(output_path, save_all=True, append_images=images, duration=duration, loop=0, optimize=False)
+    logger.info(f"Created GIF at {output_path}")
+    return output_path
+
+
+async def create_history_gif_async(
+        task: str,
+        history: AgentHistoryList,
+        output_path: str,
+        max_width: int = 960,
+        duration: int = 3000,
+) -> Optional[str]:
+    """
+    Render the history GIF in a worker process without blocking the event loop.
+    Returns the output path, or None if there was nothing to render or rendering failed.
+    """
+    global _render_executor
+    # Spilled screenshots are read back from disk here
+    frames = await asyncio.to_thread(history_frames, history)
+    if not frames:
+        logger.warning("No screenshots in history to create GIF from")
+        return None
+
+    loop = asyncio.get_running_loop()
+    try:
+        try:
+            return await loop.run_in_executor(
+                _get_render_executor(), render_history_gif, task, frames, output_path, max_width, duration
+            )
+        except (BrokenProcessPool, OSError) as e:
+            _render_executor = None
+            # Sandboxes without process support still get the GIF, just from a thread
+            logger.warning(f"GIF worker process unavailable ({e}), rendering in a thread.")
+            return await asyncio.to_thread(render_history_gif, task, frames, output_path, max_width, duration)
+    except Exception as e:
+        logger.error(f"Failed to create GIF at {output_path}: {e}", exc_info=True)
+        return None
+
+
+class _MJPEGAviWriter:
+    """
+    Pure-Python Motion-JPEG AVI writer. Frames are appended to disk as they
+    arrive; sizes and the index are patched in on close.
+    """
+
+    def __init__(self, output_path: str, width: int, height: int, seconds_per_frame: float):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.seconds_per_frame = seconds_per_frame
+        self.frame_count = 0
+        self.max_frame_size = 0
+        self._index: List[Tuple[int, int]] = []
+        self._file = open(output_path, "wb")
+        self._write_headers()
+        self._movi_start = self._file.tell() - 4  # offsets in idx1 are relative to the 'movi' fourcc
+
+    def _write_headers(self) -> None:
+        f = self._file
+        scale = max(1, int(round(self.seconds_per_frame * 1000)))
+        f.write(b"RIFF" + struct.pack("<I", 0) + b"AVI ")
+        f.write(b"LIST" + struct.pack("<I", 4 + 64 + 12 + 64 + 48) + b"hdrl")
+        self._avih_pos = f.tell() + 8
+        f.write(b"avih" + struct.pack("<I", 56) + struct.pack(
+            "<14I", int(self.seconds_per_frame * 1_000_000), 0, 0, 0x10, 0, 0, 1, 0,
+            self.width, self.height, 0, 0, 0, 0,
+        ))
+        f.write(b"LIST" + struct.pack("<I", 4 + 64 + 48) + b"strl")
+        self._strh_pos = f.tell() + 8
+        f.write(b"strh" + struct.pack("<I", 56) + b"vidsMJPG" + struct.pack(
+            "<IHHIIIIIIII4h", 0, 0, 0, 0, scale, 1000, 0, 0, 0, 0xFFFFFFFF, 0,
+            0, 0, self.width, self.height,
+        ))
+        f.write(b"strf" + struct.pack("<I", 40) + struct.pack(
+            "<IiiHH4sIiiII", 40, self.width, self.height, 1, 24, b"MJPG", self.width * self.height * 3, 0, 0, 0, 0,
+        ))
+        self._movi_size_pos = f.tell() + 4
+        f.write(b"LIST" + struct.pack("<I", 0) + b"movi")
+
+    def write(self, jpeg: bytes) -> None:
+        offset = self._file.tell() - self._movi_start
+        self._file.write(b"00dc" + struct.pack("<I", len(jpeg)) + jpeg)
+        if len(jpeg) % 2:
+            self._file.write(b"\0")
+        self._index.append((offset, len(jpeg)))
+        self.frame_count += 1
+        self.max_frame_size = max(self.max_frame_size, len(jpeg))
+
+    def close(self) -> None:
+        f = self._file
+        movi_end = f.tell()
+        f.write(b"idx1" + struct.pack("<I", 16 * len(self._index)))
+        for offset, size in self._index:
+            f.write(b"00dc" + struct.pack("<III", 0x10, offset, size))
+        riff_end = f.tell()
+
+        f.seek(4)
+        f.write(struct.pack("<I", riff_end - 8))
+        f.seek(self._movi_size_pos)
+        f.write(struct.pack("<I", movi_end - self._movi_size_pos - 4))
+        # avih: dwTotalFrames, dwSuggestedBufferSize
+        f.seek(self._avih_pos + 16)
+        f.write(struct.pack("<I", self.frame_count))
+        f.seek(self._avih_pos + 28)
+        f.write(struct.pack("<I", self.max_frame_size))
+        # strh: dwLength, dwSuggestedBufferSize
+        f.seek(self._strh_pos + 32)
+        f.write(struct.pack("<II", self.frame_count, self.max_frame_size))
+        f.close()
+
+
+class _FFmpegWriter:
+    """Pipes JPEG frames into a local ffmpeg process that encodes as it goes."""
+
+    CODEC_ARGS = {
+        ".mp4": ["-c:v", "libx264", "-preset", "veryfast", "-tune", "zerolatency", "-crf", "28",
+                 "-pix_fmt", "yuv420p", "-movflags", "frag_keyframe+empty_moov"],
+        ".webm": ["-c:v", "libvpx-vp9", "-deadline", "realtime", "-row-mt", "1", "-crf", "40", "-b:v", "0",
+                  "-pix_fmt", "yuv420p"],
+    }
+
+    def __init__(self, ffmpeg: str, output_path: str, seconds_per_frame: float):
+        self.output_path = output_path
+        ext = os.path.splitext(output_path)[1].lower()
+        self._process = subprocess.Popen(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "image2pipe", "-c:v", "mjpeg",
+             "-framerate", f"{1.0 / seconds_per_frame:.6g}", "-i", "-", *self.CODEC_ARGS[ext], output_path],
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def write(self, jpeg: bytes) -> None:
+        self._process.stdin.write(jpeg)
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        stderr = self._process.stderr.read()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace').strip()}")
+
+
+class HistoryVideoRecorder:
+    """
+    Streams step screenshots into a compact video while the agent runs.
+
+    `.mp4` and `.webm` outputs are encoded by a local ffmpeg if one is on PATH.
+    Otherwise frames go into a pure-Python Motion-JPEG `.avi` next to the
+    requested path. Frames are encoded and written by a background task as they
+    are submitted, so there is no encoding pass at the end of the run.
+    """
+
+    def __init__(
+            self,
+            output_path: str,
+            max_width: int = 960,
+            seconds_per_frame: float = 1.0,
+            jpeg_quality: int = 75,
+    ):
+        self.output_path = output_path
+        self.max_width = max_width
+        self.seconds_per_frame = seconds_per_frame
+        self.jpeg_quality = jpeg_quality
+        self.frames_written = 0
+        self._writer = None
+        self._size: Optional[Tuple[int, int]] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def submit(self, screenshot_b64: str) -> None:
+        """Queue a base64 screenshot for encoding without waiting for it."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        self._queue.put_nowait(screenshot_b64)
+
+    async def _run(self) -> None:
+        while True:
+            screenshot_b64 = await self._queue.get()
+            if screenshot_b64 is None:
+                return
+            try:
+                await asyncio.to_thread(self._write_frame, screenshot_b64)
+            except Exception as e:
+                logger.error(f"Failed to write recording frame: {e}", exc_info=True)
+
+    def _open_writer(self, width: int, height: int):
+        ext = os.path.splitext(self.output_path)[1].lower()
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg and ext in _FFmpegWriter.CODEC_ARGS:
+            return _FFmpegWriter(ffmpeg, self.output_path, self.seconds_per_frame)
+        output_path = os.path.splitext(self.output_path)[0] + ".avi"
+        if ext != ".avi":
+            logger.info(f"ffmpeg not available for {ext}, recording Motion-JPEG to {output_path}")
+        return _MJPEGAviWriter(output_path, width, height, self.seconds_per_frame)
+
+    def _write_frame(self, screenshot_b64: str) -> None:
+        from PIL import Image
+
+        image = _downscale(Image.open(io.BytesIO(base64.b64decode(screenshot_b64))).convert("RGB"), self.max_width)
+        if self._size is None:
+            # Encoders need a fixed frame size with even dimensions
+            self._size = (image.width - image.width % 2, image.height - image.height % 2)
+            self._writer = self._open_writer(*self._size)
+        if image.size != self._size:
+            image = image.resize(self._size, Image.Resampling.BILINEAR)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=self.jpeg_quality)
+        self._writer.write(buffer.getvalue())
+        self.frames_written += 1
+
+    async def close(self) -> Optional[str]:
+        """Flush pending frames and finalize the file. Returns the written path, if any."""
+        if self._worker is None:
+            return None
+        self._queue.put_nowait(None)
+        await self._worker
+        if self._writer is None:
+            return None
+        try:
+            await asyncio.to_thread(self._writer.close)
+        except Exception as e:
+            logger.error(f"Failed to finalize recording {self._writer.output_path}: {e}")
+            return None
+        logger.info(f"Saved run recording ({self.frames_written} frames) to {self._writer.output_path}")
+        return self._writer.output_path
@@ -3,16 +3,6 @@ import os
 import time
 from pathlib import Path
 from typing import Dict, Optional
-import requests
-import boto3
-
-from langchain_anthropic import ChatAnthropic
-from langchain_mistralai import ChatMistralAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_ollama import ChatOllama
-from langchain_openai import AzureChatOpenAI, ChatOpenAI
-from langchain_aws import ChatBedrock
-import gradio as gr
 
 
 model_names = {
@@ -31,6 +21,9 @@ def get_llm_model(provider: str, **kwargs):
     Get LLM model based on provider
     """
     if provider == "bedrock":
+        import boto3
+        from langchain_aws import ChatBedrock
+
         region = kwargs.get("region", "") or os.getenv("AWS_BEDROCK_REGION", "us-west-2")
         
         session = boto3.Session(region_name=region)
@@ -215,6 +215,24 @@ def create_agent_settings_tab(webui_manager: WebuiManager):
             choices=['function_calling', 'json_mode', 'raw', 'auto', 'tools', "None"],
             visible=True
         )
+        dom_diff = gr.Checkbox(
+            label="Send Page Changes Only",
+            value=False,
+            info="After the first step on a page, send only the interactive elements that changed",
+            interactive=True
+        )
+        speculative_prefetch = gr.Checkbox(
+            label="Prefetch While Thinking",
+            value=False,
+            info="Resolve visible link hosts and pre-extract page text while waiting for the LLM",
+            interactive=True
+        )
+        stream_llm_output = gr.Checkbox(
+            label="Stream LLM Output",
+            value=False,
+            info="Show reasoning and answers while the model writes them; Stop then also ends the pending call",
+            interactive=True
+        )
     tab_components.update(dict(
         override_system_prompt=override_system_prompt,
         extend_system_prompt=extend_system_prompt,
@@ -236,6 +254,9 @@ def create_agent_settings_tab(webui_manager: WebuiManager):
         max_actions=max_actions,
         max_input_tokens=max_input_tokens,
         tool_calling_method=tool_calling_method,
+        dom_diff=dom_diff,
+        speculative_prefetch=speculative_prefetch,
+        stream_llm_output=stream_llm_output,
         mcp_json_file=mcp_json_file,
         mcp_server_config=mcp_server_config,
     ))
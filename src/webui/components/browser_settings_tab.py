@@ -89,6 +89,23 @@ def create_browser_settings_tab(webui_manager: WebuiManager):
                 info="Browser window height",
                 interactive=True
             )
+    with gr.Group():
+        with gr.Row():
+            live_view_fps = gr.Slider(
+                minimum=1,
+                maximum=30,
+                value=5,
+                step=1,
+                label="Live View FPS",
+                info="Maximum frame rate of the browser live view",
+                interactive=True
+            )
+            live_view_width = gr.Number(
+                label="Live View Width",
+                value=800,
+                info="Live view frames are downscaled to this width (px)",
+                interactive=True
+            )
     with gr.Group():
         with gr.Row():
             cdp_url = gr.Textbox(
@@ -131,6 +148,13 @@ def create_browser_settings_tab(webui_manager: WebuiManager):
                 info="Specify the directory where downloaded files should be saved.",
                 interactive=True,
             )
+            recording_format = gr.Dropdown(
+                label="Task Recording Format",
+                choices=["gif", "mp4", "webm"],
+                value="gif",
+                info="gif is rendered after the run; mp4/webm are streamed while it runs (Motion-JPEG .avi without ffmpeg)",
+                interactive=True,
+            )
     tab_components.update(
         dict(
             browser_binary_path=browser_binary_path,
@@ -143,10 +167,13 @@ def create_browser_settings_tab(webui_manager: WebuiManager):
             save_trace_path=save_trace_path,
             save_agent_history_path=save_agent_history_path,
             save_download_path=save_download_path,
+            recording_format=recording_format,
             cdp_url=cdp_url,
             wss_url=wss_url,
             window_h=window_h,
             window_w=window_w,
+            live_view_fps=live_view_fps,
+            live_view_width=live_view_width,
         )
     )
     webui_manager.add_components("browser_settings", tab_components)
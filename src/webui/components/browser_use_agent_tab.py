@@ -1,9 +1,11 @@
 import asyncio
+import base64
+import io
 import json
 import logging
 import os
 import uuid
-from typing import Any, AsyncGenerator, Dict, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
 import gradio as gr
 
@@ -17,74 +19,37 @@ from browser_use.browser.context import BrowserContext, BrowserContextConfig
 from browser_use.browser.views import BrowserState
 from gradio.components import Component
 from langchain_core.language_models.chat_models import BaseChatModel
+from PIL import Image
 
 from src.agent.browser_use.browser_use_agent import BrowserUseAgent
 from src.agent.custom_agent import CustomAgent
 from src.browser.custom_browser import CustomBrowser
+from src.browser.live_view import ScreencastStream
 from src.controller.custom_controller import CustomController
 from src.utils import llm_provider
+from src.utils.blob_store import BlobStore
+from src.utils.llm_stream import ThrottledSink, stream_partial_output
+from src.webui.incremental_chatbot import IncrementalChatHistory
 from src.webui.webui_manager import WebuiManager
 
 logger = logging.getLogger(__name__)
 
 
-# --- URL Segmentation Functions ---
+# --- Presigned URL Prerequisite ---
 
-def segment_presigned_url(url: str, first_segment_size: int = 200, other_segment_size: int = 400) -> list:
+def create_presigned_url_prerequisite_code(domain_id: str, user_profile: str, space_name: str) -> str:
     """
-    Segment a long presigned URL into manageable chunks.
-    
-    Args:
-        url: The full presigned URL to segment
-        first_segment_size: Size of the first segment (default 200 tokens)
-        other_segment_size: Size of other segments (default 400 tokens)
-    
-    Returns:
-        List of URL segments
-    """
-    segments = []
-    
-    # First segment (200 tokens/characters)
-    segments.append(url[:first_segment_size])
-    remaining_url = url[first_segment_size:]
-    
-    # Remaining segments (400 tokens/characters each)
-    while remaining_url:
-        segment_size = min(other_segment_size, len(remaining_url))
-        segments.append(remaining_url[:segment_size])
-        remaining_url = remaining_url[segment_size:]
-    
-    return segments
+    Create prerequisite code that exposes a SageMaker presigned URL as a placeholder.
 
-def generate_task_instructions(num_segments: int) -> str:
-    """
-    Generate dynamic task instructions for URL reconstruction.
-    
-    Args:
-        num_segments: Number of URL segments
-    
-    Returns:
-        String with step-by-step instructions
-    """
-    if num_segments <= 1:
-        return "1. open PLACEHOLDER_URL_1"
-    
-    instructions = ["1. open PLACEHOLDER_URL_1"]
-    
-    for i in range(2, num_segments + 1):
-        instructions.append(f"{i}. append PLACEHOLDER_URL_{i} to the url")
-    
-    return "\n".join(instructions)
+    The full URL is kept as a single PRESIGNED_URL placeholder; when the task
+    starts, long placeholder values are swapped for short handles from the
+    controller's URL registry, so the agent opens the URL in one step.
 
-def create_segmented_prerequisite_code(domain_id: str, user_profile: str, space_name: str) -> str:
-    """
-    Create prerequisite code with URL segmentation logic.
-    
     Args:
         domain_id: SageMaker domain ID
         user_profile: SageMaker user profile name
         space_name: SageMaker space name
-    
+
     Returns:
         Complete prerequisite code as string
     """
@@ -99,32 +64,10 @@ response = sagemaker_client.create_presigned_domain_url(
     SpaceName="{space_name}"
 )
 
-# Segment the URL into manageable chunks
-def segment_url(url, first_size=100, other_size=450):
-    segments = []
-    segments.append(url[:first_size])
-    remaining = url[first_size:]
-    
-    while remaining:
-        segment_size = min(other_size, len(remaining))
-        segments.append(remaining[:segment_size])
-        remaining = remaining[segment_size:]
-    
-    return segments
-
-url_segments = segment_url(response["AuthorizedUrl"])
-
-PLACEHOLDERS = {{}}
-for i, segment in enumerate(url_segments, 1):
-    PLACEHOLDERS[f"PLACEHOLDER_URL_{{i}}"] = segment
-
-# Generate task instructions
-num_segments = len(url_segments)
-task_instructions = "1. open PLACEHOLDER_URL_1\\n"
-for i in range(2, num_segments + 1):
-    task_instructions += f"{{i}}. append PLACEHOLDER_URL_{{i}} to the url\\n"
-
-PLACEHOLDERS["TASK_INSTRUCTIONS"] = task_instructions'''
+PLACEHOLDERS = {{
+    "PRESIGNED_URL": response["AuthorizedUrl"],
+    "TASK_INSTRUCTIONS": "1. open PRESIGNED_URL",
+}}'''
 
 # --- Helper Functions --- (Defined at module level)
 
@@ -158,6 +101,7 @@ async def _initialize_llm(
         base_url: Optional[str],
         api_key: Optional[str],
         num_ctx: Optional[int] = None,
+        streaming: bool = False,
 ) -> Optional[BaseChatModel]:
     """Initializes the LLM based on settings. Returns None if provider/model is missing."""
     if not provider or not model_name:
@@ -177,6 +121,7 @@ async def _initialize_llm(
             api_key=api_key or None,
             # Add other relevant params like num_ctx for ollama
             num_ctx=num_ctx if provider == "ollama" else None,
+            streaming=streaming,
         )
         return llm
     except Exception as e:
@@ -216,6 +161,14 @@ def _get_config_value(
         return default
 
 
+def _chat_value(webui_manager: WebuiManager, history: Optional[List[Dict[str, Any]]] = None) -> List[Any]:
+    """The chat history as the Chatbot value, with already sent messages processed only once."""
+    history = webui_manager.bu_chat_history if history is None else history
+    if webui_manager.bu_chat_view is None:
+        return history
+    return webui_manager.bu_chat_view.render(history)
+
+
 def _format_agent_output(model_output: AgentOutput) -> str:
     """Formats AgentOutput for display in the chatbot using JSON."""
     content = ""
@@ -249,9 +202,51 @@ def _format_agent_output(model_output: AgentOutput) -> str:
     return content.strip()
 
 
+# --- Screenshot Storage ---
+
+
+def _store_screenshot(store: BlobStore, screenshot_b64: str, thumb_width: int = 400) -> Tuple[str, str]:
+    """Write a step screenshot and a small JPEG thumbnail to the blob store, returns both keys."""
+    raw = base64.b64decode(screenshot_b64)
+    full_key = store.put(raw, ext=".png" if raw.startswith(b"\x89PNG") else ".jpg")
+
+    image = Image.open(io.BytesIO(raw))
+    if image.width > thumb_width:
+        height = max(1, image.height * thumb_width // image.width)
+        image = image.resize((thumb_width, height), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=70)
+    thumb_key = store.put(buffer.getvalue(), ext=".jpg")
+    return full_key, thumb_key
+
+
+def _blob_url(store: BlobStore, key: str) -> str:
+    # Served by gradio because the store directory is registered as a static path
+    return f"/gradio_api/file={store.path(key)}"
+
+
 # --- Updated Callback Implementation ---
 
 
+def _notify_ui(webui_manager: WebuiManager) -> None:
+    """Wake the streaming loop in run_agent_task."""
+    if webui_manager.bu_agent:
+        webui_manager.bu_agent.control.notify()
+
+
+async def _wait_for_update(live_view: ScreencastStream, webui_manager: WebuiManager, timeout: float) -> None:
+    """Sleep until a live-view frame or an agent control signal arrives, or `timeout` expires."""
+    waiters = [
+        asyncio.ensure_future(live_view.wait_for_frame(timeout)),
+        asyncio.ensure_future(webui_manager.bu_agent.control.wait_for_change(timeout)),
+    ]
+    try:
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
+
+
 async def _handle_new_step(
         webui_manager: WebuiManager, state: BrowserState, output: AgentOutput, step_num: int
 ):
@@ -279,8 +274,11 @@ async def _handle_new_step(
             if (
                     isinstance(screenshot_data, str) and len(screenshot_data) > 100
             ):  # Arbitrary length check
-                # *** UPDATED STYLE: Removed centering, adjusted width ***
-                img_tag = f'<img src="data:image/jpeg;base64,{screenshot_data}" alt="Step {step_num} Screenshot" style="max-width: 800px; max-height: 600px; object-fit:contain;" />'
+                # Chat only carries a thumbnail reference, the full image is one click away
+                store = webui_manager.blob_store
+                full_key, thumb_key = await asyncio.to_thread(_store_screenshot, store, screenshot_data)
+                webui_manager.bu_chat_blob_keys.update((full_key, thumb_key))
+                img_tag = f'<a href="{_blob_url(store, full_key)}" target="_blank"><img src="{_blob_url(store, thumb_key)}" alt="Step {step_num} Screenshot" style="max-width: 400px; max-height: 300px; object-fit:contain;" /></a>'
                 screenshot_html = (
                         img_tag + "<br/>"
                 )  # Use <br/> for line break after inline-block image
@@ -299,13 +297,23 @@ async def _handle_new_step(
     else:
         logger.debug(f"No screenshot available for step {step_num}.")
 
+    # The finished output replaces the live preview of it
+    if webui_manager.bu_output_sink:
+        webui_manager.bu_output_sink.clear()
+
     # --- Format Agent Output ---
     formatted_output = _format_agent_output(output)  # Use the updated function
 
+    # --- Prompt Token Usage ---
+    token_html = ""
+    token_report = getattr(webui_manager.bu_agent, "last_token_report", None)
+    if token_report is not None:
+        token_html = f"<br/><small>{token_report.summary()}</small>"
+
     # --- Combine and Append to Chat ---
     step_header = f"--- **Step {step_num}** ---"
     # Combine header, image (with line break), and JSON block
-    final_content = step_header + "<br/>" + screenshot_html + formatted_output
+    final_content = step_header + "<br/>" + screenshot_html + formatted_output + token_html
 
     chat_message = {
         "role": "assistant",
@@ -348,7 +356,7 @@ async def _ask_assistant_callback(
     """Callback triggered by the agent's ask_for_assistant action."""
     logger.info("Agent requires assistance. Waiting for user input.")
 
-    if not hasattr(webui_manager, "_chat_history"):
+    if not hasattr(webui_manager, "bu_chat_history"):
         logger.error("Chat history not found in webui_manager during ask_assistant!")
         return {"response": "Internal Error: Cannot display help request."}
 
@@ -362,6 +370,7 @@ async def _ask_assistant_callback(
     # Use state stored in webui_manager
     webui_manager.bu_response_event = asyncio.Event()
     webui_manager.bu_user_help_response = None  # Reset previous response
+    _notify_ui(webui_manager)
 
     try:
         logger.info("Waiting for user response event...")
@@ -378,6 +387,7 @@ async def _ask_assistant_callback(
             }
         )
         webui_manager.bu_response_event = None  # Clear the event
+        _notify_ui(webui_manager)
         return {"response": "Timeout: User did not respond."}  # Inform the agent
 
     response = webui_manager.bu_user_help_response
@@ -387,6 +397,7 @@ async def _ask_assistant_callback(
     webui_manager.bu_response_event = (
         None  # Clear the event for the next potential request
     )
+    _notify_ui(webui_manager)
     return {"response": response}
 
 
@@ -412,10 +423,12 @@ async def run_agent_task(
         "browser_use_agent.clear_button"
     )
     chatbot_comp = webui_manager.get_component_by_id("browser_use_agent.chatbot")
+    live_output_comp = webui_manager.get_component_by_id("browser_use_agent.live_output")
     history_file_comp = webui_manager.get_component_by_id(
         "browser_use_agent.agent_history_file"
     )
     gif_comp = webui_manager.get_component_by_id("browser_use_agent.recording_gif")
+    video_comp = webui_manager.get_component_by_id("browser_use_agent.recording_video")
     browser_view_comp = webui_manager.get_component_by_id(
         "browser_use_agent.browser_view"
     )
@@ -439,7 +452,7 @@ async def run_agent_task(
             exec(prerequisite, globals(), global_vars)
             # Get PLACEHOLDERS key value as dict from global_vars.items()
             placeholders = global_vars.get("PLACEHOLDERS", {})
-            logger.info(f"Executed prerequisite, placeholders: {placeholders}")
+            logger.info(f"Executed prerequisite, placeholders: {list(placeholders)}")
         except Exception as e:
             error_msg = f"Error executing prerequisite: {str(e)}"
             logger.error(error_msg)
@@ -458,9 +471,10 @@ async def run_agent_task(
         stop_button_comp: gr.Button(interactive=True),
         pause_resume_button_comp: gr.Button(value="⏸️ Pause", interactive=True),
         clear_button_comp: gr.Button(interactive=False),
-        chatbot_comp: gr.update(value=webui_manager.bu_chat_history),
+        chatbot_comp: gr.update(value=_chat_value(webui_manager)),
         history_file_comp: gr.update(value=None),
         gif_comp: gr.update(value=None),
+        video_comp: gr.update(value=None),
     }
 
     # --- Agent Settings ---
@@ -485,6 +499,9 @@ async def run_agent_task(
     max_input_tokens = get_setting("max_input_tokens", 128000)
     tool_calling_str = get_setting("tool_calling_method", "auto")
     tool_calling_method = tool_calling_str if tool_calling_str != "None" else None
+    dom_diff = get_setting("dom_diff", False)
+    speculative_prefetch = get_setting("speculative_prefetch", False)
+    stream_llm_output = get_setting("stream_llm_output", False)
     mcp_server_config_comp = webui_manager.id_to_component.get(
         "agent_settings.mcp_server_config"
     )
@@ -514,6 +531,7 @@ async def run_agent_task(
             planner_llm_base_url,
             planner_llm_api_key,
             planner_ollama_num_ctx if planner_llm_provider_name == "ollama" else None,
+            streaming=stream_llm_output,
         )
 
     # --- Browser Settings ---
@@ -531,6 +549,8 @@ async def run_agent_task(
     disable_security = get_browser_setting("disable_security", False)
     window_w = int(get_browser_setting("window_w", 1280))
     window_h = int(get_browser_setting("window_h", 1100))
+    live_view_fps = float(get_browser_setting("live_view_fps", 5))
+    live_view_width = int(get_browser_setting("live_view_width", 800))
     cdp_url = get_browser_setting("cdp_url") or None
     wss_url = get_browser_setting("wss_url") or None
     save_recording_path = get_browser_setting("save_recording_path") or None
@@ -539,6 +559,7 @@ async def run_agent_task(
         "save_agent_history_path", "./tmp/agent_history"
     )
     save_download_path = get_browser_setting("save_download_path", "./tmp/downloads")
+    recording_format = get_browser_setting("recording_format", "gif")
 
     stream_vw = 70
     stream_vh = int(70 * window_h // window_w)
@@ -559,6 +580,7 @@ async def run_agent_task(
         llm_base_url,
         llm_api_key,
         ollama_num_ctx if llm_provider_name == "ollama" else None,
+        streaming=stream_llm_output,
     )
 
     # Pass the webui_manager instance to the callback when wrapping it
@@ -585,9 +607,13 @@ async def run_agent_task(
         if webui_manager.bu_browser_context:
             logger.info("Detected existing browser context - validating state...")
             try:
-                # Test if context is still valid by taking a screenshot
-                await webui_manager.bu_browser_context.take_screenshot()
-                logger.info("Browser context is valid and responsive.")
+                # A context can die without firing an event, so probe it before trusting the flags;
+                # then rebuild from the last snapshot if it crashed or disconnected
+                await webui_manager.bu_browser_context.check_alive()
+                if await webui_manager.bu_browser_context.ensure_healthy():
+                    logger.info("Browser context was rebuilt after a crash.")
+                else:
+                    logger.info("Browser context is valid and responsive.")
             except Exception as e:
                 logger.warning(f"Browser context appears invalid: {e}. Closing and recreating...")
                 try:
@@ -669,23 +695,35 @@ async def run_agent_task(
         history_file = os.path.join(
             save_agent_history_path,
             webui_manager.bu_agent_task_id,
-            f"{webui_manager.bu_agent_task_id}.json",
+            f"{webui_manager.bu_agent_task_id}.jsonl",
         )
         gif_path = os.path.join(
             save_agent_history_path,
             webui_manager.bu_agent_task_id,
             f"{webui_manager.bu_agent_task_id}.gif",
-        )
+        ) if recording_format == "gif" else None
+        video_path = os.path.join(
+            save_agent_history_path,
+            webui_manager.bu_agent_task_id,
+            f"{webui_manager.bu_agent_task_id}.{recording_format}",
+        ) if recording_format != "gif" else None
 
         # Pass the webui_manager to callbacks when wrapping them
         async def step_callback_wrapper(
                 state: BrowserState, output: AgentOutput, step_num: int
         ):
             await _handle_new_step(webui_manager, state, output, step_num)
+            _notify_ui(webui_manager)
 
         def done_callback_wrapper(history: AgentHistoryList):
             _handle_done(webui_manager, history)
 
+        # Long placeholder values (presigned URLs) reach the LLM as short handles. Handles
+        # of earlier tasks are dropped; a value that is still in use gets the same handle back
+        url_registry = webui_manager.bu_controller.url_registry
+        url_registry.clear()
+        agent_placeholders = url_registry.register_placeholders(placeholders)
+
         if not webui_manager.bu_agent:
             logger.info(f"Initializing new agent for task: {task}")
             if not webui_manager.bu_browser or not webui_manager.bu_browser_context:
@@ -709,25 +747,48 @@ async def run_agent_task(
                 planner_llm=planner_llm,
                 use_vision_for_planner=planner_use_vision if planner_llm else False,
                 source="webui",
-                placeholders=placeholders,
+                placeholders=agent_placeholders,
+                dom_diff=dom_diff,
                 initial_actions=_create_sagemaker_initial_actions(),
             )
             webui_manager.bu_agent.state.agent_id = webui_manager.bu_agent_task_id
-            webui_manager.bu_agent.settings.generate_gif = gif_path
+            webui_manager.bu_agent.settings.generate_gif = gif_path or False
+            webui_manager.bu_agent.recording_path = video_path
         else:
             webui_manager.bu_agent.state.agent_id = webui_manager.bu_agent_task_id
             webui_manager.bu_agent.add_new_task(task)
-            webui_manager.bu_agent.settings.generate_gif = gif_path
+            webui_manager.bu_agent.placeholders = agent_placeholders
+            webui_manager.bu_agent.settings.generate_gif = gif_path or False
+            webui_manager.bu_agent.recording_path = video_path
             webui_manager.bu_agent.browser = webui_manager.bu_browser
             webui_manager.bu_agent.browser_context = webui_manager.bu_browser_context
             webui_manager.bu_agent.controller = webui_manager.bu_controller
+        webui_manager.bu_agent.speculative_prefetch = speculative_prefetch
+        # Steps are journaled as they finish, screenshots go next to the journal and
+        # all but the latest are read back from there instead of being kept in RAM
+        webui_manager.bu_agent.journal_path = history_file
+        webui_manager.bu_agent.max_screenshots_in_memory = 5
 
         # --- 6. Run Agent Task and Stream Updates ---
         agent_run_coro = webui_manager.bu_agent.run(max_steps=max_steps)
-        agent_task = asyncio.create_task(agent_run_coro)
+        output_sink = ThrottledSink(
+            notify=lambda: _notify_ui(webui_manager),
+            # Stopping the agent also abandons the LLM call it is streaming
+            should_continue=lambda: not (webui_manager.bu_agent and webui_manager.bu_agent.state.stopped),
+        )
+        webui_manager.bu_output_sink = output_sink
+        # Every streaming LLM call made by the run task reports to the sink
+        with stream_partial_output(output_sink):
+            agent_task = asyncio.create_task(agent_run_coro)
         webui_manager.bu_current_task = agent_task  # Store the task
+        control = webui_manager.bu_agent.control
+        agent_task.add_done_callback(lambda _: control.notify())
 
+        live_view = ScreencastStream(
+            webui_manager.bu_browser_context, fps=live_view_fps, max_width=live_view_width
+        )
         last_chat_len = len(webui_manager.bu_chat_history)
+        last_partial = None
         while not agent_task.done():
             is_paused = webui_manager.bu_agent.state.paused
             is_stopped = webui_manager.bu_agent.state.stopped
@@ -742,12 +803,12 @@ async def run_agent_task(
                 }
                 # Wait until pause is released or task is stopped/done
                 while is_paused and not agent_task.done():
-                    # Re-check agent state in loop
+                    await control.wait_for_change()
+                    # Re-check agent state after every control signal
                     is_paused = webui_manager.bu_agent.state.paused
                     is_stopped = webui_manager.bu_agent.state.stopped
                     if is_stopped:  # Stop signal received while paused
                         break
-                    await asyncio.sleep(0.2)
 
                 if (
                         agent_task.done() or is_stopped
@@ -795,7 +856,7 @@ async def run_agent_task(
                     ),
                     pause_resume_button_comp: gr.update(interactive=False),
                     stop_button_comp: gr.update(interactive=False),
-                    chatbot_comp: gr.update(value=webui_manager.bu_chat_history),
+                    chatbot_comp: gr.update(value=_chat_value(webui_manager)),
                 }
                 last_chat_len = len(webui_manager.bu_chat_history)
                 yield update_dict
@@ -804,7 +865,7 @@ async def run_agent_task(
                         webui_manager.bu_response_event is not None
                         and not agent_task.done()
                 ):
-                    await asyncio.sleep(0.2)
+                    await control.wait_for_change()
                 # Restore UI after response submitted or if task ended unexpectedly
                 if not agent_task.done():
                     yield {
@@ -820,25 +881,32 @@ async def run_agent_task(
                 else:
                     break  # Task finished while waiting for response
 
-            # Update Chatbot if new messages arrived via callbacks
+            # Update Chatbot if new messages arrived via callbacks. The history is
+            # append-only, so only the new tail is processed and sent to the browser
             if len(webui_manager.bu_chat_history) > last_chat_len:
                 update_dict[chatbot_comp] = gr.update(
-                    value=webui_manager.bu_chat_history
+                    value=_chat_value(webui_manager)
                 )
                 last_chat_len = len(webui_manager.bu_chat_history)
 
+            # Show the model output of the step in progress while it streams
+            if output_sink.latest is not last_partial:
+                last_partial = output_sink.latest
+                update_dict[live_output_comp] = gr.update(
+                    value=last_partial.to_markdown() if last_partial else ""
+                )
+
             # Update Browser View (always show in headless mode for cloud deployment)
             if webui_manager.bu_browser_context:
                 try:
-                    screenshot_b64 = (
-                        await webui_manager.bu_browser_context.take_screenshot()
-                    )
+                    # Frames are pushed by the screencast; only new ones come back
+                    screenshot_b64 = await live_view.poll()
                     if screenshot_b64:
                         html_content = f'<img src="data:image/jpeg;base64,{screenshot_b64}" style="width:{stream_vw}vw; height:{stream_vh}vh ; border:1px solid #ccc;">'
                         update_dict[browser_view_comp] = gr.update(
                             value=html_content, visible=True
                         )
-                    else:
+                    elif live_view.frames_sent == 0:
                         html_content = f"<h1 style='width:{stream_vw}vw; height:{stream_vh}vh'>Waiting for browser session...</h1>"
                         update_dict[browser_view_comp] = gr.update(
                             value=html_content, visible=True
@@ -859,7 +927,8 @@ async def run_agent_task(
             if update_dict:
                 yield update_dict
 
-            await asyncio.sleep(0.1)  # Polling interval
+            # Idle until a new frame, a step, or a pause/stop/help signal
+            await _wait_for_update(live_view, webui_manager, timeout=1.0)
 
         # --- 7. Task Finalization ---
         webui_manager.bu_agent.state.paused = False
@@ -874,15 +943,13 @@ async def run_agent_task(
                 agent_task.result()  # Raise the exception to be caught below
             logger.info("Agent task completed processing.")
 
-            logger.info(f"Explicitly saving agent history to: {history_file}")
-            webui_manager.bu_agent.save_history(history_file)
-
+            logger.info(f"Agent history journaled to: {history_file}")
             if os.path.exists(history_file):
                 final_update[history_file_comp] = gr.File(value=history_file)
 
-            if gif_path and os.path.exists(gif_path):
-                logger.info(f"GIF found at: {gif_path}")
-                final_update[gif_comp] = gr.Image(value=gif_path)
+            recording_output = webui_manager.bu_agent.recording_output
+            if recording_output and os.path.exists(recording_output):
+                final_update[video_comp] = gr.File(value=recording_output)
 
         except asyncio.CancelledError:
             logger.info("Agent task was cancelled.")
@@ -894,7 +961,7 @@ async def run_agent_task(
                 webui_manager.bu_chat_history.append(
                     {"role": "assistant", "content": "**Task Cancelled**."}
                 )
-            final_update[chatbot_comp] = gr.update(value=webui_manager.bu_chat_history)
+            final_update[chatbot_comp] = gr.update(value=_chat_value(webui_manager))
         except Exception as e:
             logger.error(f"Error during agent execution: {e}", exc_info=True)
             error_message = (
@@ -908,11 +975,13 @@ async def run_agent_task(
                 webui_manager.bu_chat_history.append(
                     {"role": "assistant", "content": error_message}
                 )
-            final_update[chatbot_comp] = gr.update(value=webui_manager.bu_chat_history)
+            final_update[chatbot_comp] = gr.update(value=_chat_value(webui_manager))
             gr.Error(f"Agent execution failed: {e}")
 
         finally:
             webui_manager.bu_current_task = None  # Clear the task reference
+            webui_manager.bu_output_sink = None
+            await live_view.stop()
 
             # Close browser/context if requested
             if should_close_browser_on_finish:
@@ -940,11 +1009,20 @@ async def run_agent_task(
                     ),
                     clear_button_comp: gr.update(interactive=True),
                     # Ensure final chat history is shown
-                    chatbot_comp: gr.update(value=webui_manager.bu_chat_history),
+                    chatbot_comp: gr.update(value=_chat_value(webui_manager)),
+                    live_output_comp: gr.update(value=""),
                 }
             )
             yield final_update
 
+        # The GIF is rendered in a worker process after the run, show it once ready
+        gif_task = webui_manager.bu_agent.gif_task if webui_manager.bu_agent else None
+        if gif_task:
+            await gif_task
+            if gif_path and os.path.exists(gif_path):
+                logger.info(f"GIF found at: {gif_path}")
+                yield {gif_comp: gr.Image(value=gif_path)}
+
     except Exception as e:
         # Catch errors during setup (before agent run starts)
         logger.error(f"Error setting up agent task: {e}", exc_info=True)
@@ -958,8 +1036,11 @@ async def run_agent_task(
             pause_resume_button_comp: gr.update(value="⏸️ Pause", interactive=False),
             clear_button_comp: gr.update(interactive=True),
             chatbot_comp: gr.update(
-                value=webui_manager.bu_chat_history
-                      + [{"role": "assistant", "content": f"**Setup Error:** {e}"}]
+                value=_chat_value(
+                    webui_manager,
+                    webui_manager.bu_chat_history
+                    + [{"role": "assistant", "content": f"**Setup Error:** {e}"}],
+                )
             ),
         }
 
@@ -1049,9 +1130,8 @@ async def handle_stop(webui_manager: WebuiManager):
     task = webui_manager.bu_current_task
 
     if agent and task and not task.done():
-        # Signal the agent to stop by setting its internal flag
-        agent.state.stopped = True
-        agent.state.paused = False  # Ensure not paused if stopped
+        # Signal the agent to stop; also releases it if paused
+        agent.stop()
         return {
             webui_manager.get_component_by_id(
                 "browser_use_agent.stop_button"
@@ -1122,8 +1202,7 @@ async def handle_clear(webui_manager: WebuiManager):
         logger.info("Stopping current task before clearing...")
         try:
             if webui_manager.bu_agent:
-                webui_manager.bu_agent.state.stopped = True
-                webui_manager.bu_agent.state.paused = False
+                webui_manager.bu_agent.stop()
             task.cancel()
             await asyncio.wait_for(task, timeout=3.0)  # Give more time for graceful shutdown
         except (asyncio.CancelledError, asyncio.TimeoutError):
@@ -1169,6 +1248,8 @@ async def handle_clear(webui_manager: WebuiManager):
 
     # Step 6: Reset all state variables
     webui_manager.bu_chat_history = []
+    # Screenshots shown in the cleared chat are not referenced anywhere else
+    await asyncio.to_thread(webui_manager.clear_chat_blobs)
     webui_manager.bu_response_event = None
     webui_manager.bu_user_help_response = None
     webui_manager.bu_agent_task_id = None
@@ -1180,6 +1261,9 @@ async def handle_clear(webui_manager: WebuiManager):
         webui_manager.get_component_by_id("browser_use_agent.chatbot"): gr.update(
             value=[]
         ),
+        webui_manager.get_component_by_id("browser_use_agent.live_output"): gr.update(
+            value=""
+        ),
         webui_manager.get_component_by_id("browser_use_agent.user_input"): gr.update(
             value="", placeholder="Enter your task here..."
         ),
@@ -1189,6 +1273,9 @@ async def handle_clear(webui_manager: WebuiManager):
         webui_manager.get_component_by_id("browser_use_agent.recording_gif"): gr.update(
             value=None
         ),
+        webui_manager.get_component_by_id("browser_use_agent.recording_video"): gr.update(
+            value=None
+        ),
         webui_manager.get_component_by_id("browser_use_agent.browser_view"): gr.update(
             value="<div style='width:70vw; height:50vh; display:flex; justify-content:center; align-items:center; border:1px solid #ccc; background-color:#f0f0f0; color:#666;'><p>✅ Browser Cleared - Ready for new task</p></div>"
         ),
@@ -1231,14 +1318,18 @@ def create_browser_use_agent_tab(webui_manager: WebuiManager):
         # HTML component for VNC popup JavaScript execution
         vnc_popup_html = gr.HTML(value="", visible=True)
         
+        # Full history is sent on (re)load, streamed runs only add the new messages
         chatbot = gr.Chatbot(
-            lambda: webui_manager.bu_chat_history,  # Load history dynamically
+            lambda: _chat_value(webui_manager),  # Load history dynamically
             elem_id="browser_use_chatbot",
             label="Agent Interaction",
             type="messages",
             height=600,
             show_copy_button=True,
         )
+        webui_manager.bu_chat_view = IncrementalChatHistory(chatbot)
+        # Filled only while a streaming LLM call of the current step is running
+        live_output = gr.Markdown(value="", elem_id="browser_use_live_output")
         user_input = gr.Textbox(
             label="Your Task or Response",
             placeholder="Enter your task here or provide assistance when asked.",
@@ -1314,13 +1405,14 @@ Step 9: Cleanup - Delete python3 Test Notebook""",
         )
         with gr.Column():
             gr.Markdown("### Task Outputs")
-            agent_history_file = gr.File(label="Agent History JSON", interactive=False)
+            agent_history_file = gr.File(label="Agent History (JSONL)", interactive=False)
             recording_gif = gr.Image(
                 label="Task Recording GIF",
                 format="gif",
                 interactive=False,
                 type="filepath",
             )
+            recording_video = gr.File(label="Task Recording Video", interactive=False)
 
     # --- Store Components in Manager ---
     tab_components.update(
@@ -1328,6 +1420,7 @@ Step 9: Cleanup - Delete python3 Test Notebook""",
             prerequisite=prerequisite,
             vnc_popup_html=vnc_popup_html,
             chatbot=chatbot,
+            live_output=live_output,
             user_input=user_input,
             clear_button=clear_button,
             run_button=run_button,
@@ -1335,6 +1428,7 @@ Step 9: Cleanup - Delete python3 Test Notebook""",
             pause_resume_button=pause_resume_button,
             agent_history_file=agent_history_file,
             recording_gif=recording_gif,
+            recording_video=recording_video,
             browser_view=browser_view,
         )
     )
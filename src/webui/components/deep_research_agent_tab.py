@@ -9,14 +9,15 @@ import os
 from typing import Any, Dict, AsyncGenerator, Optional, Tuple, Union
 import asyncio
 import json
-from src.agent.deep_research.deep_research_agent import DeepResearchAgent
 from src.utils import llm_provider
+from src.utils.llm_stream import ThrottledSink, stream_partial_output
 
 logger = logging.getLogger(__name__)
 
 
 async def _initialize_llm(provider: Optional[str], model_name: Optional[str], temperature: float,
-                          base_url: Optional[str], api_key: Optional[str], num_ctx: Optional[int] = None):
+                          base_url: Optional[str], api_key: Optional[str], num_ctx: Optional[int] = None,
+                          streaming: bool = False, response_cache: bool = False):
     """Initializes the LLM based on settings. Returns None if provider/model is missing."""
     if not provider or not model_name:
         logger.info("LLM Provider or Model Name not specified, LLM will be None.")
@@ -30,7 +31,9 @@ async def _initialize_llm(provider: Optional[str], model_name: Optional[str], te
             temperature=temperature,
             base_url=base_url or None,
             api_key=api_key or None,
-            num_ctx=num_ctx if provider == "ollama" else None
+            num_ctx=num_ctx if provider == "ollama" else None,
+            streaming=streaming,
+            response_cache=response_cache
         )
         return llm
     except Exception as e:
@@ -62,18 +65,21 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
     research_task_comp = webui_manager.get_component_by_id("deep_research_agent.research_task")
     resume_task_id_comp = webui_manager.get_component_by_id("deep_research_agent.resume_task_id")
     parallel_num_comp = webui_manager.get_component_by_id("deep_research_agent.parallel_num")
+    response_cache_comp = webui_manager.get_component_by_id("deep_research_agent.response_cache")
     save_dir_comp = webui_manager.get_component_by_id(
         "deep_research_agent.max_query")  # Note: component ID seems misnamed in original code
     start_button_comp = webui_manager.get_component_by_id("deep_research_agent.start_button")
     stop_button_comp = webui_manager.get_component_by_id("deep_research_agent.stop_button")
     markdown_display_comp = webui_manager.get_component_by_id("deep_research_agent.markdown_display")
     markdown_download_comp = webui_manager.get_component_by_id("deep_research_agent.markdown_download")
+    live_output_comp = webui_manager.get_component_by_id("deep_research_agent.live_output")
     mcp_server_config_comp = webui_manager.get_component_by_id("deep_research_agent.mcp_server_config")
 
     # --- 1. Get Task and Settings ---
     task_topic = components.get(research_task_comp, "").strip()
     task_id_to_resume = components.get(resume_task_id_comp, "").strip() or None
     max_parallel_agents = int(components.get(parallel_num_comp, 1))
+    response_cache = bool(components.get(response_cache_comp, False))
     base_save_dir = components.get(save_dir_comp, "./tmp/deep_research").strip()
     safe_root_dir = "./tmp/deep_research"
     normalized_base_save_dir = os.path.abspath(os.path.normpath(base_save_dir))
@@ -126,10 +132,13 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
         llm_base_url = get_setting("agent_settings", "llm_base_url")
         llm_api_key = get_setting("agent_settings", "llm_api_key")
         ollama_num_ctx = get_setting("agent_settings", "ollama_num_ctx")
+        stream_llm_output = get_setting("agent_settings", "stream_llm_output", False)
 
         llm = await _initialize_llm(
             llm_provider_name, llm_model_name, llm_temperature, llm_base_url, llm_api_key,
-            ollama_num_ctx if llm_provider_name == "ollama" else None
+            ollama_num_ctx if llm_provider_name == "ollama" else None,
+            streaming=stream_llm_output,
+            response_cache=response_cache
         )
         if not llm:
             raise ValueError("LLM Initialization failed. Please check Agent Settings.")
@@ -148,12 +157,20 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
 
         # --- 4. Initialize or Get Agent ---
         if not webui_manager.dr_agent:
+            # Imported here so LangGraph only loads once a research task is started
+            from src.agent.deep_research.deep_research_agent import DeepResearchAgent
+
             webui_manager.dr_agent = DeepResearchAgent(
                 llm=llm,
                 browser_config=browser_config_dict,
                 mcp_server_config=mcp_config
             )
             logger.info("DeepResearchAgent initialized.")
+        else:
+            # Runs read these per run, so settings changed since the first run (streaming,
+            # response cache, browser) take effect
+            webui_manager.dr_agent.llm = llm
+            webui_manager.dr_agent.browser_config = browser_config_dict
 
         # --- 5. Start Agent Run ---
         agent_run_coro = webui_manager.dr_agent.run(
@@ -162,7 +179,16 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
             save_dir=base_save_dir,
             max_parallel_browsers=max_parallel_agents
         )
-        agent_task = asyncio.create_task(agent_run_coro)
+        output_event = asyncio.Event()
+        output_sink = ThrottledSink(
+            notify=output_event.set,
+            # Stopping the research also abandons the LLM call it is streaming
+            should_continue=lambda: not getattr(webui_manager.dr_agent, 'stopped', False),
+        )
+        webui_manager.dr_output_sink = output_sink
+        # Streaming calls of the planner, the synthesis and the browser agents all report to the sink
+        with stream_partial_output(output_sink):
+            agent_task = asyncio.create_task(agent_run_coro)
         webui_manager.dr_current_task = agent_task
 
         # Wait briefly for the agent to start and potentially create the task ID/folder
@@ -194,6 +220,7 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
             logger.warning("Cannot monitor plan file: Task ID unknown.")
             plan_file_path = None
         last_plan_content = None
+        last_partial = None
         while not agent_task.done():
             update_dict = {}
             update_dict[resume_task_id_comp] = gr.update(value=running_task_id)
@@ -222,11 +249,21 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
                     # Avoid continuous logging for the same error
                     await asyncio.sleep(2.0)
 
+            # Show the latest streaming model output
+            if output_sink.latest is not last_partial:
+                last_partial = output_sink.latest
+                update_dict[live_output_comp] = gr.update(value=last_partial.to_markdown() if last_partial else "")
+
             # Yield updates if any
             if update_dict:
                 yield update_dict
 
-            await asyncio.sleep(1.0)  # Check file changes every second
+            # Check file changes every second, sooner when new model output arrives
+            try:
+                await asyncio.wait_for(output_event.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+            output_event.clear()
 
         # --- 7. Task Finalization ---
         logger.info("Agent task processing finished. Awaiting final result...")
@@ -276,6 +313,7 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
         # --- 8. Final UI Reset ---
         webui_manager.dr_current_task = None  # Clear task reference
         webui_manager.dr_task_id = None  # Clear running task ID
+        webui_manager.dr_output_sink = None
 
         yield {
             start_button_comp: gr.update(value="▶️ Run", interactive=True),
@@ -284,6 +322,7 @@ async def run_deep_research(webui_manager: WebuiManager, components: Dict[Compon
             resume_task_id_comp: gr.update(value="", interactive=True),
             parallel_num_comp: gr.update(interactive=True),
             save_dir_comp: gr.update(interactive=True),
+            live_output_comp: gr.update(value=""),
             # Keep download button enabled if file exists
             markdown_download_comp: gr.update() if report_file_path and os.path.exists(report_file_path) else gr.update(
                 interactive=False)
@@ -397,10 +436,15 @@ def create_deep_research_agent_tab(webui_manager: WebuiManager):
                                      interactive=True)
             max_query = gr.Textbox(label="Research Save Dir", value="./tmp/deep_research",
                                    interactive=True)
+            response_cache = gr.Checkbox(label="Reuse LLM Responses", value=False,
+                                         info="Answer repeated planning and synthesis calls from a local cache",
+                                         interactive=True)
     with gr.Row():
         stop_button = gr.Button("⏹️ Stop", variant="stop", scale=2)
         start_button = gr.Button("▶️ Run", variant="primary", scale=3)
     with gr.Group():
+        # Filled only while a streaming LLM call is running
+        live_output = gr.Markdown(value="")
         markdown_display = gr.Markdown(label="Research Report")
         markdown_download = gr.File(label="Download Research Report", interactive=False)
     tab_components.update(
@@ -408,9 +452,11 @@ def create_deep_research_agent_tab(webui_manager: WebuiManager):
             research_task=research_task,
             parallel_num=parallel_num,
             max_query=max_query,
+            response_cache=response_cache,
             start_button=start_button,
             stop_button=stop_button,
             markdown_display=markdown_display,
+            live_output=live_output,
             markdown_download=markdown_download,
             resume_task_id=resume_task_id,
             mcp_json_file=mcp_json_file,
@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from typing import Any, List, Tuple
+
+import gradio as gr
+from gradio.components.chatbot import Message
+
+
+class IncrementalChatHistory:
+    """
+    Pre-processes an append-only chat history for a gr.Chatbot.
+
+    Streaming handlers re-post the whole history on every yield, and the
+    Chatbot deep-copies and re-processes every message dict each time. `render`
+    turns each dict into a processed Message once (memoized by identity) and
+    the Chatbot passes Message objects through untouched, so an update only
+    processes what was appended since the previous one. Gradio already ships
+    generator updates to the browser as diffs, so the payload on the wire is
+    just the new messages.
+
+    Messages must not be mutated in place after they are appended; replacing the
+    `content` value is detected and re-processed.
+    """
+
+    max_cached_messages = 4096
+
+    def __init__(self, chatbot: gr.Chatbot):
+        self.chatbot = chatbot
+        self._processed: OrderedDict[int, Tuple[dict, Any, Message]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, history: List[Any]) -> List[Any]:
+        """The history with every message dict replaced by its processed Message."""
+        return [self._render_message(message) if isinstance(message, dict) else message for message in history]
+
+    def _render_message(self, message: dict) -> Message:
+        key = id(message)
+        with self._lock:
+            cached = self._processed.get(key)
+            if cached and cached[0] is message and cached[1] is message.get("content"):
+                self._processed.move_to_end(key)
+                return cached[2]
+
+        processed = self.chatbot.postprocess([message]).root[0]
+        with self._lock:
+            # Holding a reference to the dict keeps its id from being reused
+            self._processed[key] = (message, message.get("content"), processed)
+            while len(self._processed) > self.max_cached_messages:
+                self._processed.popitem(last=False)
+        return processed
@@ -55,6 +55,7 @@ def create_ui(theme_name="Ocean"):
     """
 
     ui_manager = WebuiManager()
+    gr.set_static_paths(paths=[ui_manager.blob_store.root_dir])
 
     with gr.Blocks(
             title="Browser Use WebUI", theme=theme_map[theme_name], css=css, js=js_func,
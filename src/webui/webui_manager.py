@@ -1,4 +1,5 @@
 import json
+import logging
 from collections.abc import Generator
 from typing import TYPE_CHECKING
 import os
@@ -16,17 +17,33 @@ from browser_use.agent.service import Agent
 from src.browser.custom_browser import CustomBrowser
 from src.browser.custom_context import CustomBrowserContext
 from src.controller.custom_controller import CustomController
-from src.agent.deep_research.deep_research_agent import DeepResearchAgent
+from src.utils.blob_store import BlobStore
+from src.utils.llm_stream import ThrottledSink
+from src.webui.incremental_chatbot import IncrementalChatHistory
+
+logger = logging.getLogger(__name__)
+
+# Bounds of the WebUI screenshot store, applied at startup and when the chat is cleared
+BLOB_MAX_BYTES = int(float(os.getenv("WEBUI_BLOB_MAX_MB", 1024)) * 1024 * 1024)
+BLOB_MAX_AGE_SECONDS = float(os.getenv("WEBUI_BLOB_MAX_AGE_DAYS", 7)) * 24 * 3600
+
+if TYPE_CHECKING:
+    # Pulls in LangGraph and langchain_community, only the deep research tab needs it at runtime
+    from src.agent.deep_research.deep_research_agent import DeepResearchAgent
 
 
 class WebuiManager:
-    def __init__(self, settings_save_dir: str = "./tmp/webui_settings"):
+    def __init__(self, settings_save_dir: str = "./tmp/webui_settings", blob_save_dir: str = "./tmp/webui_blobs"):
         self.id_to_component: dict[str, Component] = {}
         self.component_to_id: dict[Component, str] = {}
 
         self.settings_save_dir = settings_save_dir
         os.makedirs(self.settings_save_dir, exist_ok=True)
 
+        # Screenshots live here and are served by URL instead of being inlined into chat
+        self.blob_store = BlobStore(blob_save_dir)
+        self.prune_blobs()
+
     def init_browser_use_agent(self) -> None:
         """
         init browser use agent
@@ -36,19 +53,37 @@ class WebuiManager:
         self.bu_browser_context: Optional[CustomBrowserContext] = None
         self.bu_controller: Optional[CustomController] = None
         self.bu_chat_history: List[Dict[str, Optional[str]]] = []
+        # Blob keys referenced by bu_chat_history, deleted when the chat is cleared
+        self.bu_chat_blob_keys: set[str] = set()
+        # Set by the tab once its Chatbot exists, turns bu_chat_history into the Chatbot value
+        self.bu_chat_view: Optional[IncrementalChatHistory] = None
         self.bu_response_event: Optional[asyncio.Event] = None
         self.bu_user_help_response: Optional[str] = None
         self.bu_current_task: Optional[asyncio.Task] = None
         self.bu_agent_task_id: Optional[str] = None
+        self.bu_output_sink: Optional[ThrottledSink] = None
 
     def init_deep_research_agent(self) -> None:
         """
         init deep research agent
         """
-        self.dr_agent: Optional[DeepResearchAgent] = None
+        self.dr_agent: Optional["DeepResearchAgent"] = None
         self.dr_current_task = None
         self.dr_agent_task_id: Optional[str] = None
         self.dr_save_dir: Optional[str] = None
+        self.dr_output_sink: Optional[ThrottledSink] = None
+
+    def prune_blobs(self) -> None:
+        try:
+            self.blob_store.prune(max_bytes=BLOB_MAX_BYTES, max_age_seconds=BLOB_MAX_AGE_SECONDS)
+        except Exception as e:
+            logger.warning(f"Failed to prune {self.blob_store.root_dir}: {e}")
+
+    def clear_chat_blobs(self) -> None:
+        """Delete the screenshots of the current chat, then apply the store bounds."""
+        keys, self.bu_chat_blob_keys = self.bu_chat_blob_keys, set()
+        self.blob_store.delete(keys)
+        self.prune_blobs()
 
     def add_components(self, tab_name: str, components_dict: dict[str, "Component"]) -> None:
         """
@@ -105,7 +140,7 @@ class WebuiManager:
         for comp_id, comp_val in ui_settings.items():
             if comp_id in self.id_to_component:
                 comp = self.id_to_component[comp_id]
-                if comp.__class__.__name__ == "Chatbot":
+                if isinstance(comp, gr.Chatbot):
                     update_components[comp] = comp.__class__(value=comp_val, type="messages")
                 else:
                     update_components[comp] = comp.__class__(value=comp_val)
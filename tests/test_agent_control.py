@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+
+def test_pause_blocks_until_resume():
+    from src.agent.browser_use.agent_control import AgentControl
+
+    async def run():
+        control = AgentControl()
+        state = SimpleNamespace(paused=True, stopped=False)
+        control.pause()
+        waiter = asyncio.create_task(control.wait_while_paused(state))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+
+        state.paused = False
+        control.resume()
+        await asyncio.wait_for(waiter, timeout=0.1)
+
+    asyncio.run(run())
+
+
+def test_stop_releases_paused_agent():
+    from src.agent.browser_use.agent_control import AgentControl
+
+    async def run():
+        control = AgentControl()
+        state = SimpleNamespace(paused=True, stopped=False)
+        control.pause()
+        waiter = asyncio.create_task(control.wait_while_paused(state))
+        await asyncio.sleep(0)
+
+        state.stopped = True
+        control.stop()
+        await asyncio.wait_for(waiter, timeout=0.1)
+
+    asyncio.run(run())
+
+
+def test_change_signals_are_not_lost():
+    from src.agent.browser_use.agent_control import AgentControl
+
+    async def run():
+        control = AgentControl()
+        # Raised while nobody is waiting
+        control.notify()
+        assert await control.wait_for_change(timeout=0.1)
+        assert not await control.wait_for_change(timeout=0.01)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_pause_blocks_until_resume()
+    test_stop_releases_paused_agent()
+    test_change_signals_are_not_lost()
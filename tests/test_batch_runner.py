@@ -0,0 +1,84 @@
+import asyncio
+import json
+import subprocess
+import sys
+
+sys.path.append(".")
+
+from browser_use.agent.views import AgentHistoryList
+
+from tests.test_scheduler import _scheduler
+
+
+def _write_tasks(path, ids):
+    with open(path, "w") as f:
+        for request_id in ids:
+            f.write(json.dumps({"request_id": request_id, "title": f"Task {request_id}", "body": "Open example.com"}) + "\n")
+
+
+def test_results_stream_to_jsonl_and_rerun_resumes(tmp_path):
+    from src.agent.batch_runner import load_tasks, run_batch
+
+    runs = []
+
+    async def runner(scheduler, job, browser, context):
+        runs.append(job.job_id)
+        if job.job_id == "t2":
+            raise RuntimeError("page crashed")
+        return AgentHistoryList(history=[])
+
+    tasks_path, output_path = tmp_path / "tasks.jsonl", tmp_path / "out" / "results.jsonl"
+    _write_tasks(tasks_path, ["t1", "t2", "t3"])
+    tasks = load_tasks(str(tasks_path))
+    assert tasks[0]["task"] == "Task t1\n\nOpen example.com"
+
+    async def batch(**kwargs):
+        scheduler, _ = _scheduler(runner)
+        try:
+            return await run_batch(scheduler, tasks, str(output_path), **kwargs)
+        finally:
+            await scheduler.shutdown()
+
+    summary = asyncio.run(batch())
+    assert summary == {"skipped": 0, "done": 2, "failed": 1, "cancelled": 0}
+    records = {r["request_id"]: r for r in map(json.loads, output_path.read_text().splitlines())}
+    assert records["t2"]["status"] == "failed" and records["t2"]["error"] == "page crashed"
+    assert records["t1"]["steps"] == 0 and records["t1"]["is_done"] is False
+
+    # Simulate a crash mid-write, then resume: only the failed task runs again
+    with open(output_path, "a") as f:
+        f.write('{"request_id": "t9", "sta')
+    runs.clear()
+    summary = asyncio.run(batch(retry_failed=True))
+    assert runs == ["t2"] and summary["skipped"] == 2
+    lines = output_path.read_text().splitlines()
+    assert json.loads(lines[-1])["request_id"] == "t2"
+
+
+def test_task_ids_are_stable_and_unique(tmp_path):
+    import pytest
+
+    from src.agent.batch_runner import load_tasks
+
+    tasks_path = tmp_path / "tasks.jsonl"
+    tasks_path.write_text(json.dumps({"task": "Open example.com"}) + "\n")
+    request_id = load_tasks(str(tasks_path))[0]["request_id"]
+    assert request_id.startswith("task-")
+
+    # Adding a line above does not change the id of an existing task
+    tasks_path.write_text(json.dumps({"task": "Open example.org"}) + "\n" + json.dumps({"task": "Open example.com"}) + "\n")
+    assert load_tasks(str(tasks_path))[1]["request_id"] == request_id
+
+    _write_tasks(tasks_path, ["t1", "t2", "t1"])
+    with pytest.raises(ValueError, match="duplicate request ids: t1"):
+        load_tasks(str(tasks_path))
+
+
+def test_batch_runner_does_not_import_gradio():
+    code = "import sys; sys.path.append('.'); import batch_runner; print('gradio' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "False"
+
+
+if __name__ == "__main__":
+    test_batch_runner_does_not_import_gradio()
@@ -0,0 +1,79 @@
+import base64
+import io
+import sys
+
+sys.path.append(".")
+
+from PIL import Image
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_blob_store_deduplicates(tmp_path):
+    from src.utils.blob_store import BlobStore
+
+    store = BlobStore(str(tmp_path))
+    first = store.put(b"screenshot")
+    second = store.put(b"screenshot")
+    assert first == second
+    assert store.get(first) == b"screenshot"
+    assert store.get("missing.jpg") is None
+
+
+def test_store_screenshot_writes_thumbnail(tmp_path):
+    from src.utils.blob_store import BlobStore
+    from src.webui.components.browser_use_agent_tab import _store_screenshot
+
+    store = BlobStore(str(tmp_path))
+    full_key, thumb_key = _store_screenshot(store, base64.b64encode(_png(1280, 1100)).decode())
+    assert full_key.endswith(".png")
+    assert thumb_key.endswith(".jpg")
+    assert Image.open(store.path(thumb_key)).width == 400
+    assert Image.open(store.path(full_key)).width == 1280
+
+
+def test_prune_by_age_then_size(tmp_path):
+    import os
+    import time
+
+    from src.utils.blob_store import BlobStore
+
+    store = BlobStore(str(tmp_path))
+    keys = [store.put(bytes([i]) * 100) for i in range(4)]
+    now = time.time()
+    for age, key in zip((1000, 30, 20, 10), keys):
+        os.utime(store.path(key), (now - age, now - age))
+
+    assert store.prune(max_age_seconds=500) == 1
+    assert not store.exists(keys[0])
+    assert store.prune(max_bytes=200) == 1
+    assert [store.exists(key) for key in keys] == [False, False, True, True]
+
+
+def test_clearing_the_chat_deletes_its_screenshots(tmp_path):
+    from src.webui.webui_manager import WebuiManager
+
+    manager = WebuiManager(settings_save_dir=str(tmp_path / "settings"), blob_save_dir=str(tmp_path / "blobs"))
+    manager.init_browser_use_agent()
+    shown = manager.blob_store.put(b"step screenshot")
+    other = manager.blob_store.put(b"unrelated")
+    manager.bu_chat_blob_keys.add(shown)
+
+    manager.clear_chat_blobs()
+    assert not manager.blob_store.exists(shown)
+    assert manager.blob_store.exists(other)
+    assert manager.bu_chat_blob_keys == set()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pathlib
+
+    test_blob_store_deduplicates(pathlib.Path(tempfile.mkdtemp()))
+    test_store_screenshot_writes_thumbnail(pathlib.Path(tempfile.mkdtemp()))
+    test_prune_by_age_then_size(pathlib.Path(tempfile.mkdtemp()))
+    test_clearing_the_chat_deletes_its_screenshots(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,161 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+import pytest
+from browser_use.browser.context import BrowserContext, BrowserContextConfig, BrowserSession
+from browser_use.browser.views import BrowserError
+
+from src.browser.custom_context import CustomBrowserContext
+
+
+class _FakePage:
+    def __init__(self, context, url="about:blank"):
+        self.context = context
+        self.url = url
+        self.handlers = {}
+        self.fronted = False
+        self.responsive = True
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return False
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def bring_to_front(self):
+        self.fronted = True
+
+    async def evaluate(self, expression):
+        if not self.responsive:
+            await asyncio.sleep(10)
+        return 1
+
+
+class _FakeContext:
+    def __init__(self):
+        self.handlers = {}
+        self.pages = [_FakePage(self)]
+        self.cookie_jar = []
+        self.closed = False
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def new_page(self):
+        page = _FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def add_cookies(self, cookies):
+        self.cookie_jar.extend(cookies)
+
+    async def cookies(self):
+        return list(self.cookie_jar)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def context(monkeypatch):
+    contexts = []
+
+    async def fake_initialize_session(self):
+        contexts.append(_FakeContext())
+        self.session = BrowserSession(context=contexts[-1])
+        self.agent_current_page = contexts[-1].pages[0]
+        return self.session
+
+    monkeypatch.setattr(BrowserContext, "_initialize_session", fake_initialize_session)
+    browser = SimpleNamespace(config=None, disconnected=False)
+    ctx = CustomBrowserContext(browser=browser, config=BrowserContextConfig())
+    ctx.contexts = contexts
+    return ctx
+
+
+def test_context_is_rebuilt_from_snapshot_after_close(context):
+    async def _run():
+        session = await context._initialize_session()
+        first = session.context
+        first.pages[0].url = "https://a.example"
+        second_tab = await first.new_page()
+        second_tab.url = "https://b.example"
+        first.cookie_jar.append({"name": "sid", "value": "1", "url": "https://a.example"})
+        context.agent_current_page = second_tab
+        await context.take_snapshot()
+
+        first.handlers["close"](first)
+        assert not context.is_healthy()
+        assert await context.ensure_healthy() is True
+        return first
+
+    first = asyncio.run(_run())
+    rebuilt = context.session.context
+    assert first.closed and rebuilt is not first
+    assert [page.url for page in rebuilt.pages] == ["https://a.example", "https://b.example"]
+    assert context.agent_current_page is rebuilt.pages[1] and rebuilt.pages[1].fronted
+    assert rebuilt.cookie_jar == [{"name": "sid", "value": "1", "url": "https://a.example"}]
+    assert context.is_healthy()
+
+
+def test_page_crash_triggers_recovery_until_limit(context):
+    context.max_recoveries = 2
+
+    async def _run():
+        await context._initialize_session()
+        for _ in range(context.max_recoveries):
+            page = context.session.context.pages[0]
+            page.handlers["crash"](page)
+            assert await context.ensure_healthy() is True
+        page = context.session.context.pages[0]
+        page.handlers["crash"](page)
+        await context.ensure_healthy()
+
+    with pytest.raises(BrowserError):
+        asyncio.run(_run())
+    assert context.recovery_count == 2
+
+
+def test_disconnected_browser_is_reconnected(context):
+    reconnects = []
+
+    async def reconnect():
+        reconnects.append(1)
+        context.browser.disconnected = False
+
+    context.browser.reconnect = reconnect
+
+    async def _run():
+        await context._initialize_session()
+        context.browser.disconnected = True
+        return await context.ensure_healthy()
+
+    assert asyncio.run(_run()) is True
+    assert reconnects == [1]
+
+
+def test_silently_dead_context_is_detected_and_rebuilt(context):
+    async def _run():
+        await context._initialize_session()
+        assert await context.check_alive(timeout=0.1) is True
+        dead = context.session.context
+        # No crash or close event fires, only the page stops answering
+        dead.pages[0].responsive = False
+        assert context.is_healthy()
+        assert await context.check_alive(timeout=0.1) is False
+        assert await context.ensure_healthy() is True
+        return dead
+
+    dead = asyncio.run(_run())
+    assert dead.closed and context.session.context is not dead
+    assert context.is_healthy()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import sys
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+from browser_use.agent.service import Agent
+from browser_use.agent.views import AgentOutput
+from browser_use.controller.service import Controller
+
+
+def _agent(placeholders=None):
+    from src.agent.custom_agent import CustomAgent, RecoveryMetrics
+
+    # Skip Agent.__init__, only the attributes get_next_action touches are needed
+    agent = CustomAgent.__new__(CustomAgent)
+    agent.placeholders = placeholders or {}
+    agent.recovery_metrics = RecoveryMetrics()
+    agent._last_raw_content = None
+    agent.AgentOutput = AgentOutput.type_with_custom_actions(Controller().registry.create_action_model())
+    agent.settings = SimpleNamespace(max_actions_per_step=10)
+    return agent
+
+
+RESPONSE = {
+    "current_state": {"evaluation_previous_goal": "Unknown", "memory": "", "next_goal": "Open"},
+    "action": [{"go_to_url": {"url": "{{URL}}"}}],
+}
+
+
+def test_unparsable_raw_response_is_repaired_without_recall(monkeypatch):
+    calls = []
+
+    async def fake_get_next_action(self, input_messages):
+        calls.append(1)
+        # Trailing comma and missing closing brace, as models sometimes produce
+        self._remove_think_tags("<think>hmm</think>" + json.dumps(RESPONSE)[:-1] + ",")
+        raise ValueError("Could not parse response.")
+
+    monkeypatch.setattr(Agent, "get_next_action", fake_get_next_action)
+    agent = _agent({"{{URL}}": "https://example.com"})
+
+    output = asyncio.run(agent.get_next_action([]))
+    assert len(calls) == 1
+    assert output.action[0].go_to_url.url == "https://example.com"
+    assert agent.recovery_metrics.parse_recoveries == 1
+    assert agent.recovery_metrics.llm_recalls_avoided == 1
+
+
+def test_placeholder_failure_keeps_first_response(monkeypatch):
+    calls = []
+
+    async def fake_get_next_action(self, input_messages):
+        calls.append(1)
+        return self.AgentOutput.model_validate(RESPONSE)
+
+    def broken_apply(agent_output):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(Agent, "get_next_action", fake_get_next_action)
+    agent = _agent({"{{URL}}": "https://example.com"})
+    monkeypatch.setattr("src.agent.custom_agent.PlaceholderSubstituter.apply", lambda self, output: broken_apply(output))
+
+    output = asyncio.run(agent.get_next_action([]))
+    assert len(calls) == 1
+    assert output.action[0].go_to_url.url == "{{URL}}"
+    assert agent.recovery_metrics.placeholder_failures == 1
+    assert agent.recovery_metrics.llm_recalls_avoided == 1
+
+
+def test_llm_errors_are_not_counted_as_avoided_recalls(monkeypatch):
+    async def fake_get_next_action(self, input_messages):
+        raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(Agent, "get_next_action", fake_get_next_action)
+    agent = _agent()
+    try:
+        asyncio.run(agent.get_next_action([]))
+        assert False, "expected the error to propagate"
+    except RuntimeError:
+        pass
+    assert agent.recovery_metrics.llm_errors == 1
+    assert agent.recovery_metrics.llm_recalls_avoided == 0
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
@@ -0,0 +1,80 @@
+import sys
+
+sys.path.append(".")
+
+from browser_use.agent.message_manager.views import MessageManagerState
+from browser_use.browser.views import BrowserState, TabInfo
+from langchain_core.messages import SystemMessage
+
+ELEMENTS = "\n".join(f"[{i}]<button>Item {i} />" for i in range(40))
+
+
+def _state(elements, url="https://example.com/list"):
+    from src.agent.dom_diff import _StaticElementTree
+
+    return BrowserState(
+        element_tree=_StaticElementTree(elements),
+        selector_map={},
+        url=url,
+        title="List",
+        tabs=[TabInfo(page_id=0, url=url, title="List")],
+    )
+
+
+def _manager():
+    from src.agent.dom_diff import DiffingMessageManager
+
+    # MessageManager's default state is a shared instance, give each test its own
+    return DiffingMessageManager(
+        task="Open item 3", system_message=SystemMessage(content="system"), state=MessageManagerState()
+    )
+
+
+def test_parse_and_diff_elements():
+    from src.agent.dom_diff import diff_elements, parse_elements
+
+    base = parse_elements("[1]<a>Home />\n\t*[2]*<button>Buy />\nsome text\n[3]<input />")
+    assert base == {1: "[1]<a>Home />", 2: "[2]<button>Buy />\nsome text", 3: "[3]<input />"}
+    current = parse_elements("[1]<a>Home />\n[2]<button>Sold out />\n[4]<a>Next />")
+    assert diff_elements(base, current) == "~ [2]<button>Sold out />\n- [3]\n+ [4]<a>Next />"
+
+
+def test_second_state_is_a_diff_against_the_kept_reference():
+    manager = _manager()
+
+    manager.add_state_message(_state(ELEMENTS), use_vision=False)
+    assert "[39]<button>Item 39 />" in manager.get_messages()[-1].content
+    manager._remove_last_state_message()
+    # The full state stays as a reference for the tab
+    reference = manager.get_messages()[-1].content
+    assert reference.startswith("[Reference state of tab 0")
+    assert "[39]<button>Item 39 />" in reference
+
+    changed = ELEMENTS.replace("Item 5 />", "Item 5 (selected) />")
+    manager.add_state_message(_state(changed), use_vision=False)
+    state_message = manager.get_messages()[-1].content
+    assert "~ [5]<button>Item 5 (selected) />" in state_message
+    assert "Item 39" not in state_message
+    manager._remove_last_state_message()
+    assert manager.get_messages()[-1].content == reference
+    assert (manager.full_states, manager.diff_states) == (1, 1)
+
+
+def test_navigation_sends_full_state_and_replaces_reference():
+    manager = _manager()
+    manager.add_state_message(_state(ELEMENTS), use_vision=False)
+    manager._remove_last_state_message()
+
+    manager.add_state_message(_state(ELEMENTS, url="https://example.com/item/3"), use_vision=False)
+    assert "[39]<button>Item 39 />" in manager.get_messages()[-1].content
+    manager._remove_last_state_message()
+
+    references = [m for m in manager.get_messages() if str(m.content).startswith("[Reference state")]
+    assert len(references) == 1 and "item/3" in references[0].content
+    assert manager.state.history.current_tokens == sum(m.metadata.tokens for m in manager.state.history.messages)
+
+
+if __name__ == "__main__":
+    test_parse_and_diff_elements()
+    test_second_state_is_a_diff_against_the_kept_reference()
+    test_navigation_sends_full_state_and_replaces_reference()
@@ -0,0 +1,57 @@
+import base64
+import sys
+
+sys.path.append(".")
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentOutput
+from browser_use.browser.views import BrowserStateHistory
+from browser_use.controller.service import Controller
+
+SCREENSHOT = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"0" * 64).decode()
+
+
+def _output_model():
+    return AgentOutput.type_with_custom_actions(Controller().registry.create_action_model())
+
+
+def _step(output_model, url, screenshot):
+    model_output = output_model.model_validate({
+        "current_state": {"evaluation_previous_goal": "Unknown", "memory": "", "next_goal": f"Open {url}"},
+        "action": [{"go_to_url": {"url": url}}],
+    })
+    return AgentHistory(
+        model_output=model_output,
+        result=[ActionResult(extracted_content=f"Opened {url}")],
+        state=BrowserStateHistory(url=url, title="", tabs=[], interacted_element=[None], screenshot=screenshot),
+        metadata=None,
+    )
+
+
+def test_journal_round_trip(tmp_path):
+    from src.utils.history_journal import HistoryJournal, HistoryJournalReader
+
+    output_model = _output_model()
+    journal = HistoryJournal(str(tmp_path / "task.jsonl"))
+    journal.append(_step(output_model, "https://example.com", SCREENSHOT))
+    journal.append(_step(output_model, "https://example.org", None))
+    with open(journal.path, "a") as f:
+        f.write('{"model_output": ')  # torn write from a crash
+
+    lines = open(journal.path).read().splitlines()
+    assert SCREENSHOT not in lines[0]
+
+    history = HistoryJournalReader(journal.path, output_model).load()
+    assert history.urls() == ["https://example.com", "https://example.org"]
+    assert history.history[0].state.screenshot == SCREENSHOT
+    assert history.history[1].state.screenshot is None
+    assert history.model_actions()[0]["go_to_url"]["url"] == "https://example.com"
+
+    lazy = HistoryJournalReader(journal.path, output_model).load(load_screenshots=False)
+    assert lazy.history[0].state.screenshot is None
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_journal_round_trip(pathlib.Path(tempfile.mkdtemp()))
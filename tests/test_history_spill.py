@@ -0,0 +1,77 @@
+import base64
+import sys
+
+sys.path.append(".")
+
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList
+from browser_use.browser.views import BrowserStateHistory
+
+
+def _screenshot(i):
+    return base64.b64encode(b"\x89PNG\r\n\x1a\n" + str(i).encode() * 64).decode()
+
+
+def _history(n):
+    return AgentHistoryList(history=[
+        AgentHistory(
+            model_output=None,
+            result=[ActionResult()],
+            state=BrowserStateHistory(url=f"https://example.com/{i}", title="", tabs=[], interacted_element=[],
+                                      screenshot=_screenshot(i)),
+        )
+        for i in range(n)
+    ])
+
+
+def test_spiller_keeps_last_screenshots_in_memory(tmp_path):
+    from src.utils.blob_store import BlobStore
+    from src.utils.history_spill import ScreenshotSpiller, SpilledBrowserStateHistory
+
+    history = _history(8)
+    spiller = ScreenshotSpiller(BlobStore(str(tmp_path)), keep_in_memory=3)
+    spiller.spill(history)
+
+    spilled = [isinstance(item.state, SpilledBrowserStateHistory) for item in history.history]
+    assert spilled == [True] * 5 + [False] * 3
+    assert spiller.spilled == 5
+    assert "_screenshot_ref" in vars(history.history[0].state)
+    assert history.history[0].state.__dict__.get("screenshot") is None
+
+    # Read back transparently by consumers
+    assert history.history[0].state.screenshot == _screenshot(0)
+    assert history.model_dump()["history"][1]["state"]["screenshot"] == _screenshot(1)
+
+    history.history.append(_history(1).history[0])
+    spiller.spill(history)
+    assert spiller.spilled == 6
+
+
+def test_run_spill_directory_lives_as_long_as_the_history(tmp_path):
+    import gc
+    import os
+
+    from src.agent.browser_use.browser_use_agent import BrowserUseAgent
+    from src.utils.history_spill import ScreenshotSpiller
+
+    agent = BrowserUseAgent.__new__(BrowserUseAgent)
+    agent.screenshot_spill_dir = str(tmp_path)
+    history = _history(4)
+    store = agent._new_spill_store()
+    ScreenshotSpiller(store, keep_in_memory=1).spill(history)
+    run_dir = store.root_dir
+    del store
+    gc.collect()
+    assert os.path.isdir(run_dir)
+    assert history.history[0].state.screenshot == _screenshot(0)
+
+    del history
+    gc.collect()
+    assert not os.path.exists(run_dir)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_spiller_keeps_last_screenshots_in_memory(pathlib.Path(tempfile.mkdtemp()))
+    test_run_spill_directory_lives_as_long_as_the_history(pathlib.Path(tempfile.mkdtemp()))
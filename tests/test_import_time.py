@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+sys.path.append(".")
+
+PROVIDER_SDKS = {
+    "langchain_anthropic", "langchain_mistralai", "langchain_google_genai", "langchain_ollama",
+    "langchain_openai", "langchain_ibm", "langchain_aws", "boto3",
+}
+
+
+def _import_times(module: str) -> dict:
+    """Cumulative import time in microseconds of every module loaded by `import module`, from -X importtime."""
+    code = f"import sys; sys.path.append('.'); import {module}"
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_llm_provider_loads_no_provider_sdk():
+    times = _import_times("src.utils.llm_provider")
+    assert not PROVIDER_SDKS & times.keys()
+    # Used to be several seconds with every SDK imported eagerly
+    assert times["src.utils.llm_provider"] < 500_000
+
+
+def test_utils_loads_no_provider_sdk_or_gradio():
+    times = _import_times("src.utils.utils")
+    assert not (PROVIDER_SDKS | {"gradio"}) & times.keys()
+
+
+def test_webui_manager_defers_deep_research():
+    times = _import_times("src.webui.webui_manager")
+    assert "src.agent.deep_research.deep_research_agent" not in times
+    assert "langgraph" not in times
+    assert not PROVIDER_SDKS & times.keys()
+
+
+if __name__ == "__main__":
+    test_llm_provider_loads_no_provider_sdk()
+    test_utils_loads_no_provider_sdk_or_gradio()
+    test_webui_manager_defers_deep_research()
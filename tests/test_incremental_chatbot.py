@@ -0,0 +1,40 @@
+import sys
+
+sys.path.append(".")
+
+
+def test_chat_history_reuses_processed_messages():
+    import gradio as gr
+
+    from src.webui.incremental_chatbot import IncrementalChatHistory
+
+    chatbot = gr.Chatbot(type="messages")
+    view = IncrementalChatHistory(chatbot)
+    history = [
+        {"role": "user", "content": "open example.com"},
+        {"role": "assistant", "content": "--- **Step 1** ---"},
+    ]
+    first = view.render(history)
+
+    history.append({"role": "assistant", "content": "--- **Step 2** ---"})
+    second = view.render(history)
+    assert len(second) == 3
+    assert second[0] is first[0]
+    assert second[1] is first[1]
+    assert second[2].content == "--- **Step 2** ---"
+
+    # Replacing content is picked up
+    history[1]["content"] = "--- **Step 1 (edited)** ---"
+    third = view.render(history)
+    assert third[1] is not first[1]
+    assert third[1].content == "--- **Step 1 (edited)** ---"
+
+    # The Chatbot passes the processed messages through as they are
+    assert chatbot.postprocess(third).root == third
+    assert [message.content for message in chatbot.postprocess(history).root] == [
+        message.content for message in third
+    ]
+
+
+if __name__ == "__main__":
+    test_chat_history_reuses_processed_messages()
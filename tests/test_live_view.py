@@ -0,0 +1,127 @@
+import asyncio
+import base64
+import io
+import sys
+
+sys.path.append(".")
+
+from PIL import Image, ImageDraw
+
+
+def _jpeg(width, height, box=None):
+    image = Image.new("RGB", (width, height), "white")
+    if box:
+        ImageDraw.Draw(image).rectangle(box, fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class FakePage:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    async def screenshot(self, **kwargs):
+        return self.frames.pop(0)
+
+
+class FakeCDPSession:
+    def __init__(self):
+        self.handlers = {}
+        self.sent = []
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def send(self, method, params=None):
+        self.sent.append(method)
+
+    async def detach(self):
+        pass
+
+    def emit_frame(self, data, session_id):
+        self.handlers["Page.screencastFrame"]({"data": data, "sessionId": session_id, "metadata": {}})
+
+
+class FakeScreencastPage:
+    def __init__(self):
+        self.url = "about:blank"
+        self.context = self
+        self.cdp_session = FakeCDPSession()
+
+    async def new_cdp_session(self, page):
+        return self.cdp_session
+
+
+class FakeContext:
+    def __init__(self, page):
+        self.page = page
+
+    async def get_current_page(self):
+        return self.page
+
+
+def test_live_view_skips_unchanged_frames():
+    from src.browser.live_view import LiveViewPipeline
+
+    blank = _jpeg(1280, 1100)
+    changed = _jpeg(1280, 1100, box=(100, 100, 700, 600))
+    pipeline = LiveViewPipeline(FakeContext(FakePage([blank, blank, changed])), fps=1000, max_width=640)
+
+    async def run():
+        frames = []
+        for _ in range(3):
+            pipeline._next_capture_at = 0
+            frames.append(await pipeline.poll())
+        return frames
+
+    first, second, third = asyncio.run(run())
+    assert first is not None
+    assert second is None
+    assert third is not None
+    assert pipeline.frames_captured == 3
+    assert pipeline.frames_sent == 2
+    assert Image.open(io.BytesIO(base64.b64decode(first))).width == 640
+
+
+def test_live_view_respects_frame_rate():
+    from src.browser.live_view import LiveViewPipeline
+
+    pipeline = LiveViewPipeline(FakeContext(FakePage([_jpeg(320, 200)] * 2)), fps=1)
+
+    async def run():
+        return await pipeline.poll(), await pipeline.poll()
+
+    first, second = asyncio.run(run())
+    assert first is not None
+    assert second is None
+    assert pipeline.frames_captured == 1
+
+
+def test_screencast_keeps_only_latest_frames():
+    from src.browser.live_view import ScreencastStream
+
+    page = FakeScreencastPage()
+    stream = ScreencastStream(FakeContext(page), fps=1000, max_queued_frames=2)
+
+    async def run():
+        assert await stream.poll() is None
+        for i in range(5):
+            page.cdp_session.emit_frame(f"frame-{i}", i)
+        await stream.wait_for_frame(timeout=1)
+        latest = await stream.poll()
+        await asyncio.sleep(0)
+        await stream.stop()
+        return latest
+
+    assert asyncio.run(run()) == "frame-4"
+    assert stream.frames_received == 5
+    assert stream.frames_dropped == 3
+    assert page.cdp_session.sent.count("Page.screencastFrameAck") == 5
+    assert "Page.stopScreencast" in page.cdp_session.sent
+
+
+if __name__ == "__main__":
+    test_live_view_skips_unchanged_frames()
+    test_live_view_respects_frame_rate()
+    test_screencast_keeps_only_latest_frames()
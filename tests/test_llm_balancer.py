@@ -0,0 +1,156 @@
+import asyncio
+import sys
+
+sys.path.append(".")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.utils.llm_balancer import EndpointPool, is_retryable_error, load_balanced
+
+
+class ConnectError(Exception):
+    pass
+
+
+class _BadRequest(Exception):
+    status_code = 400
+
+
+class _Client:
+    def __init__(self, name, fail_with=None):
+        self.name = name
+        self.fail_with = fail_with
+        self.calls = 0
+
+    async def ainvoke(self):
+        self.calls += 1
+        if self.fail_with is not None:
+            raise self.fail_with
+        await asyncio.sleep(0.01)
+        return self.name
+
+
+def _pool(*clients, **kwargs):
+    return EndpointPool(list(clients), [f"http://{c.name}" for c in clients], **kwargs)
+
+
+def test_retryable_errors():
+    assert is_retryable_error(ConnectError("refused"))
+    assert is_retryable_error(TimeoutError())
+    assert not is_retryable_error(_BadRequest())
+    assert not is_retryable_error(ValueError("bad json"))
+
+
+def test_calls_spread_over_least_busy_endpoints():
+    a, b = _Client("a"), _Client("b")
+    pool = _pool(a, b)
+
+    async def _run():
+        return await asyncio.gather(*(pool.acall(lambda client: client.ainvoke()) for _ in range(4)))
+
+    assert sorted(asyncio.run(_run())) == ["a", "a", "b", "b"]
+    assert [endpoint["outstanding"] for endpoint in pool.stats()] == [0, 0]
+
+
+def test_fails_over_and_opens_circuit():
+    down, up = _Client("down", fail_with=ConnectError("refused")), _Client("up")
+    pool = _pool(down, up, failure_threshold=2, cooldown=60)
+
+    async def _run():
+        return [await pool.acall(lambda client: client.ainvoke()) for _ in range(4)]
+
+    # Least outstanding ties go to the fastest endpoint, so keep "down" first until it trips
+    pool.endpoints[1].latency_ewma = 1.0
+    assert asyncio.run(_run()) == ["up"] * 4
+    assert down.calls == 2
+    assert pool.stats()[0]["healthy"] is False
+
+
+def test_request_errors_are_not_failed_over():
+    bad, other = _Client("bad", fail_with=_BadRequest()), _Client("other")
+    pool = _pool(bad, other)
+    pool.endpoints[1].latency_ewma = 1.0
+    try:
+        asyncio.run(pool.acall(lambda client: client.ainvoke()))
+        assert False, "expected the error to propagate"
+    except _BadRequest:
+        pass
+    assert other.calls == 0
+    assert pool.endpoints[0].consecutive_failures == 0
+
+
+def test_health_check_closes_and_opens_circuits():
+    a, b = _Client("a"), _Client("b")
+    pool = EndpointPool([a, b], ["http://a", "http://b"], health_urls=["http://a/models", "http://b/models"])
+    pool.endpoints[0].open_until = float("inf")
+
+    async def _probe(url):
+        return url.startswith("http://a")
+
+    pool._probe = _probe
+    asyncio.run(pool.check_health())
+    assert [endpoint["healthy"] for endpoint in pool.stats()] == [True, False]
+
+
+def test_close_stops_health_checks():
+    a, b = _Client("a"), _Client("b")
+    pool = EndpointPool([a, b], ["http://a", "http://b"], health_urls=["http://a/models", "http://b/models"],
+                        health_check_interval=30)
+    probes = []
+
+    async def _probe(url):
+        probes.append(url)
+        return True
+
+    pool._probe = _probe
+
+    async def _run():
+        await pool.acall(lambda client: client.ainvoke())
+        task = pool._health_task
+        await asyncio.sleep(0)
+        pool.close()
+        await asyncio.sleep(0)
+        # Calls keep working, without restarting the probes
+        await pool.acall(lambda client: client.ainvoke())
+        return task
+
+    task = asyncio.run(_run())
+    assert task.cancelled()
+    assert pool._health_task is None
+    assert probes == ["http://a/models", "http://b/models"]
+
+
+def test_load_balanced_keeps_the_model_class():
+    clients = [FakeListChatModel(responses=["one"]), FakeListChatModel(responses=["two"])]
+    llm = load_balanced(clients, ["http://a", "http://b"])
+    assert type(llm).__name__ == "FakeListChatModel"
+    assert isinstance(llm, FakeListChatModel)
+
+    llm.endpoint_pool.endpoints[0].outstanding = 1
+    assert asyncio.run(llm.ainvoke("hi")).content == "two"
+
+
+def test_get_llm_model_balances_comma_separated_endpoints():
+    from src.utils import llm_provider
+
+    llm_provider.clear_llm_cache()
+    llm = llm_provider.get_llm_model(
+        "openai", model_name="gpt-4o", temperature=0.5, api_key="sk", base_url="http://a/v1, http://b/v1"
+    )
+    assert type(llm).__name__ == "ChatOpenAI"
+    assert llm.model_name == "gpt-4o"
+    assert [str(client.openai_api_base) for client in llm.endpoint_pool.clients] == ["http://a/v1", "http://b/v1"]
+    assert llm.endpoint_pool.endpoints[1].health_url == "http://b/v1/models"
+    assert llm_provider.get_llm_model(
+        "openai", model_name="gpt-4o", temperature=0.5, api_key="sk", base_url="http://a/v1, http://b/v1"
+    ) is llm
+    closed = []
+    llm.endpoint_pool.close = lambda: closed.append(True)
+    llm_provider.clear_llm_cache()
+    assert closed == [True]
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(".")
+
+
+def test_clients_are_reused_per_provider_model_and_key(monkeypatch):
+    from src.utils import llm_provider
+
+    llm_provider.clear_llm_cache()
+    base = dict(model_name="gpt-4o", temperature=0.5, base_url="http://localhost:1/v1", api_key="sk-one")
+    first = llm_provider.get_llm_model("openai", **base)
+
+    assert llm_provider.get_llm_model("openai", **base) is first
+    assert llm_provider.get_llm_model("openai", **{**base, "temperature": 0.7}) is not first
+    assert llm_provider.get_llm_model("openai", **{**base, "api_key": "sk-two"}) is not first
+    assert llm_provider.get_llm_model("openai", **{**base, "model_name": "gpt-4o-mini"}) is not first
+    # The key itself never ends up in the cache key
+    assert not any("sk-one" in repr(key) for key in llm_provider._llm_cache)
+
+
+def test_cache_is_bounded(monkeypatch):
+    from src.utils import llm_provider
+
+    llm_provider.clear_llm_cache()
+    monkeypatch.setattr(llm_provider, "LLM_CACHE_SIZE", 2)
+    clients = [
+        llm_provider.get_llm_model("openai", model_name="gpt-4o", temperature=t, api_key="sk", base_url="http://x")
+        for t in (0.1, 0.2, 0.3)
+    ]
+    assert len(llm_provider._llm_cache) == 2
+    assert llm_provider.get_llm_model(
+        "openai", model_name="gpt-4o", temperature=0.1, api_key="sk", base_url="http://x"
+    ) is not clients[0]
+    llm_provider.clear_llm_cache()
+
+
+class _ChatCompletions(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the client pools its connection
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "1", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "hi"}}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_cached_client_works_across_event_loops():
+    from src.utils import llm_provider
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatCompletions)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    llm_provider.clear_llm_cache()
+
+    async def ask():
+        llm = llm_provider.get_llm_model("openai", model_name="gpt-4o", temperature=0, api_key="sk", base_url=base_url)
+        # Same loop, same client
+        assert llm_provider.get_llm_model(
+            "openai", model_name="gpt-4o", temperature=0, api_key="sk", base_url=base_url
+        ) is llm
+        if llm.root_async_client.max_retries:
+            # A retry would hide a connection pooled on a closed loop
+            llm.root_async_client = llm.root_async_client.with_options(max_retries=0)
+            llm.async_client = llm.root_async_client.chat.completions
+        return llm, (await llm.ainvoke("hello")).content
+
+    try:
+        # Each asyncio.run closes its loop, and with it the connections pooled on it
+        first, answer = asyncio.run(ask())
+        assert answer == "hi"
+        second, answer = asyncio.run(ask())
+        assert answer == "hi"
+        assert second is not first
+        # The client of the closed loop was dropped
+        assert len(llm_provider._llm_cache) == 1
+    finally:
+        server.shutdown()
+        llm_provider.clear_llm_cache()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
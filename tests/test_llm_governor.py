@@ -0,0 +1,158 @@
+import asyncio
+import sys
+import time
+
+sys.path.append(".")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.utils.llm_limits import LLMGovernor, TokenBucket, governed, llm_call_key
+
+
+class _RateLimitError(Exception):
+    status_code = 429
+
+
+class _RateLimitedModel(FakeListChatModel):
+    def _call(self, *args, **kwargs):
+        raise _RateLimitError("slow down")
+
+
+def test_token_bucket_refills_over_the_minute():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == 1.0
+    now[0] = 30.0
+    assert bucket.wait_time(30) == 0
+    # More than a minute's worth only waits for a full bucket
+    assert bucket.wait_time(500) == 30.0
+
+
+def test_governor_spaces_calls_by_token_budget():
+    governor = LLMGovernor(max_concurrent=4, tokens_per_minute=6000)
+
+    async def _call(tokens):
+        async with governor.slot("a", tokens=tokens):
+            return time.monotonic()
+
+    async def _run():
+        start = time.monotonic()
+        first = await _call(6000)
+        second = await _call(20)
+        return first - start, second - start
+
+    first, second = asyncio.run(_run())
+    assert first < 0.05
+    # 20 tokens at 100 tokens per second
+    assert second >= 0.15
+
+
+def test_rate_limit_error_pauses_and_shrinks_parallelism():
+    governor = LLMGovernor(max_concurrent=8, requests_per_minute=600)
+    assert governor.recommended_parallelism(6) == 6
+
+    async def _run():
+        try:
+            async with governor.slot("a"):
+                raise _RateLimitError("too many requests")
+        except _RateLimitError:
+            pass
+
+    asyncio.run(_run())
+    assert governor.rate_limited == 1
+    assert governor._paused_until > time.monotonic()
+    assert governor.in_flight == 0
+    assert governor.recommended_parallelism(6) == 3
+
+
+def test_parallelism_follows_request_rate():
+    governor = LLMGovernor(max_concurrent=8, requests_per_minute=30)
+    # 6 s per call: one agent makes 10 calls a minute, 30 RPM keeps three busy
+    governor.latency_ewma = 6.0
+    assert governor.recommended_parallelism(6) == 3
+
+
+def test_get_llm_model_shares_a_governor_per_model(monkeypatch):
+    from src.utils import llm_provider
+
+    monkeypatch.setattr(llm_provider, "_governors", {})
+    llm_provider.clear_llm_cache()
+    base = dict(model_name="gpt-4o", base_url="http://localhost:1/v1", api_key="sk")
+    assert llm_provider.get_llm_governor(llm_provider.get_llm_model("openai", **base)) is None
+
+    monkeypatch.setenv("OPENAI_REQUESTS_PER_MINUTE", "100")
+    first = llm_provider.get_llm_model("openai", temperature=0.1, **base)
+    second = llm_provider.get_llm_model("openai", temperature=0.2, tokens_per_minute=1000, **base)
+    governor = llm_provider.get_llm_governor(first)
+    assert governor is llm_provider.get_llm_governor(second)
+    assert governor.requests.per_minute == 100
+    # Still the provider class, browser-use picks its tool calling method by the name
+    assert type(first).__name__ == "ChatOpenAI"
+    llm_provider.clear_llm_cache()
+
+
+def test_every_call_of_a_governed_model_takes_a_slot():
+    governor = LLMGovernor(max_concurrent=1, requests_per_minute=600)
+    llm = governed(FakeListChatModel(responses=["a", "b", "c"], sleep=0.05), governor)
+    assert isinstance(llm, FakeListChatModel)
+    keys = []
+    acquire = governor.acquire
+
+    async def recording_acquire(key="default"):
+        keys.append(key)
+        await acquire(key)
+
+    governor.acquire = recording_acquire
+
+    async def _run():
+        async def _planner():
+            # Any caller, not only the agent's get_next_action
+            with llm_call_key("planner"):
+                return (await llm.ainvoke("plan")).content
+
+        return await asyncio.gather(_planner(), llm.ainvoke("hi"), _collect(llm.astream("hi")))
+
+    async def _collect(stream):
+        return "".join([chunk.content async for chunk in stream])
+
+    results = asyncio.run(_run())
+    assert sorted([results[0], results[1].content, results[2]]) == ["a", "b", "c"]
+    assert sorted(keys) == ["default", "default", "planner"]
+    assert governor.in_flight == 0
+    assert governor.latency_ewma is not None
+
+
+def test_sync_calls_wait_for_the_rate_budget():
+    # browser-use's raw tool calling mode calls invoke from the event loop
+    governor = LLMGovernor(max_concurrent=1, requests_per_minute=600)
+    llm = governed(FakeListChatModel(responses=["a", "b"]), governor)
+    governor.requests.consume(600)
+
+    async def _agent_step():
+        started = time.monotonic()
+        content = llm.invoke("hi").content
+        return content, time.monotonic() - started
+
+    content, waited = asyncio.run(_agent_step())
+    assert content == "a"
+    # One request at 10 per second
+    assert waited >= 0.09
+    assert governor.in_flight == 0
+
+    failing = governed(_RateLimitedModel(responses=["b"]), governor)
+    governor.requests.level = governor.requests.capacity
+    try:
+        failing.invoke("hi")
+        assert False, "expected the rate limit error"
+    except _RateLimitError:
+        pass
+    assert governor.rate_limited == 1
+    assert governor._paused_until > time.monotonic()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from src.utils.llm_response_cache import SQLiteResponseCache
+
+
+def _generation(text):
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def test_roundtrip_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteResponseCache(path).update("prompt", "model-a", _generation("plan"))
+
+    cache = SQLiteResponseCache(path)
+    assert cache.lookup("prompt", "model-a")[0].message.content == "plan"
+    assert cache.lookup("prompt", "model-b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_and_size_limit(tmp_path, monkeypatch):
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60, max_entries=2)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.update("old", "m", _generation("1"))
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.lookup("old", "m") is None
+
+    cache.update("a", "m", _generation("a"))
+    monkeypatch.setattr(time, "time", lambda: now + 62)
+    cache.update("b", "m", _generation("b"))
+    monkeypatch.setattr(time, "time", lambda: now + 63)
+    cache.lookup("a", "m")
+    cache.update("c", "m", _generation("c"))
+    # "b" was the least recently used
+    assert cache.count() == 2
+    assert cache.lookup("b", "m") is None
+    assert cache.lookup("a", "m") is not None
+
+
+def test_chat_model_is_served_from_cache(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite"))
+    llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+    async def _run():
+        return [(await llm.ainvoke("same prompt")).content for _ in range(2)]
+
+    assert asyncio.run(_run()) == ["first", "first"]
+    assert cache.hits == 1
+
+
+def test_reasoning_wrapper_uses_the_cache(tmp_path):
+    from src.utils.reasoning_llm import DeepSeekR1ChatOpenAI
+
+    calls = []
+
+    class _Completions:
+        async def create(self, **params):
+            calls.append(params)
+            message = SimpleNamespace(content="answer", reasoning_content="thinking")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    llm = DeepSeekR1ChatOpenAI(model="deepseek-reasoner", base_url="http://localhost:1/v1", api_key="sk",
+                               cache=SQLiteResponseCache(str(tmp_path / "cache.sqlite")))
+    llm.async_client = _Completions()
+
+    async def _run():
+        return [await llm.ainvoke("plan the trip") for _ in range(2)]
+
+    first, second = asyncio.run(_run())
+    assert len(calls) == 1
+    assert second.content == "answer"
+    assert second.reasoning_content == first.reasoning_content == "thinking"
+
+
+def test_get_llm_model_opt_in(tmp_path, monkeypatch):
+    from src.utils import llm_provider, llm_response_cache
+
+    monkeypatch.setenv("LLM_RESPONSE_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(llm_response_cache, "_response_cache", None)
+    llm_provider.clear_llm_cache()
+    base = dict(model_name="gpt-4o", base_url="http://localhost:1/v1", api_key="sk")
+    assert llm_provider.get_llm_model("openai", **base).cache is None
+    cached = llm_provider.get_llm_model("openai", response_cache=True, **base)
+    assert cached.cache is llm_response_cache.get_response_cache()
+    assert cached.cache.path == str(tmp_path / "cache.sqlite")
+    llm_provider.clear_llm_cache()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
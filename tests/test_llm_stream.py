@@ -0,0 +1,153 @@
+import asyncio
+import sys
+
+sys.path.append(".")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.utils.llm_stream import (
+    PartialOutputCallbackHandler,
+    PartialOutputCollector,
+    StreamCancelled,
+    ThinkTagParser,
+    stream_partial_output,
+)
+
+
+def _parse(chunks):
+    parser = ThinkTagParser()
+    reasoning, answer = "", ""
+    for chunk in chunks + [None]:
+        r, a = parser.feed(chunk) if chunk is not None else parser.flush()
+        reasoning += r
+        answer += a
+    return reasoning, answer
+
+
+def test_think_tags_split_across_chunks():
+    text = "<think>plan the click</think>{\"action\": 1}"
+    for size in (1, 2, 3, 7, len(text)):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert _parse(chunks) == ("plan the click", "{\"action\": 1}")
+
+
+def test_reasoning_is_reported_before_the_closing_tag():
+    parser = ThinkTagParser()
+    assert parser.feed("<think>first ") == ("first ", "")
+    # A possible start of </think> is held back until the next chunk decides it
+    assert parser.feed("idea </th") == ("idea ", "")
+    assert parser.feed("ink>answer") == ("", "answer")
+
+
+def test_missing_opening_tag_and_plain_answers():
+    assert _parse(["pre-filled ", "thought</think>", "done"]) == ("pre-filled thought", "done")
+    assert _parse(["just ", "an answer"]) == ("", "just an answer")
+
+
+def test_sink_gets_partial_output_and_can_cancel():
+    seen = []
+
+    def sink(partial):
+        seen.append((partial.reasoning, partial.content))
+        return len(seen) < 2
+
+    with stream_partial_output(sink):
+        collector = PartialOutputCollector()
+    collector.add("a", "")
+    try:
+        collector.add("", "b")
+        assert False, "expected StreamCancelled"
+    except StreamCancelled:
+        pass
+    assert seen == [("a", ""), ("a", "b")]
+    # Outside the context manager nothing is reported
+    PartialOutputCollector().add("x", "y")
+    assert len(seen) == 2
+
+
+def test_callback_handler_streams_regular_chat_models():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="<think>hmm</think> ok then")]),
+                               callbacks=[PartialOutputCallbackHandler()])
+    seen = []
+
+    async def _run():
+        with stream_partial_output(lambda partial: seen.append(partial)):
+            # Real providers stream because `_enable_streaming` sets their `streaming` field
+            task = asyncio.create_task(llm.ainvoke("hi", stream=True))
+        return await task
+
+    message = asyncio.run(_run())
+    assert message.content == "<think>hmm</think> ok then"
+    assert len(seen) > 1
+    assert seen[-1].reasoning == "hmm"
+    assert seen[-1].content.strip() == "ok then"
+
+
+class _ToolCallStreamingModel(BaseChatModel):
+    """Streams only tool call argument chunks, like function calling with langchain_openai."""
+    args: list
+
+    @property
+    def _llm_type(self) -> str:
+        return "tool-call-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=""))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for index, args in enumerate(self.args):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{"name": "AgentOutput" if index == 0 else None, "args": args, "id": None,
+                                   "index": 0}],
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def test_callback_handler_streams_tool_call_arguments():
+    llm = _ToolCallStreamingModel(args=['{"action": ', '[{"done": ', '{}}]}'],
+                                  callbacks=[PartialOutputCallbackHandler()])
+    seen = []
+
+    async def _run(sink):
+        with stream_partial_output(sink):
+            task = asyncio.create_task(llm.ainvoke("hi", stream=True))
+        return await task
+
+    message = asyncio.run(_run(lambda partial: seen.append(partial)))
+    assert message.tool_calls[0]["args"] == {"action": [{"done": {}}]}
+    assert [partial.content for partial in seen] == ['{"action": ', '{"action": [{"done": ', '{"action": [{"done": {}}]}']
+
+    # Stopping cancels the call even though no text is streamed
+    try:
+        asyncio.run(_run(lambda partial: False))
+        assert False, "expected StreamCancelled"
+    except StreamCancelled:
+        pass
+
+
+def test_get_llm_model_streaming_flag():
+    from src.utils import llm_provider
+
+    llm_provider.clear_llm_cache()
+    base = dict(model_name="gpt-4o", base_url="http://localhost:1/v1", api_key="sk")
+    streaming = llm_provider.get_llm_model("openai", streaming=True, **base)
+    assert streaming.streaming
+    assert any(isinstance(handler, PartialOutputCallbackHandler) for handler in streaming.callbacks)
+    assert not llm_provider.get_llm_model("openai", **base).streaming
+
+    reasoner = llm_provider.get_llm_model("deepseek", model_name="deepseek-reasoner", api_key="sk",
+                                          base_url="http://localhost:1/v1", streaming=True)
+    assert reasoner.streaming and not reasoner.callbacks
+    llm_provider.clear_llm_cache()
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
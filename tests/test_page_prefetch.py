@@ -0,0 +1,86 @@
+import asyncio
+import sys
+
+sys.path.append(".")
+
+HTML = "<html><body><h1>Prices</h1><a href='https://shop.example/item'>Item</a></body></html>"
+
+
+class FakePage:
+    def __init__(self, html=HTML, delay=0.0):
+        self.html = html
+        self.delay = delay
+        self.evaluated = []
+
+    async def evaluate(self, script, arg):
+        self.evaluated.append(arg)
+        return ["https://shop.example"]
+
+    async def content(self):
+        await asyncio.sleep(self.delay)
+        return self.html
+
+
+class FakeContext:
+    def __init__(self, page):
+        self.page = page
+
+    async def get_current_page(self):
+        return self.page
+
+
+def test_prefetched_markdown_is_reused_until_the_page_changes():
+    from src.controller.page_prefetch import PagePrefetcher
+
+    async def scenario():
+        prefetcher = PagePrefetcher()
+        resolved = []
+
+        async def resolve(origin):
+            resolved.append(origin)
+
+        prefetcher._resolve = resolve
+        page = FakePage()
+
+        # Nothing is converted before extract_content has been used
+        prefetcher.start(FakeContext(page))
+        await prefetcher._task
+        assert page.evaluated == [prefetcher.max_dns_prefetch_origins]
+        assert resolved == ["https://shop.example"]
+        assert not prefetcher._markdown
+
+        stripped = await prefetcher.page_markdown(HTML, strip_links=True)
+        assert "Prices" in stripped and prefetcher.misses == 1
+
+        # Only the variant extract_content asked for last is prefetched
+        new_html = HTML.replace("Prices", "Offers")
+        page.html = new_html
+        prefetcher.start(FakeContext(page))
+        await prefetcher._task
+        assert [key[1] for key in prefetcher._markdown] == [True, True]
+        assert "Offers" in await prefetcher.page_markdown(new_html, strip_links=True)
+        assert (prefetcher.hits, prefetcher.misses) == (1, 1)
+
+        linked = await prefetcher.page_markdown(new_html, strip_links=False)
+        assert "https://shop.example/item" in linked and prefetcher.misses == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancel_discards_unfinished_work():
+    from src.controller.page_prefetch import PagePrefetcher
+
+    async def scenario():
+        prefetcher = PagePrefetcher()
+        prefetcher.start(FakeContext(FakePage(delay=10)))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(prefetcher.cancel(), timeout=1)
+        assert prefetcher._task is None
+        assert not prefetcher._markdown
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_prefetched_markdown_is_reused_until_the_page_changes()
+    test_cancel_discards_unfinished_work()
@@ -0,0 +1,47 @@
+import sys
+
+sys.path.append(".")
+
+from browser_use.agent.views import AgentOutput
+from browser_use.controller.service import Controller
+
+
+def _output(actions, next_goal="Open the page"):
+    output_model = AgentOutput.type_with_custom_actions(Controller().registry.create_action_model())
+    return output_model.model_validate({
+        "current_state": {"evaluation_previous_goal": "Unknown", "memory": "", "next_goal": next_goal},
+        "action": actions,
+    })
+
+
+def test_substitutes_string_leaves_of_actions():
+    from src.agent.placeholders import PlaceholderSubstituter
+
+    long_url = "https://example.com/presigned?" + "x" * 5000
+    substituter = PlaceholderSubstituter({"{{URL}}": long_url, "{{URL_2}}": "https://b.example", "{{Q}}": 'say "hi"'})
+    output = _output(
+        [{"go_to_url": {"url": "{{URL}}"}}, {"input_text": {"index": 3, "text": "{{Q}} at {{URL_2}}"}}],
+        next_goal="Go to {{URL}}",
+    )
+
+    result = substituter.apply(output)
+    assert result is not output
+    assert result.action[0].go_to_url.url == long_url
+    assert result.action[1].input_text.text == 'say "hi" at https://b.example'
+    assert result.action[1].input_text.index == 3
+    # Only action params are substituted, the brain keeps the short placeholder
+    assert result.current_state.next_goal == "Go to {{URL}}"
+    assert type(result.action[0]) is type(output.action[0])
+
+
+def test_unchanged_output_is_returned_as_is():
+    from src.agent.placeholders import PlaceholderSubstituter
+
+    output = _output([{"go_to_url": {"url": "https://example.com"}}])
+    assert PlaceholderSubstituter({"{{URL}}": "https://x.example"}).apply(output) is output
+    assert PlaceholderSubstituter({}).apply(output) is output
+
+
+if __name__ == "__main__":
+    test_substitutes_string_leaves_of_actions()
+    test_unchanged_output_is_returned_as_is()
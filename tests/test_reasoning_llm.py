@@ -0,0 +1,108 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+
+def _llm(**kwargs):
+    from src.utils.reasoning_llm import DeepSeekR1ChatOpenAI
+
+    return DeepSeekR1ChatOpenAI(model="deepseek-reasoner", base_url="http://localhost:1/v1", api_key="sk", **kwargs)
+
+
+def _chunk(reasoning=None, content=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(reasoning_content=reasoning, content=content))])
+
+
+class _FakeCompletions:
+    def __init__(self, chunks=None):
+        self.calls = []
+        self.chunks = chunks or []
+
+    async def create(self, **params):
+        self.calls.append(params)
+        if params.get("stream"):
+            async def _stream():
+                for chunk in self.chunks:
+                    await asyncio.sleep(0)
+                    yield chunk
+
+            return _stream()
+        message = SimpleNamespace(content="answer", reasoning_content="thinking")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_ainvoke_uses_the_async_client():
+    llm = _llm()
+    fake = _FakeCompletions()
+    llm.async_client = fake
+
+    message = asyncio.run(llm.ainvoke([SystemMessage(content="sys"), HumanMessage(content="hi")]))
+
+    assert message.content == "answer"
+    assert message.reasoning_content == "thinking"
+    assert fake.calls[0]["messages"] == [{"role": "system", "content": "sys"}, {"role": "user", "content": "hi"}]
+    assert "stream" not in fake.calls[0]
+
+
+def test_streaming_collects_reasoning_and_content():
+    llm = _llm(streaming=True)
+    llm.async_client = _FakeCompletions([
+        _chunk(reasoning="let me "), _chunk(reasoning="think"), SimpleNamespace(choices=[]),
+        _chunk(content='{"a"'), _chunk(content=": 1}"),
+    ])
+
+    async def _run():
+        # Other coroutines keep running while the response streams in
+        ticks = 0
+
+        async def _ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(_ticker())
+        message = await llm.ainvoke("hi")
+        ticker.cancel()
+        return message, ticks
+
+    message, ticks = asyncio.run(_run())
+    assert message.content == '{"a": 1}'
+    assert message.reasoning_content == "let me think"
+    assert ticks > 0
+
+
+def test_ollama_streaming_splits_think_block(monkeypatch):
+    from langchain_core.messages import AIMessageChunk
+    from langchain_ollama import ChatOllama
+
+    from src.utils.llm_stream import stream_partial_output
+    from src.utils.reasoning_llm import DeepSeekR1ChatOllama
+
+    async def _astream(self, input, config=None, *, stop=None, **kwargs):
+        for text in ["<thi", "nk>look", " around</", "think>**JSON Response:**", '{"done": true}']:
+            yield AIMessageChunk(content=text)
+
+    monkeypatch.setattr(ChatOllama, "astream", _astream)
+    llm = DeepSeekR1ChatOllama(model="deepseek-r1:14b", streaming=True)
+    seen = []
+
+    async def _run():
+        with stream_partial_output(lambda partial: seen.append(partial.reasoning)):
+            return await llm.ainvoke("hi")
+
+    message = asyncio.run(_run())
+    assert message.content == '{"done": true}'
+    assert message.reasoning_content == "look around"
+    # Reasoning showed up before the answer was complete
+    assert seen[0] == "look"
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
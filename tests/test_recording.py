@@ -0,0 +1,76 @@
+import asyncio
+import base64
+import io
+import sys
+from types import SimpleNamespace
+
+sys.path.append(".")
+
+from PIL import Image
+
+
+def _screenshot(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (1280, 1100), color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def _history(colors):
+    items = []
+    for color in colors:
+        output = SimpleNamespace(current_state=SimpleNamespace(next_goal=f"Look at the {color} page"))
+        items.append(SimpleNamespace(state=SimpleNamespace(screenshot=_screenshot(color)), model_output=output))
+    items.append(SimpleNamespace(state=SimpleNamespace(screenshot=None), model_output=None))
+    return SimpleNamespace(history=items)
+
+
+def test_history_gif_is_rendered_off_loop(tmp_path):
+    from src.utils.recording import create_history_gif_async, history_frames
+
+    history = _history(["white", "gray", "black"])
+    assert [frame[0] for frame in history_frames(history)] == [1, 2, 3]
+
+    output_path = str(tmp_path / "history.gif")
+    result = asyncio.run(create_history_gif_async("Open a page", history, output_path, max_width=320))
+    assert result == output_path
+
+    gif = Image.open(output_path)
+    assert gif.width == 320
+    assert gif.n_frames >= 3
+
+
+def test_video_recorder_streams_mjpeg_avi_without_ffmpeg(tmp_path, monkeypatch):
+    import struct
+
+    from src.utils import recording
+
+    monkeypatch.setattr(recording.shutil, "which", lambda name: None)
+    recorder = recording.HistoryVideoRecorder(str(tmp_path / "run.mp4"), max_width=321)
+
+    async def run():
+        for color in ["white", "gray", "black"]:
+            recorder.submit(_screenshot(color))
+            await asyncio.sleep(0.05)
+        # Frames are written while the run goes on, not at close
+        assert recorder.frames_written > 0
+        return await recorder.close()
+
+    output_path = asyncio.run(run())
+    assert output_path == str(tmp_path / "run.avi")
+
+    with open(output_path, "rb") as f:
+        data = f.read()
+    assert data[:4] == b"RIFF" and data[8:12] == b"AVI "
+    assert struct.unpack("<I", data[4:8])[0] == len(data) - 8
+    avih = data.index(b"avih") + 8
+    total_frames, = struct.unpack("<I", data[avih + 16:avih + 20])
+    width, height = struct.unpack("<II", data[avih + 32:avih + 40])
+    assert (total_frames, width, height) == (3, 320, 274)
+    assert data.count(b"00dc") == 6  # three frame chunks and three index entries
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_history_gif_is_rendered_off_loop(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,140 @@
+import asyncio
+import sys
+
+sys.path.append(".")
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, config=None):
+        self.contexts = []
+        self.closed = False
+
+    async def new_context(self, config=None):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+def _scheduler(runner, max_workers=2, contexts_per_browser=1):
+    from src.agent.scheduler import AgentScheduler, BrowserPool
+
+    browsers = []
+
+    def factory(config):
+        browsers.append(FakeBrowser(config))
+        return browsers[-1]
+
+    pool = BrowserPool(contexts_per_browser=contexts_per_browser, browser_factory=factory)
+    return AgentScheduler(max_workers=max_workers, browser_pool=pool, job_runner=runner), browsers
+
+
+def test_jobs_run_by_priority_on_their_own_contexts():
+    order = []
+    leased = []
+
+    async def runner(scheduler, job, browser, context):
+        order.append(job.task)
+        leased.append(context)
+        await asyncio.sleep(0.01)
+        return job.task.upper()
+
+    async def scenario():
+        scheduler, browsers = _scheduler(runner, max_workers=1)
+        low = scheduler.submit("low", priority=5)
+        high = scheduler.submit("high", priority=0)
+        assert (await scheduler.wait(high, timeout=1)).result == "HIGH"
+        await scheduler.wait(low, timeout=1)
+        assert order == ["high", "low"]
+        assert scheduler.status(low)["status"] == "done"
+        assert all(context.closed for context in leased) and len(set(map(id, leased))) == 2
+        await scheduler.shutdown()
+        assert all(browser.closed for browser in browsers)
+
+    asyncio.run(scenario())
+
+
+def test_cancel_queued_and_running_jobs():
+
+    async def runner(scheduler, job, browser, context):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        scheduler, _ = _scheduler(runner, max_workers=1)
+        running = scheduler.submit("running")
+        queued = scheduler.submit("queued")
+        await asyncio.sleep(0.01)
+        assert scheduler.status(running)["status"] == "running"
+        assert scheduler.cancel(queued) and scheduler.cancel(running)
+        assert (await scheduler.wait(running, timeout=1)).status == "cancelled"
+        assert scheduler.status(queued)["status"] == "cancelled"
+        assert not scheduler.cancel(running)
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_reports_error_and_workers_scale_out():
+    active = []
+    peak = []
+
+    async def runner(scheduler, job, browser, context):
+        active.append(job.job_id)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.remove(job.job_id)
+        if job.task == "bad":
+            raise RuntimeError("boom")
+
+    async def scenario():
+        scheduler, browsers = _scheduler(runner, max_workers=3, contexts_per_browser=2)
+        ids = [scheduler.submit(task) for task in ("a", "b", "bad")]
+        for job_id in ids:
+            await scheduler.wait(job_id, timeout=1)
+        assert max(peak) == 3
+        assert len(browsers) == 2
+        assert scheduler.status(ids[2])["status"] == "failed" and scheduler.status(ids[2])["error"] == "boom"
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_llm_gate_rotates_between_keys():
+    from src.utils.llm_limits import FairLLMGate
+
+    async def scenario():
+        gate = FairLLMGate(max_concurrent=1)
+        order = []
+
+        async def call(key, i):
+            async with gate.slot(key):
+                order.append(key)
+                await asyncio.sleep(0)
+
+        await gate.acquire("busy")
+        tasks = [asyncio.create_task(call("busy", i)) for i in range(3)]
+        tasks.append(asyncio.create_task(call("quiet", 0)))
+        await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*tasks)
+        assert order[:2] == ["busy", "quiet"]
+        assert gate.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_jobs_run_by_priority_on_their_own_contexts()
+    test_cancel_queued_and_running_jobs()
+    test_failed_job_reports_error_and_workers_scale_out()
+    test_llm_gate_rotates_between_keys()
@@ -0,0 +1,111 @@
+import asyncio
+import sys
+import threading
+import time
+
+sys.path.append(".")
+
+from browser_use.agent.message_manager.views import MessageHistory, MessageMetadata
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+
+def _history(steps=6, result_chars=3000):
+    from src.agent.token_budget import TokenCounter
+
+    counter = TokenCounter(use_tokenizer=False)
+    history = MessageHistory()
+
+    def add(message, message_type=None):
+        history.add_message(message, MessageMetadata(tokens=counter.count(message), message_type=message_type))
+
+    add(SystemMessage(content="You are a browser agent."), "init")
+    add(HumanMessage(content="Your ultimate task is: find the price"), "init")
+    for i in range(steps):
+        add(AIMessage(content="", tool_calls=[{"name": "AgentOutput", "args": {"step": i}, "id": str(i), "type": "tool_call"}]))
+        add(ToolMessage(content="", tool_call_id=str(i)))
+        add(HumanMessage(content="Action result: " + "x" * result_chars))
+    add(HumanMessage(content="Current url: https://example.com\n[1]<button>Buy</button>"))
+    return history, counter
+
+
+def test_old_results_are_truncated_and_recent_kept():
+    from src.agent.token_budget import TokenBudget, classify_message
+
+    history, counter = _history()
+    budget = TokenBudget(max_tokens=100_000, keep_recent_steps=2, max_old_result_chars=100, counter=counter)
+
+    saved = budget.compact(history)
+    results = [m.message.content for m in history.messages if classify_message(m.message) == "action_result"]
+    assert saved > 0
+    assert all(len(content) < 200 for content in results[:4])
+    assert all(len(content) > 3000 for content in results[4:])
+    assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+    # A second pass has nothing left to do
+    assert budget.compact(history) == 0
+
+
+def test_oldest_steps_dropped_as_units_under_budget():
+    from src.agent.token_budget import TokenBudget, classify_message
+
+    history, counter = _history()
+    budget = TokenBudget(max_tokens=2_500, keep_recent_steps=2, max_old_result_chars=100, counter=counter)
+
+    budget.compact(history)
+    kinds = [classify_message(m.message, m.metadata.message_type) for m in history.messages]
+    assert kinds[:2] == ["system", "init"]
+    assert kinds[-1] == "state"
+    # Every remaining tool call still has its tool reply
+    assert kinds.count("model_output") == kinds.count("tool") >= 2
+    assert history.current_tokens <= 2_500
+
+    report = budget.report(7, [m.message for m in history.messages], history)
+    assert report.total == sum(report.by_type.values())
+    assert set(report.by_type) >= {"system", "init", "state", "action_result"}
+    assert "prompt tokens" in report.summary()
+
+
+def test_encoding_is_loaded_off_the_loop_with_a_timeout(monkeypatch):
+    from src.agent import token_budget
+    from src.agent.token_budget import TokenBudget, TokenCounter
+
+    monkeypatch.setattr(token_budget, "_encodings", {})
+    monkeypatch.setattr(token_budget, "_attempted", set())
+    loads = []
+
+    def slow_load(name):
+        # Stands in for a vocabulary download that never finishes in time
+        loads.append(threading.current_thread() is threading.main_thread())
+        time.sleep(1)
+
+    monkeypatch.setattr(token_budget, "_load_encoding", slow_load)
+
+    # Unconfigured counters estimate from characters and never load anything
+    assert TokenCounter(encoding=None).count_text("x" * 30) == 10
+    asyncio.run(TokenCounter(encoding=None).load())
+    assert loads == []
+
+    counter = TokenCounter(encoding="cl100k_base")
+
+    async def _run():
+        started = time.monotonic()
+        await counter.load(timeout=0.1)
+        # The loop keeps running while the load is stuck
+        await asyncio.sleep(0)
+        return time.monotonic() - started
+
+    assert asyncio.run(_run()) < 0.5
+    assert loads == [False]
+    assert counter.count_text("x" * 30) == 10
+    # One attempt per process
+    asyncio.run(counter.load(timeout=0.1))
+    assert loads == [False]
+
+    budget = TokenBudget(max_tokens=1_000, counter=counter, max_reports=2)
+    for step in range(5):
+        budget.report(step, [])
+    assert [report.step for report in budget.reports] == [3, 4]
+
+
+if __name__ == "__main__":
+    test_old_results_are_truncated_and_recent_kept()
+    test_oldest_steps_dropped_as_units_under_budget()
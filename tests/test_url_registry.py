@@ -0,0 +1,55 @@
+import asyncio
+import sys
+
+sys.path.append(".")
+
+from browser_use.agent.views import ActionResult
+
+
+LONG_URL = "https://studio.example.com/auth?token=" + "a1b2" * 500
+
+
+def test_register_and_resolve_round_trip():
+    from src.controller.url_registry import UrlHandleRegistry
+
+    registry = UrlHandleRegistry(min_length=100)
+    placeholders = registry.register_placeholders({"PRESIGNED_URL": LONG_URL, "NAME": "short"})
+
+    handle = placeholders["PRESIGNED_URL"]
+    assert handle.startswith("url://") and len(handle) < 20
+    assert placeholders["NAME"] == "short"
+    assert registry.register(LONG_URL) == handle
+    assert registry.resolve(f"open {handle} now") == f"open {LONG_URL} now"
+    assert registry.resolve("url://deadbeef") == "url://deadbeef"
+    assert registry.shorten(f"Navigated to {LONG_URL}") == f"Navigated to {handle}"
+
+    # A new task starts from an empty registry, a reused value keeps its handle
+    registry.clear()
+    assert len(registry) == 0 and registry.resolve(handle) == handle
+    assert registry.register_placeholders({"PRESIGNED_URL": LONG_URL})["PRESIGNED_URL"] == handle
+
+
+def test_controller_resolves_handles_in_one_action():
+    from src.controller.custom_controller import CustomController
+
+    controller = CustomController()
+    opened = []
+
+    @controller.registry.action("Record a URL")
+    async def record_url(url: str):
+        opened.append(url)
+        return ActionResult(extracted_content=f"Navigated to {url}", include_in_memory=True)
+
+    handle = controller.url_registry.register(LONG_URL)
+    action_model = controller.registry.create_action_model()
+    action = action_model.model_validate({"record_url": {"url": handle}})
+
+    result = asyncio.run(controller.act(action))
+    assert opened == [LONG_URL]
+    # The full URL is not echoed back into the agent's memory
+    assert result.extracted_content == f"Navigated to {handle}"
+
+
+if __name__ == "__main__":
+    test_register_and_resolve_round_trip()
+    test_controller_resolves_handles_in_one_action()